@@ -5,5 +5,6 @@ setup(
     version="1.0.0",
     packages=find_packages(where="src"),
     package_dir={"": "src"},
-    install_requires=["boto3~=1.18", "mesh_client~=1.4"],
+    install_requires=["boto3~=1.35", "mesh_client~=1.4"],
+    extras_require={"zstd": ["zstandard~=0.17"]},
 )
@@ -0,0 +1,202 @@
+import json
+import tarfile
+import time
+from base64 import b64encode
+from concurrent.futures import Future
+from dataclasses import dataclass
+from datetime import datetime
+from io import BytesIO
+from threading import Lock
+from typing import Callable, List, Optional
+from uuid import uuid4
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+from awsmesh.checksum import PayloadChecksums
+from awsmesh.mesh import MeshMessage
+from awsmesh.spool import SpooledBody
+from awsmesh.uploader import UploaderError, UploadEventMetadata
+
+NDJSON_AGGREGATE_FORMAT = "ndjson"
+TAR_AGGREGATE_FORMAT = "tar"
+AGGREGATE_FORMATS = {NDJSON_AGGREGATE_FORMAT, TAR_AGGREGATE_FORMAT}
+
+AGGREGATE_KEY_PREFIX = "aggregates"
+AGGREGATE_CHECKSUM_ALGORITHM = "CRC32"
+
+
+@dataclass
+class AggregationConfig:
+    object_format: str = NDJSON_AGGREGATE_FORMAT
+    max_bytes: int = 8 * 1024 * 1024
+    max_messages: int = 1000
+    max_age_sec: float = 60
+
+
+@dataclass
+class _AggregatedMessage:
+    key: str
+    message_id: str
+    content_encoding: Optional[str]
+    body: SpooledBody
+    checksums: PayloadChecksums
+    upload_event_metadata: UploadEventMetadata
+    future: Future
+
+
+class UnknownAggregateFormat(Exception):
+    pass
+
+
+def _build_ndjson(messages: List[_AggregatedMessage]):
+    buffer = BytesIO()
+    index = []
+    for message in messages:
+        with message.body.view() as body:
+            encoded_body = b64encode(body).decode("ascii")
+        record = {
+            "key": message.key,
+            "messageId": message.message_id,
+            "contentEncoding": message.content_encoding,
+            "body": encoded_body,
+        }
+        line = json.dumps(record).encode("utf-8") + b"\n"
+        index.append((buffer.tell(), len(line)))
+        buffer.write(line)
+    return buffer.getvalue(), index
+
+
+def _build_tar(messages: List[_AggregatedMessage]):
+    buffer = BytesIO()
+    index = []
+    with tarfile.open(fileobj=buffer, mode="w") as tar:
+        for message in messages:
+            tar_info = tarfile.TarInfo(name=message.key)
+            tar_info.size = len(message.body)
+            message.body.seek(0)
+            tar.addfile(tar_info, message.body)
+            padding = -len(message.body) % tarfile.BLOCKSIZE
+            index.append((buffer.tell() - padding - len(message.body), len(message.body)))
+    return buffer.getvalue(), index
+
+
+AGGREGATE_BUILDERS = {NDJSON_AGGREGATE_FORMAT: _build_ndjson, TAR_AGGREGATE_FORMAT: _build_tar}
+
+
+class S3Aggregator:
+    def __init__(
+        self,
+        s3_client,
+        bucket_name: str,
+        config: AggregationConfig,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if config.object_format not in AGGREGATE_FORMATS:
+            raise UnknownAggregateFormat(config.object_format)
+        self._s3_client = s3_client
+        self._bucket_name = bucket_name
+        self._config = config
+        self._clock = clock
+        self._messages: List[_AggregatedMessage] = []
+        self._buffered_bytes = 0
+        self._oldest_message_time: Optional[float] = None
+        self._lock = Lock()
+
+    def add(
+        self,
+        message: MeshMessage,
+        key: str,
+        content_encoding: Optional[str],
+        body: SpooledBody,
+        checksums: PayloadChecksums,
+        upload_event_metadata: UploadEventMetadata,
+    ) -> Future:
+        future: Future = Future()
+        aggregated_message = _AggregatedMessage(
+            key, message.id, content_encoding, body, checksums, upload_event_metadata, future
+        )
+        with self._lock:
+            self._messages.append(aggregated_message)
+            self._buffered_bytes += len(body)
+            if self._oldest_message_time is None:
+                self._oldest_message_time = self._clock()
+            messages = self._take_messages() if self._limit_reached() else []
+        self._write(messages)
+        return future
+
+    def flush(self):
+        with self._lock:
+            messages = self._take_messages()
+        self._write(messages)
+
+    def _limit_reached(self) -> bool:
+        if self._buffered_bytes >= self._config.max_bytes:
+            return True
+        if len(self._messages) >= self._config.max_messages:
+            return True
+        if self._oldest_message_time is None:
+            return False
+        return self._clock() - self._oldest_message_time >= self._config.max_age_sec
+
+    def _take_messages(self) -> List[_AggregatedMessage]:
+        messages = self._messages
+        self._messages = []
+        self._buffered_bytes = 0
+        self._oldest_message_time = None
+        return messages
+
+    def _write(self, messages: List[_AggregatedMessage]):
+        try:
+            self._write_aggregate(messages)
+        finally:
+            for message in messages:
+                message.body.close()
+                if not message.future.done():
+                    message.future.set_exception(UploaderError("Aggregate was not written"))
+
+    def _write_aggregate(self, messages: List[_AggregatedMessage]):
+        if len(messages) == 0:
+            return
+        object_format = self._config.object_format
+        key = f"{AGGREGATE_KEY_PREFIX}/{datetime.utcnow().strftime('%Y/%m/%d')}/{uuid4()}"
+        body, index = AGGREGATE_BUILDERS[object_format](messages)
+        try:
+            self._put_object(f"{key}.{object_format}", body)
+            self._put_object(f"{key}.manifest.json", self._build_manifest(key, messages, index))
+        except (ClientError, BotoCoreError) as e:
+            self._fail(messages, UploaderError(str(e)))
+            return
+        for message, (offset, _) in zip(messages, index):
+            message.upload_event_metadata.record_s3_aggregate(f"{key}.{object_format}", offset)
+            message.future.set_result(None)
+
+    def _fail(self, messages: List[_AggregatedMessage], error: UploaderError):
+        for message in messages:
+            message.future.set_exception(error)
+
+    def _build_manifest(self, key: str, messages: List[_AggregatedMessage], index) -> bytes:
+        manifest = {
+            "object": f"{key}.{self._config.object_format}",
+            "format": self._config.object_format,
+            "messages": [
+                {
+                    "key": message.key,
+                    "messageId": message.message_id,
+                    "contentEncoding": message.content_encoding,
+                    "md5": message.checksums.md5,
+                    "sha256": message.checksums.sha256,
+                    "offset": offset,
+                    "length": length,
+                }
+                for message, (offset, length) in zip(messages, index)
+            ],
+        }
+        return json.dumps(manifest).encode("utf-8")
+
+    def _put_object(self, key: str, body: bytes):
+        self._s3_client.put_object(
+            Bucket=self._bucket_name,
+            Key=key,
+            Body=body,
+            ChecksumAlgorithm=AGGREGATE_CHECKSUM_ALGORITHM,
+        )
@@ -0,0 +1,36 @@
+import random
+from dataclasses import dataclass
+from typing import Callable
+
+
+class ExponentialBackoff:
+    def __init__(
+        self,
+        initial_delay_sec: float,
+        max_delay_sec: float,
+        multiplier: float = 2.0,
+        jitter: Callable[[float, float], float] = random.uniform,
+    ):
+        self._initial_delay_sec = initial_delay_sec
+        self._max_delay_sec = max_delay_sec
+        self._multiplier = multiplier
+        self._jitter = jitter
+        self.attempts = 0
+
+    def next_delay(self) -> float:
+        delay = min(self._max_delay_sec, self._initial_delay_sec * self._multiplier**self.attempts)
+        self.attempts += 1
+        return self._jitter(delay / 2, delay)
+
+    def reset(self):
+        self.attempts = 0
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 1
+    initial_delay_sec: float = 0.5
+    max_delay_sec: float = 10
+
+    def new_backoff(self) -> ExponentialBackoff:
+        return ExponentialBackoff(self.initial_delay_sec, self.max_delay_sec)
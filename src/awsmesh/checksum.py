@@ -0,0 +1,82 @@
+import base64
+import hashlib
+import io
+import zlib
+from dataclasses import dataclass
+from typing import List
+
+
+@dataclass
+class PayloadChecksums:
+    md5: str
+    sha256: str
+
+
+def _encode_crc32(crc: int) -> str:
+    return base64.b64encode(crc.to_bytes(4, byteorder="big")).decode("ascii")
+
+
+class DigestingReader(io.RawIOBase):
+    def __init__(self, source):
+        super().__init__()
+        self._source = source
+        self._md5 = hashlib.md5(usedforsecurity=False)
+        self._sha256 = hashlib.sha256()
+
+    @property
+    def checksums(self) -> PayloadChecksums:
+        return PayloadChecksums(md5=self._md5.hexdigest(), sha256=self._sha256.hexdigest())
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        view = memoryview(buffer).cast("B")
+        size = self._source.readinto(view)
+        self._md5.update(view[:size])
+        self._sha256.update(view[:size])
+        return size
+
+
+class Crc32Reader(io.RawIOBase):
+    def __init__(self, source, part_size: int):
+        super().__init__()
+        self.bytes_read = 0
+        self._source = source
+        self._part_size = part_size
+        self._crc = 0
+        self._part_crcs: List[int] = []
+        self._part_crc = 0
+        self._part_bytes = 0
+
+    @property
+    def full_object_checksum(self) -> str:
+        return _encode_crc32(self._crc)
+
+    @property
+    def composite_checksum(self) -> str:
+        part_crcs = self._part_crcs + ([self._part_crc] if self._part_bytes > 0 else [])
+        joined = b"".join(crc.to_bytes(4, byteorder="big") for crc in part_crcs)
+        return f"{_encode_crc32(zlib.crc32(joined))}-{len(part_crcs)}"
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        view = memoryview(buffer).cast("B")
+        size = self._source.readinto(view)
+        self._update(view[:size])
+        self.bytes_read += size
+        return size
+
+    def _update(self, data: memoryview):
+        self._crc = zlib.crc32(data, self._crc)
+        while len(data) > 0:
+            size = min(len(data), self._part_size - self._part_bytes)
+            self._part_crc = zlib.crc32(data[:size], self._part_crc)
+            self._part_bytes += size
+            data = data[size:]
+            if self._part_bytes == self._part_size:
+                self._part_crcs.append(self._part_crc)
+                self._part_crc = 0
+                self._part_bytes = 0
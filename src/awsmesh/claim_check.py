@@ -0,0 +1,51 @@
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Optional
+
+from boto3.s3.transfer import TransferConfig, create_transfer_manager
+
+from awsmesh.checksum import DigestingReader
+from awsmesh.mesh import MeshMessage
+from awsmesh.s3 import PrefixedReader
+
+CLAIM_CHECK_THRESHOLD_BYTES = 240 * 1024
+CLAIM_CHECK_KEY_PREFIX = "claim-checks"
+
+
+@dataclass
+class ClaimCheckConfig:
+    bucket_name: str
+    threshold_bytes: int = CLAIM_CHECK_THRESHOLD_BYTES
+    key_prefix: str = CLAIM_CHECK_KEY_PREFIX
+
+
+class ClaimCheckStore:
+    def __init__(
+        self,
+        s3_client,
+        config: ClaimCheckConfig,
+        transfer_config: Optional[TransferConfig] = None,
+        transfer_manager=None,
+    ):
+        self._config = config
+        self._transfer_manager = transfer_manager or create_transfer_manager(
+            s3_client, transfer_config or TransferConfig()
+        )
+
+    @property
+    def threshold_bytes(self) -> int:
+        return self._config.threshold_bytes
+
+    def store(self, message: MeshMessage, head: memoryview, payload: DigestingReader) -> dict:
+        key = (
+            f"{self._config.key_prefix}/{message.date_delivered.strftime('%Y/%m/%d')}/{message.id}"
+        )
+        self._transfer_manager.upload(
+            PrefixedReader(BytesIO(head), payload), self._config.bucket_name, key
+        ).result()
+        return {
+            "bucket": self._config.bucket_name,
+            "key": key,
+            "size": message.bytes_read,
+            "sha256": payload.checksums.sha256,
+        }
@@ -0,0 +1,65 @@
+import io
+import zlib
+from typing import Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None  # type: ignore[assignment]
+
+GZIP_COMPRESSION = "gzip"
+ZSTD_COMPRESSION = "zstd"
+COMPRESSION_KEY_SUFFIXES = {GZIP_COMPRESSION: ".gz", ZSTD_COMPRESSION: ".zst"}
+
+COMPRESSION_READ_SIZE = 64 * 1024
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+class UnsupportedCompression(Exception):
+    pass
+
+
+def validate_compression(compression: Optional[str]):
+    if compression is None:
+        return
+    if compression not in COMPRESSION_KEY_SUFFIXES:
+        raise UnsupportedCompression(f"Unknown compression: {compression}")
+    if compression == ZSTD_COMPRESSION and zstandard is None:
+        raise UnsupportedCompression("zstd compression requires the zstandard package")
+
+
+def _new_compressor(compression: str):
+    if compression == ZSTD_COMPRESSION:
+        return zstandard.ZstdCompressor().compressobj()
+    return zlib.compressobj(wbits=GZIP_WBITS)
+
+
+class CompressingReader(io.RawIOBase):
+    def __init__(self, source, compression: str):
+        super().__init__()
+        self.bytes_read = 0
+        self._source = source
+        self._compressor = _new_compressor(compression)
+        self._pending = bytearray()
+        self._finished = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        view = memoryview(buffer).cast("B")
+        while len(self._pending) < len(view) and not self._finished:
+            self._compress_next_chunk()
+        size = min(len(view), len(self._pending))
+        view[:size] = self._pending[:size]
+        del self._pending[:size]
+        self.bytes_read += size
+        return size
+
+    def _compress_next_chunk(self):
+        data = self._source.read(COMPRESSION_READ_SIZE)
+        if data:
+            self._pending += self._compressor.compress(data)
+        else:
+            self._pending += self._compressor.flush()
+            self._finished = True
@@ -1,11 +1,44 @@
+import json
 import logging
 import sys
-from dataclasses import MISSING, Field, dataclass, fields
+from dataclasses import MISSING, Field, dataclass, fields, replace
 from distutils.util import strtobool
-from typing import Optional
+from typing import List, Optional
 
 logger = logging.getLogger(__name__)
 
+MAILBOX_CONFIG_FIELDS = {
+    "mesh_mailbox_ssm_param_name",
+    "mesh_password_ssm_param_name",
+    "mesh_shared_key_ssm_param_name",
+    "mesh_client_cert_ssm_param_name",
+    "mesh_client_key_ssm_param_name",
+    "mesh_ca_cert_ssm_param_name",
+    "message_destination",
+    "s3_bucket_name",
+    "sns_topic_arn",
+    "s3_multipart_threshold",
+    "s3_multipart_chunksize",
+    "s3_max_concurrency",
+    "s3_small_object_threshold",
+    "s3_compression",
+    "s3_key_strategy",
+    "s3_aggregation",
+    "s3_aggregation_max_bytes",
+    "s3_aggregation_max_messages",
+    "s3_aggregation_max_age",
+    "s3_metadata_headers",
+    "s3_key_layout",
+    "s3_key_shard_count",
+    "s3_partition_manifests",
+    "sns_publish_batch",
+    "sns_publish_batch_linger",
+    "sns_claim_check_bucket",
+    "sns_claim_check_threshold",
+    "sns_fifo_group_header",
+    "sns_compression",
+}
+
 
 def _parse_field_from_env_var(name: str, value: str, field: Field):
     if field.type == Optional[bool]:
@@ -47,7 +80,112 @@ class ForwarderConfig:
     endpoint_url: Optional[str] = None
     ssm_endpoint_url: Optional[str] = None
     disable_message_header_validation: Optional[bool] = False
+    forwarder_workers: str = "1"
+    forwarder_mode: str = "sync"
+    pipeline_retrieve_workers: str = "1"
+    pipeline_upload_workers: str = "1"
+    pipeline_acknowledge_workers: str = "1"
+    pipeline_queue_size: str = "10"
+    adaptive_polling: Optional[bool] = False
+    min_poll_frequency: str = "1"
+    retry_initial_delay: str = "1"
+    drain_mode: Optional[bool] = False
+    message_retry_attempts: str = "1"
+    message_retry_initial_delay: str = "0.5"
+    message_retry_max_delay: str = "10"
+    graceful_shutdown: Optional[bool] = False
+    shutdown_deadline: str = "25"
+    mesh_mailboxes: Optional[str] = None
+    forwarder_processes: str = "1"
+    supervisor_metrics_interval: str = "60"
+    message_lease_table: Optional[str] = None
+    message_lease_ttl: str = "300"
+    s3_multipart_threshold: Optional[str] = None
+    s3_multipart_chunksize: Optional[str] = None
+    s3_max_concurrency: Optional[str] = None
+    s3_small_object_threshold: str = "1048576"
+    s3_compression: Optional[str] = None
+    s3_key_strategy: str = "file_name"
+    s3_aggregation: Optional[str] = None
+    s3_aggregation_max_bytes: str = "8388608"
+    s3_aggregation_max_messages: str = "1000"
+    s3_aggregation_max_age: str = "60"
+    s3_metadata_headers: str = "from,to,workflowid,messageid"
+    s3_key_layout: str = "{year}/{month}/{day}"
+    s3_key_shard_count: str = "16"
+    s3_partition_manifests: Optional[bool] = False
+    sns_publish_batch: Optional[bool] = False
+    sns_publish_batch_linger: str = "0.5"
+    sns_claim_check_bucket: Optional[str] = None
+    sns_claim_check_threshold: str = "245760"
+    sns_fifo_group_header: str = "from"
+    sns_compression: Optional[str] = None
+    spool_message_memory_budget: str = "2097152"
+    spool_memory_budget: str = "67108864"
 
     @classmethod
     def from_environment_variables(cls, env_vars):
         return cls(**{field.name: _read_env(field, env_vars) for field in fields(cls)})
+
+    def mailbox_configs(self) -> List["ForwarderConfig"]:
+        if self.mesh_mailboxes is None:
+            return [self]
+        return [
+            replace(self, **_parse_mailbox_overrides(overrides))
+            for overrides in self._parse_mesh_mailboxes(self.mesh_mailboxes)
+        ]
+
+    def _parse_mesh_mailboxes(self, mesh_mailboxes: str) -> List[dict]:
+        try:
+            mailboxes = json.loads(mesh_mailboxes)
+        except ValueError:
+            logger.error("Invalid JSON in MESH_MAILBOXES, exiting...")
+            sys.exit(1)
+        if not _is_valid_mailbox_list(mailboxes):
+            logger.error(
+                "Expected MESH_MAILBOXES to be a non-empty list of objects setting only "
+                f"{', '.join(sorted(MAILBOX_CONFIG_FIELDS))} to strings, numbers or booleans, "
+                "exiting..."
+            )
+            sys.exit(1)
+        return mailboxes
+
+
+def _is_valid_mailbox_list(mailboxes) -> bool:
+    if not isinstance(mailboxes, list) or len(mailboxes) == 0:
+        return False
+    return all(_is_valid_mailbox(mailbox) for mailbox in mailboxes)
+
+
+def _is_valid_mailbox(mailbox) -> bool:
+    if not isinstance(mailbox, dict) or not mailbox.keys() <= MAILBOX_CONFIG_FIELDS:
+        return False
+    return all(_is_valid_override(_config_field(name), value) for name, value in mailbox.items())
+
+
+def _is_valid_override(field: Field, value) -> bool:
+    if field.type == Optional[bool]:
+        return isinstance(value, bool) or (isinstance(value, str) and _is_bool_string(value))
+    return isinstance(value, (str, int, float)) and not isinstance(value, bool)
+
+
+def _is_bool_string(value: str) -> bool:
+    try:
+        strtobool(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _parse_mailbox_overrides(overrides: dict) -> dict:
+    return {name: _parse_override(_config_field(name), value) for name, value in overrides.items()}
+
+
+def _parse_override(field: Field, value):
+    if isinstance(value, bool):
+        return value
+    return _parse_field_from_env_var(field.name.upper(), str(value), field)
+
+
+def _config_field(name: str) -> Field:
+    return next(field for field in fields(ForwarderConfig) if field.name == name)
@@ -1,24 +1,40 @@
 import logging
+from dataclasses import replace
 from os import environ
 from os.path import join
 from signal import SIGINT, SIGTERM, signal
+from typing import List, Optional
 
 import boto3
 import urllib3
 
+from awsmesh.aggregate import AggregationConfig
+from awsmesh.backoff import RetryPolicy
+from awsmesh.claim_check import ClaimCheckConfig
 from awsmesh.config import ForwarderConfig
-from awsmesh.forwarder_service import MeshConfig, build_forwarder_service
+from awsmesh.forwarder_service import (
+    ForwardingConfig,
+    MailboxConfig,
+    MeshConfig,
+    build_forwarder_service,
+)
+from awsmesh.key_layout import KeyLayoutConfig
+from awsmesh.lease import LeaseConfig
 from awsmesh.logging import JsonFormatter
 from awsmesh.message_destination_resolver import MessageDestinationConfig
+from awsmesh.pipeline import PipelineConfig
 from awsmesh.secrets import SsmSecretManager
+from awsmesh.sns import SnsBatchConfig
+from awsmesh.spool import SpoolConfig
+from awsmesh.supervisor import ForwarderSupervisor
 
 urllib3.disable_warnings(urllib3.exceptions.SubjectAltNameWarning)
 
 
-def build_mesh_config_from_ssm(ssm, config) -> MeshConfig:
-    mesh_client_cert_path = join(config.forwarder_home, "client_cert.pem")
-    mesh_client_key_path = join(config.forwarder_home, "client_key.pem")
-    mesh_ca_cert_path = join(config.forwarder_home, "ca_cert.pem")
+def build_mesh_config_from_ssm(ssm, config, file_prefix: str = "") -> MeshConfig:
+    mesh_client_cert_path = join(config.forwarder_home, f"{file_prefix}client_cert.pem")
+    mesh_client_key_path = join(config.forwarder_home, f"{file_prefix}client_key.pem")
+    mesh_ca_cert_path = join(config.forwarder_home, f"{file_prefix}ca_cert.pem")
 
     secret_manager = SsmSecretManager(ssm)
 
@@ -47,21 +63,161 @@ def build_message_destination_config(config) -> MessageDestinationConfig:
         s3_bucket_name=config.s3_bucket_name,
         endpoint_url=config.endpoint_url,
         sns_topic_arn=config.sns_topic_arn,
+        s3_multipart_threshold_bytes=_optional_int(config.s3_multipart_threshold),
+        s3_multipart_chunksize_bytes=_optional_int(config.s3_multipart_chunksize),
+        s3_max_concurrency=_optional_int(config.s3_max_concurrency),
+        s3_small_object_threshold_bytes=int(config.s3_small_object_threshold),
+        s3_compression=config.s3_compression,
+        s3_key_strategy=config.s3_key_strategy,
+        s3_aggregation=build_aggregation_config(config),
+        s3_metadata_headers=_comma_separated(config.s3_metadata_headers),
+        s3_key_layout=KeyLayoutConfig(
+            layout=config.s3_key_layout,
+            shard_count=int(config.s3_key_shard_count),
+            partition_manifests=config.s3_partition_manifests,
+        ),
+        sns_batch=build_sns_batch_config(config),
+        sns_claim_check=build_claim_check_config(config),
+        sns_fifo_group_header=config.sns_fifo_group_header.lower(),
+        sns_compression=config.sns_compression,
+    )
+
+
+def build_aggregation_config(config) -> Optional[AggregationConfig]:
+    if config.s3_aggregation is None:
+        return None
+    return AggregationConfig(
+        object_format=config.s3_aggregation,
+        max_bytes=int(config.s3_aggregation_max_bytes),
+        max_messages=int(config.s3_aggregation_max_messages),
+        max_age_sec=float(config.s3_aggregation_max_age),
+    )
+
+
+def build_sns_batch_config(config) -> Optional[SnsBatchConfig]:
+    if not config.sns_publish_batch:
+        return None
+    return SnsBatchConfig(linger_sec=float(config.sns_publish_batch_linger))
+
+
+def build_claim_check_config(config) -> Optional[ClaimCheckConfig]:
+    if config.sns_claim_check_bucket is None:
+        return None
+    return ClaimCheckConfig(
+        bucket_name=config.sns_claim_check_bucket,
+        threshold_bytes=int(config.sns_claim_check_threshold),
+    )
+
+
+def _comma_separated(value: str) -> List[str]:
+    return [item.strip().lower() for item in value.split(",") if item.strip()]
+
+
+def _optional_int(value: Optional[str]) -> Optional[int]:
+    return None if value is None else int(value)
+
+
+def build_mailbox_configs(ssm, config) -> List[MailboxConfig]:
+    mailbox_configs = config.mailbox_configs()
+    if len(mailbox_configs) == 1:
+        return [_build_mailbox_config(ssm, mailbox_configs[0])]
+    return [
+        _build_mailbox_config(ssm, mailbox_config, file_prefix=f"mailbox{index}_")
+        for index, mailbox_config in enumerate(mailbox_configs)
+    ]
+
+
+def _build_mailbox_config(ssm, config, file_prefix: str = "") -> MailboxConfig:
+    return MailboxConfig(
+        mesh_config=build_mesh_config_from_ssm(ssm, config, file_prefix),
+        message_destination_config=build_message_destination_config(config),
+    )
+
+
+def build_forwarding_config(config) -> ForwardingConfig:
+    return ForwardingConfig(
+        mode=config.forwarder_mode,
+        workers=int(config.forwarder_workers),
+        pipeline=PipelineConfig(
+            retrieve_workers=int(config.pipeline_retrieve_workers),
+            upload_workers=int(config.pipeline_upload_workers),
+            acknowledge_workers=int(config.pipeline_acknowledge_workers),
+            queue_size=int(config.pipeline_queue_size),
+        ),
+        adaptive_polling=config.adaptive_polling,
+        min_poll_frequency_sec=float(config.min_poll_frequency),
+        retry_initial_delay_sec=float(config.retry_initial_delay),
+        drain_mode=config.drain_mode,
+        message_retry=RetryPolicy(
+            max_attempts=int(config.message_retry_attempts),
+            initial_delay_sec=float(config.message_retry_initial_delay),
+            max_delay_sec=float(config.message_retry_max_delay),
+        ),
+        graceful_shutdown=config.graceful_shutdown,
+        shutdown_deadline_sec=float(config.shutdown_deadline),
+        lease=build_lease_config(config),
+        spool=SpoolConfig(
+            directory=join(config.forwarder_home, "spool"),
+            message_memory_budget_bytes=int(config.spool_message_memory_budget),
+            memory_budget_bytes=int(config.spool_memory_budget),
+        ),
+    )
+
+
+def build_lease_config(config) -> Optional[LeaseConfig]:
+    if config.message_lease_table is None:
+        return None
+    return LeaseConfig(
+        table_name=config.message_lease_table,
+        ttl_sec=float(config.message_lease_ttl),
+        endpoint_url=config.endpoint_url,
     )
 
 
 def build_forwarder_from_environment_variables(env_vars=environ):
     config = ForwarderConfig.from_environment_variables(env_vars)
     ssm = boto3.client("ssm", endpoint_url=config.ssm_endpoint_url)
-
-    return build_forwarder_service(
-        mesh_config=build_mesh_config_from_ssm(ssm, config),
-        message_destination_config=build_message_destination_config(config),
-        poll_frequency_sec=int(config.poll_frequency),
-        disable_message_header_validation=config.disable_message_header_validation,
+    mailboxes = build_mailbox_configs(ssm, config)
+    forwarding_config = build_forwarding_config(config)
+    processes = int(config.forwarder_processes)
+
+    if processes <= 1:
+        return build_forwarder_service(
+            mailboxes=mailboxes,
+            poll_frequency_sec=int(config.poll_frequency),
+            disable_message_header_validation=config.disable_message_header_validation,
+            forwarding_config=forwarding_config,
+        )
+
+    def run_worker(partition, probe_listener):
+        run_until_signalled(
+            build_forwarder_service(
+                mailboxes=mailboxes,
+                poll_frequency_sec=int(config.poll_frequency),
+                disable_message_header_validation=config.disable_message_header_validation,
+                forwarding_config=replace(forwarding_config, partition=partition),
+                probe_listener=probe_listener,
+            )
+        )
+
+    return ForwarderSupervisor(
+        run_worker,
+        processes,
+        metrics_interval_sec=float(config.supervisor_metrics_interval),
+        worker_shutdown_deadline_sec=forwarding_config.shutdown_deadline_sec,
     )
 
 
+def run_until_signalled(service):
+    def handle_sigterm(signum, frame):
+        service.stop()
+
+    signal(SIGINT, handle_sigterm)
+    signal(SIGTERM, handle_sigterm)
+
+    service.start()
+
+
 def setup_logger():
     logger = logging.getLogger()
     logger.setLevel(logging.INFO)
@@ -74,15 +230,7 @@ def setup_logger():
 def main():
     setup_logger()
 
-    forwarder_service = build_forwarder_from_environment_variables()
-
-    def handle_sigterm(signum, frame):
-        forwarder_service.stop()
-
-    signal(SIGINT, handle_sigterm)
-    signal(SIGTERM, handle_sigterm)
-
-    forwarder_service.start()
+    run_until_signalled(build_forwarder_from_environment_variables())
 
 
 if __name__ == "__main__":
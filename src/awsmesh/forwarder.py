@@ -1,16 +1,44 @@
 import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from threading import Condition
+from typing import Callable, List, Optional, Set
 
-from awsmesh.mesh import InvalidMeshHeader, MeshClientNetworkError, MeshInbox, MissingMeshHeader
+from awsmesh.backoff import ExponentialBackoff, RetryPolicy
+from awsmesh.lease import DynamoDbMessageLease, LeaseCounts, MessageLeaseError
+from awsmesh.mesh import (
+    MESH_LIST_MESSAGES_PAGE_LIMIT,
+    InvalidMeshHeader,
+    MeshClientNetworkError,
+    MeshInbox,
+    MeshMessage,
+    MissingMeshHeader,
+)
+from awsmesh.monitoring.event.forward import ForwardMessageEvent
 from awsmesh.monitoring.probe import LoggingProbe
+from awsmesh.ordering import MessageGroupSequencer, MessageTurn
+from awsmesh.partition import MessagePartition, owned_message_ids
+from awsmesh.scheduler import PollScheduler
 from awsmesh.uploader import MessageUploader, UploaderError
 
 logger = logging.getLogger(__name__)
 
+SHUTDOWN_CHECK_INTERVAL_SEC = 1
+
 
 class RetryableException(Exception):
     pass
 
 
+@dataclass
+class DeferredAcknowledgement:
+    message: MeshMessage
+    forward_message_event: ForwardMessageEvent
+    backoff: ExponentialBackoff
+    upload: Future
+
+
 class MeshToAwsForwarder:
     def __init__(
         self,
@@ -18,19 +46,44 @@ class MeshToAwsForwarder:
         uploader: MessageUploader,
         probe: LoggingProbe,
         disable_message_header_validation,
+        workers: int = 1,
+        poll_scheduler: Optional[PollScheduler] = None,
+        drain_mode: bool = False,
+        retry_policy: Optional[RetryPolicy] = None,
+        sleep: Callable[[float], None] = time.sleep,
+        partition: Optional[MessagePartition] = None,
+        lease: Optional[DynamoDbMessageLease] = None,
+        message_group: Optional[Callable[[MeshMessage], str]] = None,
     ):
         self._inbox = inbox
         self._uploader = uploader
         self._probe = probe
         self._disable_message_header_validation = disable_message_header_validation
+        self._workers = workers
+        self._poll_scheduler = poll_scheduler
+        self._drain_mode = drain_mode
+        self._last_batch_count: Optional[int] = None
+        self._retry_policy = retry_policy or RetryPolicy()
+        self._sleep = sleep
+        self._partition = partition
+        self._lease = lease
+        self._message_group = message_group
+        self._lease_counts = LeaseCounts()
+        self._shutdown_deadline: Optional[float] = None
+        self._batch_message_ids: List[str] = []
+        self._acknowledged_message_ids: Set[str] = set()
+        self._acknowledging_message_ids: Set[str] = set()
+        self._acknowledgement_condition = Condition()
+        self._deferred_acknowledgements: List[DeferredAcknowledgement] = []
 
     def forward_messages(self):
-        retryable_message_exceptions = []
-        for message_id in self._poll_message_ids():
-            try:
-                self._process_message(message_id)
-            except RetryableException as e:
-                retryable_message_exceptions.append(e)
+        message_ids = self._poll_message_ids()
+        if self._workers > 1:
+            retryable_message_exceptions = self._process_messages_concurrently(message_ids)
+        else:
+            retryable_message_exceptions = self._process_messages(message_ids)
+        retryable_message_exceptions += self._acknowledge_deferred_messages()
+        self._record_lease_counts()
 
         if len(retryable_message_exceptions) > 0:
             logger.info(
@@ -38,7 +91,111 @@ class MeshToAwsForwarder:
             )
             raise retryable_message_exceptions[0]
 
+    @property
+    def last_batch_count(self) -> Optional[int]:
+        return self._last_batch_count
+
+    def request_shutdown(self, deadline_sec: float):
+        self._shutdown_deadline = time.monotonic() + deadline_sec
+
+    def record_shutdown(self):
+        with self._acknowledgement_condition:
+            self._acknowledgement_condition.wait_for(
+                lambda: len(self._acknowledging_message_ids) == 0,
+                timeout=self._time_until_shutdown_deadline(),
+            )
+        shutdown_event = self._probe.new_shutdown_event()
+        shutdown_event.record_completed_message_ids(
+            [m_id for m_id in self._batch_message_ids if m_id in self._acknowledged_message_ids]
+        )
+        shutdown_event.record_unfinished_message_ids(
+            [m_id for m_id in self._batch_message_ids if m_id not in self._acknowledged_message_ids]
+        )
+        shutdown_event.finish()
+
+    def _is_shutting_down(self):
+        return self._shutdown_deadline is not None
+
+    def _time_until_shutdown_deadline(self) -> Optional[float]:
+        if self._shutdown_deadline is None:
+            return None
+        return max(self._shutdown_deadline - time.monotonic(), 0)
+
+    def _shutdown_deadline_passed(self):
+        return self._is_shutting_down() and time.monotonic() >= self._shutdown_deadline
+
+    def _process_messages(self, message_ids):
+        retryable_message_exceptions = []
+        for message_id in message_ids:
+            try:
+                self._process_message_unless_shutting_down(message_id)
+            except RetryableException as e:
+                retryable_message_exceptions.append(e)
+        return retryable_message_exceptions
+
+    def _process_messages_concurrently(self, message_ids):
+        executor = ThreadPoolExecutor(max_workers=self._workers)
+        futures = [
+            executor.submit(self._process_message_unless_shutting_down, message_id, turn)
+            for message_id, turn in zip(message_ids, self._message_turns(message_ids))
+        ]
+        self._wait_until_done_or_shutdown_deadline(futures)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+        retryable_message_exceptions = []
+        for future in futures:
+            try:
+                if future.done() and not future.cancelled():
+                    future.result()
+            except RetryableException as e:
+                retryable_message_exceptions.append(e)
+        return retryable_message_exceptions
+
+    def _message_turns(self, message_ids) -> List[Optional[MessageTurn]]:
+        if self._message_group is None:
+            return [None] * len(message_ids)
+        sequencer = MessageGroupSequencer(self._message_group)
+        return [MessageTurn(sequencer, position) for position in range(len(message_ids))]
+
+    def _wait_until_done_or_shutdown_deadline(self, futures):
+        pending = set(futures)
+        while len(pending) > 0 and not self._shutdown_deadline_passed():
+            _, pending = wait(pending, timeout=SHUTDOWN_CHECK_INTERVAL_SEC)
+
+    def _process_message_unless_shutting_down(self, message_id, turn: Optional[MessageTurn] = None):
+        try:
+            if not self._is_shutting_down() and self._claim_message(message_id):
+                self._process_message(message_id, turn)
+        finally:
+            if turn is not None:
+                turn.finish()
+
+    def _claim_message(self, message_id) -> bool:
+        if self._lease is None:
+            return True
+        try:
+            claimed = self._lease.claim(message_id)
+        except MessageLeaseError as e:
+            self._lease_counts.record_error(e)
+            raise RetryableException()
+        self._lease_counts.record_claim(claimed)
+        return claimed
+
+    def _record_lease_counts(self):
+        if self._lease is None:
+            return
+        message_lease_event = self._probe.new_message_lease_event()
+        message_lease_event.record_lease_counts(
+            self._lease_counts.claimed, self._lease_counts.skipped
+        )
+        if self._lease_counts.error is not None:
+            message_lease_event.record_message_lease_error(self._lease_counts.error)
+        message_lease_event.finish()
+
     def is_mailbox_empty(self):
+        if self._last_poll_left_nothing_to_forward():
+            return True
+
         count_message_event = self._probe.new_count_messages_event()
         try:
             message_count = self._inbox.count_messages()
@@ -50,28 +207,136 @@ class MeshToAwsForwarder:
         finally:
             count_message_event.finish()
 
+    def _last_poll_left_nothing_to_forward(self):
+        if self._last_batch_count is None:
+            return False
+        if self._drain_mode and self._last_batch_count < MESH_LIST_MESSAGES_PAGE_LIMIT:
+            return True
+        if self._partition is not None and len(self._batch_message_ids) == 0:
+            return True
+        return self._lease is not None and self._lease_counts.claimed == 0
+
     def _poll_message_ids(self):
         poll_inbox_event = self._probe.new_poll_inbox_event()
+        self._last_batch_count = None
         try:
             messages = self._inbox.list_message_ids()
+            self._last_batch_count = len(messages)
+            self._batch_message_ids = owned_message_ids(self._partition, messages)
+            self._acknowledged_message_ids = set()
+            self._lease_counts = LeaseCounts()
             poll_inbox_event.record_message_batch_count(len(messages))
-            return messages
+            if self._partition is not None:
+                poll_inbox_event.record_owned_message_count(len(self._batch_message_ids))
+            self._record_poll_interval(len(messages), poll_inbox_event)
+            return self._batch_message_ids
         except MeshClientNetworkError as e:
             poll_inbox_event.record_mesh_client_network_error(e)
             raise RetryableException()
         finally:
             poll_inbox_event.finish()
 
+    def _record_poll_interval(self, message_count, poll_inbox_event):
+        if self._poll_scheduler is not None:
+            self._poll_scheduler.record_poll(message_count)
+            poll_inbox_event.record_poll_interval(self._poll_scheduler.current_interval_sec)
+
+    def _retrieve_message(self, message_id, backoff: ExponentialBackoff):
+        return self._call_with_retries(lambda: self._inbox.retrieve_message(message_id), backoff)
+
+    def _acknowledge_message(self, message, forward_message_event, backoff: ExponentialBackoff):
+        with self._acknowledgement_condition:
+            if self._shutdown_deadline_passed():
+                forward_message_event.record_unacknowledged_at_shutdown()
+                return
+            self._acknowledging_message_ids.add(message.id)
+        try:
+            self._call_with_retries(message.acknowledge, backoff)
+            self._acknowledged_message_ids.add(message.id)
+        finally:
+            with self._acknowledgement_condition:
+                self._acknowledging_message_ids.discard(message.id)
+                self._acknowledgement_condition.notify_all()
+
+    def _defer_acknowledgement(self, message, forward_message_event, backoff, upload: Future):
+        self._deferred_acknowledgements.append(
+            DeferredAcknowledgement(message, forward_message_event, backoff, upload)
+        )
+
+    def _acknowledge_deferred_messages(self) -> List[RetryableException]:
+        deferred_acknowledgements = self._deferred_acknowledgements
+        self._deferred_acknowledgements = []
+        if len(deferred_acknowledgements) == 0:
+            return []
+        self._uploader.flush()
+        retryable_message_exceptions = []
+        for deferred_acknowledgement in deferred_acknowledgements:
+            try:
+                self._acknowledge_when_uploaded(deferred_acknowledgement)
+            except RetryableException as e:
+                retryable_message_exceptions.append(e)
+        return retryable_message_exceptions
+
+    def _acknowledge_when_uploaded(self, deferred: DeferredAcknowledgement):
+        try:
+            deferred.upload.result()
+            self._acknowledge_message(
+                deferred.message, deferred.forward_message_event, deferred.backoff
+            )
+        except UploaderError as e:
+            deferred.forward_message_event.record_uploader_error(e)
+        except MeshClientNetworkError as e:
+            deferred.forward_message_event.record_mesh_client_network_error(e)
+            raise RetryableException()
+        finally:
+            self._record_retries(deferred.forward_message_event, deferred.backoff)
+            deferred.forward_message_event.finish()
+
+    def _upload_in_turn(self, message, forward_message_event, turn: Optional[MessageTurn]):
+        if turn is None:
+            return self._uploader.upload(message, forward_message_event)
+        if not turn.wait(message):
+            raise UploaderError(
+                "Held back for redelivery after an earlier message of its group failed"
+            )
+        try:
+            upload = self._uploader.upload(message, forward_message_event)
+        except Exception:
+            turn.fail()
+            raise
+        turn.finish()
+        return upload
+
+    def _call_with_retries(self, operation, backoff: ExponentialBackoff):
+        attempt = 1
+        while True:
+            try:
+                return operation()
+            except MeshClientNetworkError:
+                if attempt >= self._retry_policy.max_attempts or self._is_shutting_down():
+                    raise
+                attempt += 1
+                self._sleep(backoff.next_delay())
+
+    def _record_retries(self, forward_message_event, backoff: ExponentialBackoff):
+        if backoff.attempts > 0:
+            forward_message_event.record_retry_count(backoff.attempts)
+
     # flake8: noqa: C901
-    def _process_message(self, message_id):
+    def _process_message(self, message_id, turn: Optional[MessageTurn] = None):
         forward_message_event = self._probe.new_forward_message_event()
+        backoff = self._retry_policy.new_backoff()
+        upload = None
         try:
-            message = self._inbox.retrieve_message(message_id)
+            message = self._retrieve_message(message_id, backoff)
             forward_message_event.record_message_metadata(message)
             if not self._disable_message_header_validation:
                 message.validate()
-            self._uploader.upload(message, forward_message_event)
-            message.acknowledge()
+            upload = self._upload_in_turn(message, forward_message_event, turn)
+            if isinstance(upload, Future):
+                self._defer_acknowledgement(message, forward_message_event, backoff, upload)
+            else:
+                self._acknowledge_message(message, forward_message_event, backoff)
         except MissingMeshHeader as e:
             forward_message_event.record_missing_mesh_header(e)
         except InvalidMeshHeader as e:
@@ -82,4 +347,6 @@ class MeshToAwsForwarder:
             forward_message_event.record_mesh_client_network_error(e)
             raise RetryableException()
         finally:
-            forward_message_event.finish()
+            if not isinstance(upload, Future):
+                self._record_retries(forward_message_event, backoff)
+                forward_message_event.finish()
@@ -1,17 +1,34 @@
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from threading import Event
-from typing import Optional
+from typing import Callable, List, Optional
 
 import mesh_client
 
+from awsmesh.backoff import ExponentialBackoff, RetryPolicy
 from awsmesh.forwarder import MeshToAwsForwarder, RetryableException
-from awsmesh.mesh import MeshInbox
-from awsmesh.message_destination_resolver import MessageDestinationConfig, resolve_message_uploader
+from awsmesh.lease import DynamoDbMessageLease, LeaseConfig, new_lease_owner_id
+from awsmesh.mesh import MeshInbox, MeshMessage
+from awsmesh.message_destination_resolver import (
+    MessageDestinationConfig,
+    SharedAwsClients,
+    resolve_message_uploader,
+)
+from awsmesh.monitoring.output import ProbeListener
 from awsmesh.monitoring.probe import LoggingProbe
+from awsmesh.multi_mailbox import MultiMailboxForwarder
+from awsmesh.partition import MessagePartition
+from awsmesh.pipeline import PipelineConfig, PipelinedMeshToAwsForwarder
+from awsmesh.scheduler import AdaptivePollScheduler, FixedPollScheduler, PollScheduler
+from awsmesh.sns import SNSUploader, is_fifo_topic
+from awsmesh.spool import MessageSpool, SpoolConfig
+from awsmesh.uploader import MessageUploader
 
 logger = logging.getLogger(__name__)
 
+SYNC_FORWARDER_MODE = "sync"
+PIPELINE_FORWARDER_MODE = "pipeline"
+
 
 @dataclass
 class MeshConfig:
@@ -24,42 +41,193 @@ class MeshConfig:
     ca_cert_path: str
 
 
+@dataclass
+class MailboxConfig:
+    mesh_config: MeshConfig
+    message_destination_config: MessageDestinationConfig
+
+
+@dataclass
+class ForwardingConfig:
+    mode: str = SYNC_FORWARDER_MODE
+    workers: int = 1
+    pipeline: PipelineConfig = field(default_factory=PipelineConfig)
+    adaptive_polling: bool = False
+    min_poll_frequency_sec: float = 1
+    retry_initial_delay_sec: float = 1
+    drain_mode: bool = False
+    message_retry: RetryPolicy = field(default_factory=RetryPolicy)
+    graceful_shutdown: bool = False
+    shutdown_deadline_sec: float = 25
+    partition: Optional[MessagePartition] = None
+    lease: Optional[LeaseConfig] = None
+    spool: SpoolConfig = field(default_factory=SpoolConfig)
+
+
 class MeshToAwsForwarderService:
     def __init__(
         self,
         forwarder: MeshToAwsForwarder,
         poll_frequency_sec: int,
         exit_event: Optional[Event] = None,
+        poll_scheduler: Optional[PollScheduler] = None,
+        shutdown_deadline_sec: Optional[float] = None,
     ):
         self._forwarder = forwarder
         self._exit_event = exit_event or Event()
-        self._poll_frequency_sec = poll_frequency_sec
+        self._poll_scheduler = poll_scheduler or FixedPollScheduler(poll_frequency_sec)
+        self._shutdown_deadline_sec = shutdown_deadline_sec
 
     def start(self):
         logger.info("Started forwarder service")
         while not self._exit_event.is_set():
-            try:
-                self._forwarder.forward_messages()
-
-                if self._forwarder.is_mailbox_empty():
-                    self._exit_event.wait(self._poll_frequency_sec)
-            except RetryableException:
-                self._exit_event.wait(self._poll_frequency_sec)
+            self._poll()
+        if self._shutdown_deadline_sec is not None:
+            self._forwarder.record_shutdown()
         logger.info("Exiting forwarder service")
 
+    def _poll(self):
+        try:
+            self._forwarder.forward_messages()
+            self._poll_scheduler.record_success()
+
+            if self._forwarder.is_mailbox_empty():
+                self._exit_event.wait(self._poll_scheduler.idle_interval())
+        except RetryableException:
+            self._exit_event.wait(self._poll_scheduler.retry_interval())
+
     def stop(self):
         logger.info("Received request to stop")
+        if self._shutdown_deadline_sec is not None:
+            self._forwarder.request_shutdown(self._shutdown_deadline_sec)
         self._exit_event.set()
 
 
+class UnknownForwarderMode(Exception):
+    pass
+
+
+class UnsupportedFifoTopicMode(Exception):
+    pass
+
+
+def _validate_fifo_ordering(mailboxes: List[MailboxConfig], forwarding_config: ForwardingConfig):
+    publishes_to_fifo_topic = any(
+        _is_fifo_destination(mailbox.message_destination_config) for mailbox in mailboxes
+    )
+    if publishes_to_fifo_topic and _may_publish_out_of_list_order(forwarding_config):
+        raise UnsupportedFifoTopicMode
+
+
+def _is_fifo_destination(message_destination_config: MessageDestinationConfig) -> bool:
+    topic_arn = message_destination_config.sns_topic_arn
+    if message_destination_config.message_destination != "sns" or topic_arn is None:
+        return False
+    return is_fifo_topic(topic_arn)
+
+
+def _may_publish_out_of_list_order(forwarding_config: ForwardingConfig) -> bool:
+    partition = forwarding_config.partition
+    if partition is not None and partition.count > 1:
+        return True
+    if forwarding_config.mode == PIPELINE_FORWARDER_MODE:
+        pipeline = forwarding_config.pipeline
+        return pipeline.retrieve_workers > 1 or pipeline.upload_workers > 1
+    return False
+
+
+class UnsupportedPartitionManifestMode(Exception):
+    pass
+
+
+def _validate_partition_manifests(mailboxes: List[MailboxConfig]):
+    if any(
+        _indexes_aggregated_messages(mailbox.message_destination_config) for mailbox in mailboxes
+    ):
+        raise UnsupportedPartitionManifestMode
+
+
+def _indexes_aggregated_messages(message_destination_config: MessageDestinationConfig) -> bool:
+    if message_destination_config.s3_aggregation is None:
+        return False
+    return message_destination_config.s3_key_layout.partition_manifests
+
+
+def _message_group(uploader: MessageUploader) -> Optional[Callable[[MeshMessage], str]]:
+    if isinstance(uploader, SNSUploader) and is_fifo_topic(uploader.topic_arn):
+        return uploader.message_group
+    return None
+
+
+def build_poll_scheduler(
+    poll_frequency_sec: int, forwarding_config: ForwardingConfig
+) -> PollScheduler:
+    if not forwarding_config.adaptive_polling:
+        return FixedPollScheduler(poll_frequency_sec)
+    return AdaptivePollScheduler(
+        min_interval_sec=forwarding_config.min_poll_frequency_sec,
+        max_interval_sec=poll_frequency_sec,
+        retry_backoff=ExponentialBackoff(
+            forwarding_config.retry_initial_delay_sec, poll_frequency_sec
+        ),
+    )
+
+
 def build_forwarder_service(
-    mesh_config: MeshConfig,
-    message_destination_config: MessageDestinationConfig,
+    mailboxes: List[MailboxConfig],
     poll_frequency_sec: int,
     disable_message_header_validation: bool,
+    forwarding_config: Optional[ForwardingConfig] = None,
+    probe_listener: Optional[ProbeListener] = None,
 ) -> MeshToAwsForwarderService:
-    uploader = resolve_message_uploader(message_destination_config)
+    forwarding_config = forwarding_config or ForwardingConfig()
+    aws_clients = SharedAwsClients()
+    spool = MessageSpool(forwarding_config.spool)
+    poll_scheduler = build_poll_scheduler(poll_frequency_sec, forwarding_config)
+    _validate_fifo_ordering(mailboxes, forwarding_config)
+    _validate_partition_manifests(mailboxes)
+
+    if len(mailboxes) == 1:
+        forwarder = _build_forwarder(
+            mailboxes[0],
+            aws_clients,
+            spool,
+            disable_message_header_validation,
+            forwarding_config,
+            poll_scheduler,
+            probe_listener,
+        )
+    else:
+        forwarder = MultiMailboxForwarder(
+            [
+                _build_forwarder(
+                    mailbox,
+                    aws_clients,
+                    spool,
+                    disable_message_header_validation,
+                    forwarding_config,
+                    poll_scheduler=None,
+                    probe_listener=probe_listener,
+                )
+                for mailbox in mailboxes
+            ],
+            poll_scheduler=poll_scheduler,
+        )
+    return MeshToAwsForwarderService(
+        forwarder,
+        poll_frequency_sec,
+        poll_scheduler=poll_scheduler,
+        shutdown_deadline_sec=_shutdown_deadline_sec(forwarding_config),
+    )
 
+
+def _shutdown_deadline_sec(forwarding_config: ForwardingConfig) -> Optional[float]:
+    if not forwarding_config.graceful_shutdown:
+        return None
+    return forwarding_config.shutdown_deadline_sec
+
+
+def _build_inbox(mesh_config: MeshConfig) -> MeshInbox:
     mesh = mesh_client.MeshClient(
         mesh_config.url,
         mesh_config.mailbox,
@@ -68,8 +236,72 @@ def build_forwarder_service(
         cert=(mesh_config.client_cert_path, mesh_config.client_key_path),
         verify=mesh_config.ca_cert_path,
     )
-    inbox = MeshInbox(mesh)
-    forwarder = MeshToAwsForwarder(
-        inbox, uploader, LoggingProbe(), disable_message_header_validation
+    return MeshInbox(mesh)
+
+
+def _build_probe(
+    mesh_config: MeshConfig,
+    forwarding_config: ForwardingConfig,
+    probe_listener: Optional[ProbeListener],
+) -> LoggingProbe:
+    tags = {"mailbox": mesh_config.mailbox}
+    if forwarding_config.partition is not None:
+        tags["partition"] = forwarding_config.partition.index
+    return LoggingProbe(tags=tags, listener=probe_listener)
+
+
+def _build_lease(
+    lease_config: Optional[LeaseConfig], aws_clients: SharedAwsClients
+) -> Optional[DynamoDbMessageLease]:
+    if lease_config is None:
+        return None
+    return DynamoDbMessageLease(
+        aws_clients.client("dynamodb", lease_config.endpoint_url),
+        lease_config.table_name,
+        new_lease_owner_id(),
+        lease_config.ttl_sec,
     )
-    return MeshToAwsForwarderService(forwarder, poll_frequency_sec)
+
+
+def _build_forwarder(
+    mailbox: MailboxConfig,
+    aws_clients: SharedAwsClients,
+    spool: MessageSpool,
+    disable_message_header_validation: bool,
+    forwarding_config: ForwardingConfig,
+    poll_scheduler: Optional[PollScheduler],
+    probe_listener: Optional[ProbeListener] = None,
+) -> MeshToAwsForwarder:
+    inbox = _build_inbox(mailbox.mesh_config)
+    uploader = resolve_message_uploader(mailbox.message_destination_config, aws_clients, spool)
+    probe = _build_probe(mailbox.mesh_config, forwarding_config, probe_listener)
+    lease = _build_lease(forwarding_config.lease, aws_clients)
+    if forwarding_config.mode == SYNC_FORWARDER_MODE:
+        return MeshToAwsForwarder(
+            inbox,
+            uploader,
+            probe,
+            disable_message_header_validation,
+            workers=forwarding_config.workers,
+            poll_scheduler=poll_scheduler,
+            drain_mode=forwarding_config.drain_mode,
+            retry_policy=forwarding_config.message_retry,
+            partition=forwarding_config.partition,
+            lease=lease,
+            message_group=_message_group(uploader),
+        )
+    elif forwarding_config.mode == PIPELINE_FORWARDER_MODE:
+        return PipelinedMeshToAwsForwarder(
+            inbox,
+            uploader,
+            probe,
+            disable_message_header_validation,
+            forwarding_config.pipeline,
+            poll_scheduler=poll_scheduler,
+            drain_mode=forwarding_config.drain_mode,
+            retry_policy=forwarding_config.message_retry,
+            partition=forwarding_config.partition,
+            lease=lease,
+        )
+    else:
+        raise UnknownForwarderMode
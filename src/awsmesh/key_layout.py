@@ -0,0 +1,162 @@
+import json
+import zlib
+from concurrent.futures import Future
+from dataclasses import dataclass
+from string import Formatter
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+from awsmesh.mesh import MeshMessage
+from awsmesh.uploader import UploaderError
+
+DEFAULT_KEY_LAYOUT = "{year}/{month}/{day}"
+KEY_LAYOUT_FIELDS = {"year", "month", "day", "hour", "shard", "sender"}
+DEFAULT_SHARD_COUNT = 16
+
+PARTITION_MANIFEST_PREFIX = "_manifests"
+PRECONDITION_FAILED = "PreconditionFailed"
+CONDITIONAL_REQUEST_CONFLICT = "ConditionalRequestConflict"
+OBJECT_NOT_FOUND_CODES = {"404", "NoSuchKey", "NotFound"}
+
+
+@dataclass
+class KeyLayoutConfig:
+    layout: str = DEFAULT_KEY_LAYOUT
+    shard_count: int = DEFAULT_SHARD_COUNT
+    partition_manifests: bool = False
+
+
+def _layout_fields(layout: str) -> List[str]:
+    return [field for _, field, _, _ in Formatter().parse(layout) if field is not None]
+
+
+def _sanitize_partition_value(value: str) -> str:
+    return value.replace("/", "_").replace(" ", "_")
+
+
+class KeyLayout:
+    def __init__(self, config: Optional[KeyLayoutConfig] = None):
+        self._config = config or KeyLayoutConfig()
+        self._fields = set(_layout_fields(self._config.layout))
+        if unknown_fields := self._fields - KEY_LAYOUT_FIELDS:
+            raise UnknownKeyLayoutField(", ".join(sorted(unknown_fields)))
+        self._shard_width = len(f"{max(self._config.shard_count - 1, 0):x}")
+
+    def partition_for(self, message: MeshMessage) -> str:
+        date_delivered = message.date_delivered
+        values = {
+            "year": date_delivered.strftime("%Y"),
+            "month": date_delivered.strftime("%m"),
+            "day": date_delivered.strftime("%d"),
+            "hour": date_delivered.strftime("%H"),
+        }
+        if "shard" in self._fields:
+            values["shard"] = self._shard_for(message.id)
+        if "sender" in self._fields:
+            values["sender"] = _sanitize_partition_value(message.sender)
+        return self._config.layout.format(**values)
+
+    def _shard_for(self, message_id: str) -> str:
+        shard = zlib.crc32(message_id.encode("utf-8")) % self._config.shard_count
+        return f"{shard:0{self._shard_width}x}"
+
+
+class PartitionManifests:
+    def __init__(self, s3_client, bucket_name: str):
+        self._s3_client = s3_client
+        self._bucket_name = bucket_name
+        self._pending: Dict[str, List[Tuple[str, Future]]] = {}
+        self._next_segments: Dict[str, int] = {}
+        self._lock = Lock()
+
+    def add(self, partition: str, key: str) -> Future:
+        future: Future = Future()
+        with self._lock:
+            self._pending.setdefault(partition, []).append((key, future))
+        return future
+
+    def flush(self):
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+        try:
+            for partition, entries in pending.items():
+                self._write(partition, entries)
+        finally:
+            for entries in pending.values():
+                _fail_unsettled(entries, UploaderError("Partition manifest was not written"))
+
+    def _write(self, partition: str, entries: List[Tuple[str, Future]]):
+        try:
+            self._put_segment(partition, [key for key, _ in entries])
+        except (ClientError, BotoCoreError) as e:
+            _fail_unsettled(entries, UploaderError(str(e)))
+            return
+        for _, future in entries:
+            future.set_result(None)
+
+    def _put_segment(self, partition: str, keys: List[str]):
+        manifest = {"partition": partition, "keys": list(dict.fromkeys(keys))}
+        body = json.dumps(manifest).encode("utf-8")
+        segment = self._next_segments.get(partition)
+        if segment is None:
+            segment = self._first_unclaimed_segment(partition)
+        while not self._claim_segment(partition, segment, body):
+            segment += 1
+        self._next_segments[partition] = segment + 1
+
+    def _first_unclaimed_segment(self, partition: str) -> int:
+        claimed, unclaimed = -1, 0
+        while self._segment_exists(partition, unclaimed):
+            claimed, unclaimed = unclaimed, max(unclaimed * 2, 1)
+        while unclaimed - claimed > 1:
+            middle = (claimed + unclaimed) // 2
+            if self._segment_exists(partition, middle):
+                claimed = middle
+            else:
+                unclaimed = middle
+        return unclaimed
+
+    def _segment_exists(self, partition: str, segment: int) -> bool:
+        try:
+            self._s3_client.head_object(
+                Bucket=self._bucket_name, Key=partition_manifest_key(partition, segment)
+            )
+            return True
+        except ClientError as e:
+            if e.response["Error"]["Code"] in OBJECT_NOT_FOUND_CODES:
+                return False
+            raise
+
+    def _claim_segment(self, partition: str, segment: int, body: bytes) -> bool:
+        try:
+            self._s3_client.put_object(
+                Bucket=self._bucket_name,
+                Key=partition_manifest_key(partition, segment),
+                Body=body,
+                ContentType="application/json",
+                IfNoneMatch="*",
+            )
+            return True
+        except ClientError as e:
+            if e.response["Error"]["Code"] == CONDITIONAL_REQUEST_CONFLICT:
+                return self._claim_segment(partition, segment, body)
+            if e.response["Error"]["Code"] == PRECONDITION_FAILED:
+                return False
+            raise
+
+
+def partition_manifest_key(partition: str, segment: int) -> str:
+    return f"{partition}/{PARTITION_MANIFEST_PREFIX}/{segment:08d}.json"
+
+
+def _fail_unsettled(entries: List[Tuple[str, Future]], error: UploaderError):
+    for _, future in entries:
+        if not future.done():
+            future.set_exception(error)
+
+
+class UnknownKeyLayoutField(Exception):
+    pass
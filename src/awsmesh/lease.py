@@ -0,0 +1,86 @@
+import os
+import socket
+import time
+from dataclasses import dataclass
+from threading import Lock
+from typing import Callable, Optional
+from uuid import uuid4
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+CONDITIONAL_CHECK_FAILED = "ConditionalCheckFailedException"
+CLAIM_CONDITION = "attribute_not_exists(MessageId) OR LeaseExpiresAt < :now OR LeaseOwner = :owner"
+
+
+@dataclass
+class LeaseConfig:
+    table_name: str
+    ttl_sec: float = 300
+    endpoint_url: Optional[str] = None
+
+
+class MessageLeaseError(Exception):
+    pass
+
+
+def new_lease_owner_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid4().hex[:8]}"
+
+
+class DynamoDbMessageLease:
+    def __init__(
+        self,
+        dynamodb_client,
+        table_name: str,
+        owner_id: str,
+        ttl_sec: float,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._dynamodb_client = dynamodb_client
+        self._table_name = table_name
+        self._owner_id = owner_id
+        self._ttl_sec = ttl_sec
+        self._clock = clock
+
+    def claim(self, message_id: str) -> bool:
+        now = int(self._clock())
+        try:
+            self._dynamodb_client.put_item(
+                TableName=self._table_name,
+                Item={
+                    "MessageId": {"S": message_id},
+                    "LeaseOwner": {"S": self._owner_id},
+                    "LeaseExpiresAt": {"N": str(now + int(self._ttl_sec))},
+                },
+                ConditionExpression=CLAIM_CONDITION,
+                ExpressionAttributeValues={
+                    ":now": {"N": str(now)},
+                    ":owner": {"S": self._owner_id},
+                },
+            )
+            return True
+        except ClientError as e:
+            if e.response["Error"]["Code"] == CONDITIONAL_CHECK_FAILED:
+                return False
+            raise MessageLeaseError(str(e))
+        except BotoCoreError as e:
+            raise MessageLeaseError(str(e))
+
+
+class LeaseCounts:
+    def __init__(self):
+        self.claimed = 0
+        self.skipped = 0
+        self.error: Optional[MessageLeaseError] = None
+        self._lock = Lock()
+
+    def record_error(self, error: MessageLeaseError):
+        with self._lock:
+            self.error = self.error or error
+
+    def record_claim(self, claimed: bool):
+        with self._lock:
+            if claimed:
+                self.claimed += 1
+            else:
+                self.skipped += 1
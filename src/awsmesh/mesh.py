@@ -1,6 +1,7 @@
+import io
 import logging
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
 from mesh_client import MeshClient, Message
 from requests import ConnectionError, HTTPError
@@ -8,6 +9,7 @@ from requests import ConnectionError, HTTPError
 MESH_STATUS_EVENT_TRANSFER = "TRANSFER"
 MESH_MESSAGE_TYPE_DATA = "DATA"
 MESH_STATUS_SUCCESS = "SUCCESS"
+MESH_LIST_MESSAGES_PAGE_LIMIT = 500
 
 logger = logging.getLogger(__name__)
 
@@ -29,10 +31,13 @@ def _wrap_http_errors(func):
     return wrapper_function
 
 
-class MeshMessage:
+class MeshMessage(io.RawIOBase):
     def __init__(self, client_message: Message):
+        super().__init__()
         self.id: str = client_message.id()
+        self.bytes_read = 0
         self._client_message: Message = client_message
+        self._fully_read = False
 
     def _read_header(self, header_name: str):
         try:
@@ -73,8 +78,49 @@ class MeshMessage:
     def acknowledge(self):
         self._client_message.acknowledge()
 
-    def read(self, n=None):
-        return self._client_message.read(n)
+    @property
+    def content_compressed(self) -> bool:
+        return self.headers.get("content-compressed", "N").upper() in ["Y", "TRUE"]
+
+    @property
+    def chunk_count(self) -> int:
+        chunk_range = self.headers.get("chunk-range", "1:1")
+        return int(chunk_range.split(":")[1])
+
+    @property
+    def content_length(self) -> Optional[int]:
+        return self.bytes_read if self._fully_read else None
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        view = memoryview(buffer).cast("B")
+        client_readinto = getattr(self._client_message, "readinto", None)
+        if client_readinto is None:
+            data = self._client_message.read(len(view))
+            view[: len(data)] = data
+            size = len(data)
+        else:
+            size = client_readinto(view)
+        self._record_read(len(view), size)
+        return size
+
+    def read(self, n=-1):
+        if n is None or n < 0:
+            return self.readall()
+        data = self._client_message.read(n)
+        self._record_read(n, len(data))
+        return data
+
+    def _record_read(self, requested: int, size: int):
+        self.bytes_read += size
+        self._fully_read = self._fully_read or (requested > 0 and size == 0)
+
+    def close(self):
+        if not self.closed:
+            self._client_message.close()
+        super().close()
 
 
 class MeshInbox:
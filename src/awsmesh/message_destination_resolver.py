@@ -1,10 +1,20 @@
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Sequence, Tuple
 
 import boto3
+from boto3.s3.transfer import TransferConfig
 
-from awsmesh.s3 import S3Uploader
-from awsmesh.sns import SNSUploader
+from awsmesh.aggregate import AggregationConfig, S3Aggregator
+from awsmesh.claim_check import ClaimCheckConfig, ClaimCheckStore
+from awsmesh.key_layout import KeyLayout, KeyLayoutConfig, PartitionManifests
+from awsmesh.s3 import (
+    DEFAULT_METADATA_HEADERS,
+    FILE_NAME_KEY_STRATEGY,
+    SMALL_OBJECT_THRESHOLD_BYTES,
+    S3Uploader,
+)
+from awsmesh.sns import DEFAULT_FIFO_GROUP_HEADER, SnsBatchConfig, SNSUploader
+from awsmesh.spool import MessageSpool
 from awsmesh.uploader import MessageUploader
 
 
@@ -14,18 +24,94 @@ class MessageDestinationConfig:
     s3_bucket_name: Optional[str]
     endpoint_url: Optional[str]
     sns_topic_arn: Optional[str]
+    s3_multipart_threshold_bytes: Optional[int] = None
+    s3_multipart_chunksize_bytes: Optional[int] = None
+    s3_max_concurrency: Optional[int] = None
+    s3_small_object_threshold_bytes: int = SMALL_OBJECT_THRESHOLD_BYTES
+    s3_compression: Optional[str] = None
+    s3_key_strategy: str = FILE_NAME_KEY_STRATEGY
+    s3_aggregation: Optional[AggregationConfig] = None
+    s3_metadata_headers: Sequence[str] = DEFAULT_METADATA_HEADERS
+    s3_key_layout: KeyLayoutConfig = field(default_factory=KeyLayoutConfig)
+    sns_batch: Optional[SnsBatchConfig] = None
+    sns_claim_check: Optional[ClaimCheckConfig] = None
+    sns_fifo_group_header: str = DEFAULT_FIFO_GROUP_HEADER
+    sns_compression: Optional[str] = None
 
 
 class UnknownMessageDestination(Exception):
     pass
 
 
-def resolve_message_uploader(config: MessageDestinationConfig, aws=boto3) -> MessageUploader:
+class SharedAwsClients:
+    def __init__(self, aws=boto3):
+        self._aws = aws
+        self._clients: Dict[Tuple[str, Optional[str]], Any] = {}
+
+    def client(self, service_name: str, endpoint_url: Optional[str] = None):
+        key = (service_name, endpoint_url)
+        if key not in self._clients:
+            self._clients[key] = self._aws.client(
+                service_name=service_name, endpoint_url=endpoint_url
+            )
+        return self._clients[key]
+
+
+def build_transfer_config(config: MessageDestinationConfig) -> TransferConfig:
+    settings = {
+        "multipart_threshold": config.s3_multipart_threshold_bytes,
+        "multipart_chunksize": config.s3_multipart_chunksize_bytes,
+        "max_concurrency": config.s3_max_concurrency,
+    }
+    return TransferConfig(**{name: value for name, value in settings.items() if value is not None})
+
+
+def build_aggregator(s3, config: MessageDestinationConfig) -> Optional[S3Aggregator]:
+    if config.s3_aggregation is None:
+        return None
+    return S3Aggregator(s3, config.s3_bucket_name, config.s3_aggregation)
+
+
+def build_partition_manifests(s3, config: MessageDestinationConfig) -> Optional[PartitionManifests]:
+    if not config.s3_key_layout.partition_manifests:
+        return None
+    return PartitionManifests(s3, config.s3_bucket_name)
+
+
+def build_claim_check_store(aws, config: MessageDestinationConfig) -> Optional[ClaimCheckStore]:
+    if config.sns_claim_check is None:
+        return None
+    s3 = aws.client(service_name="s3", endpoint_url=config.endpoint_url)
+    return ClaimCheckStore(s3, config.sns_claim_check, build_transfer_config(config))
+
+
+def resolve_message_uploader(
+    config: MessageDestinationConfig, aws=boto3, spool: Optional[MessageSpool] = None
+) -> MessageUploader:
     if config.message_destination == "s3":
         s3 = aws.client(service_name=config.message_destination, endpoint_url=config.endpoint_url)
-        return S3Uploader(s3, config.s3_bucket_name)
+        return S3Uploader(
+            s3,
+            config.s3_bucket_name,
+            build_transfer_config(config),
+            small_object_threshold_bytes=config.s3_small_object_threshold_bytes,
+            compression=config.s3_compression,
+            key_strategy=config.s3_key_strategy,
+            aggregator=build_aggregator(s3, config),
+            spool=spool,
+            metadata_headers=config.s3_metadata_headers,
+            key_layout=KeyLayout(config.s3_key_layout),
+            partition_manifests=build_partition_manifests(s3, config),
+        )
     elif config.message_destination == "sns":
         sns = aws.client(service_name=config.message_destination, endpoint_url=config.endpoint_url)
-        return SNSUploader(sns, config.sns_topic_arn)
+        return SNSUploader(
+            sns,
+            config.sns_topic_arn,
+            batch_config=config.sns_batch,
+            claim_check_store=build_claim_check_store(aws, config),
+            fifo_group_header=config.sns_fifo_group_header,
+            compression=config.sns_compression,
+        )
     else:
         raise UnknownMessageDestination
@@ -4,3 +4,7 @@ INVALID_MESH_HEADER_ERROR = "INVALID_MESH_HEADER"
 MISSING_MESH_HEADER_ERROR = "MISSING_MESH_HEADER"
 SNS_INVALID_PARAMETER_ERROR = "SNS_INVALID_PARAMETER_ERROR"
 SNS_EMPTY_MESSAGE_ERROR = "SNS_EMPTY_MESSAGE_ERROR"
+SNS_MESSAGE_TOO_LARGE_ERROR = "SNS_MESSAGE_TOO_LARGE_ERROR"
+SNS_INVALID_UTF8_ERROR = "SNS_INVALID_UTF8_ERROR"
+MESSAGE_LEASE_ERROR = "MESSAGE_LEASE_ERROR"
+UNACKNOWLEDGED_AT_SHUTDOWN_ERROR = "UNACKNOWLEDGED_AT_SHUTDOWN"
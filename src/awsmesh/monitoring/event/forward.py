@@ -1,9 +1,14 @@
+from typing import List
+
 from awsmesh.mesh import InvalidMeshHeader, MeshMessage, MissingMeshHeader
 from awsmesh.monitoring.error import (
     INVALID_MESH_HEADER_ERROR,
     MISSING_MESH_HEADER_ERROR,
     SNS_EMPTY_MESSAGE_ERROR,
     SNS_INVALID_PARAMETER_ERROR,
+    SNS_INVALID_UTF8_ERROR,
+    SNS_MESSAGE_TOO_LARGE_ERROR,
+    UNACKNOWLEDGED_AT_SHUTDOWN_ERROR,
 )
 from awsmesh.monitoring.event.base import BaseForwarderEvent
 
@@ -23,6 +28,48 @@ class ForwardMessageEvent(BaseForwarderEvent):
     def record_s3_key(self, key):
         self._fields["s3Key"] = key
 
+    def record_s3_upload_strategy(self, strategy: str, part_count: int):
+        self._fields["s3UploadStrategy"] = strategy
+        self._fields["s3UploadPartCount"] = part_count
+
+    def record_spool_usage(self, memory_bytes: int, disk_bytes: int):
+        self._fields["spoolMemoryBytes"] = memory_bytes
+        self._fields["spoolDiskBytes"] = disk_bytes
+
+    def record_s3_aggregate(self, aggregate_key: str, offset: int):
+        self._fields["s3AggregateKey"] = aggregate_key
+        self._fields["s3AggregateOffset"] = offset
+
+    def record_s3_object_already_exists(self):
+        self._fields["s3ObjectAlreadyExists"] = True
+
+    def record_s3_compression(self, compression: str, raw_bytes: int, compressed_bytes: int):
+        self._fields["s3Compression"] = compression
+        self._fields["rawByteCount"] = raw_bytes
+        self._fields["compressedByteCount"] = compressed_bytes
+
+    def record_s3_metadata_headers_dropped(self, header_names: List[str]):
+        self._fields["s3MetadataDroppedHeaders"] = header_names
+
+    def record_payload_checksums(self, md5: str, sha256: str):
+        self._fields["payloadMd5"] = md5
+        self._fields["payloadSha256"] = sha256
+
+    def record_s3_checksum(self, checksum: str):
+        self._fields["s3ChecksumCrc32"] = checksum
+
+    def record_s3_checksum_unavailable(self):
+        self._fields["s3ChecksumUnavailable"] = True
+        self._level = "warning"
+
+    def record_unacknowledged_at_shutdown(self):
+        self._fields["error"] = UNACKNOWLEDGED_AT_SHUTDOWN_ERROR
+        self._fields["willBeRedelivered"] = True
+        self._level = "warning"
+
+    def record_retry_count(self, retry_count: int):
+        self._fields["retryCount"] = retry_count
+
     def record_sns_message_id(self, sns_message_id):
         self._fields["snsMessageId"] = sns_message_id
 
@@ -36,6 +83,16 @@ class ForwardMessageEvent(BaseForwarderEvent):
         self._fields["errorMessage"] = error_message
         self._level = "error"
 
+    def record_sns_message_too_large_error(self, limit_bytes: int):
+        self._fields["error"] = SNS_MESSAGE_TOO_LARGE_ERROR
+        self._fields["snsMessageLimitBytes"] = limit_bytes
+        self._level = "error"
+
+    def record_sns_invalid_utf8_error(self, offset: int):
+        self._fields["error"] = SNS_INVALID_UTF8_ERROR
+        self._fields["invalidUtf8Offset"] = offset
+        self._level = "error"
+
     def record_missing_mesh_header(self, exception: MissingMeshHeader):
         self._fields["error"] = MISSING_MESH_HEADER_ERROR
         self._fields["missingHeaderName"] = exception.header_name
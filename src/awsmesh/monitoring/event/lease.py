@@ -0,0 +1,18 @@
+from awsmesh.lease import MessageLeaseError
+from awsmesh.monitoring.error import MESSAGE_LEASE_ERROR
+from awsmesh.monitoring.event.base import BaseForwarderEvent
+
+MESSAGE_LEASE_EVENT = "MESSAGE_LEASE"
+
+
+class MessageLeaseEvent(BaseForwarderEvent):
+    def __init__(self, output):
+        super().__init__(output, MESSAGE_LEASE_EVENT)
+
+    def record_lease_counts(self, claimed: int, skipped: int):
+        self._fields["claimedMessageCount"] = claimed
+        self._fields["skippedMessageCount"] = skipped
+
+    def record_message_lease_error(self, exception: MessageLeaseError):
+        self._fields["error"] = MESSAGE_LEASE_ERROR
+        self._fields["errorMessage"] = str(exception)
@@ -0,0 +1,15 @@
+from awsmesh.monitoring.event.base import BaseForwarderEvent
+
+PIPELINE_STATUS_EVENT = "PIPELINE_STATUS"
+
+
+class PipelineStatusEvent(BaseForwarderEvent):
+    def __init__(self, output):
+        super().__init__(output, PIPELINE_STATUS_EVENT)
+
+    def record_stage_status(
+        self, stage_name: str, workers: int, peak_busy_workers: int, peak_queue_depth: int
+    ):
+        self._fields[f"{stage_name}Workers"] = workers
+        self._fields[f"{stage_name}PeakBusyWorkers"] = peak_busy_workers
+        self._fields[f"{stage_name}PeakQueueDepth"] = peak_queue_depth
@@ -9,3 +9,9 @@ class PollInboxEvent(BaseForwarderEvent):
 
     def record_message_batch_count(self, count: int):
         self._fields["batchMessageCount"] = count
+
+    def record_poll_interval(self, interval_sec: float):
+        self._fields["pollIntervalSec"] = interval_sec
+
+    def record_owned_message_count(self, count: int):
+        self._fields["ownedMessageCount"] = count
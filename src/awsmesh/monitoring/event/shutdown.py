@@ -0,0 +1,20 @@
+from typing import List
+
+from awsmesh.monitoring.event.base import BaseForwarderEvent
+
+SHUTDOWN_EVENT = "FORWARDER_SHUTDOWN"
+
+
+class ShutdownEvent(BaseForwarderEvent):
+    def __init__(self, output):
+        super().__init__(output, SHUTDOWN_EVENT)
+
+    def record_completed_message_ids(self, message_ids: List[str]):
+        self._fields["completedMessageIds"] = message_ids
+        self._fields["completedMessageCount"] = len(message_ids)
+
+    def record_unfinished_message_ids(self, message_ids: List[str]):
+        self._fields["unfinishedMessageIds"] = message_ids
+        self._fields["unfinishedMessageCount"] = len(message_ids)
+        if len(message_ids) > 0:
+            self._level = "warning"
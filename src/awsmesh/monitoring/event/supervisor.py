@@ -0,0 +1,34 @@
+from typing import Dict
+
+from awsmesh.monitoring.event.base import BaseForwarderEvent
+
+SUPERVISOR_METRICS_EVENT = "SUPERVISOR_METRICS"
+WORKER_EXIT_EVENT = "FORWARDER_WORKER_EXITED"
+
+
+class SupervisorMetricsEvent(BaseForwarderEvent):
+    def __init__(self, output):
+        super().__init__(output, SUPERVISOR_METRICS_EVENT)
+
+    def record_workers(self, workers: int, restarts: int):
+        self._fields["workerCount"] = workers
+        self._fields["workerRestarts"] = restarts
+
+    def record_event_counts(self, event_counts: Dict[str, int]):
+        self._fields["eventCounts"] = event_counts
+
+    def record_error_counts(self, error_counts: Dict[str, int]):
+        self._fields["errorCounts"] = error_counts
+
+
+class WorkerExitEvent(BaseForwarderEvent):
+    def __init__(self, output):
+        super().__init__(output, WORKER_EXIT_EVENT)
+        self._level = "error"
+
+    def record_worker(self, partition_index: int, exit_code: int):
+        self._fields["partition"] = partition_index
+        self._fields["exitCode"] = exit_code
+
+    def record_restart_delay(self, delay_sec: float):
+        self._fields["restartDelaySeconds"] = delay_sec
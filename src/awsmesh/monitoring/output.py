@@ -1,10 +1,19 @@
 from logging import Logger
+from typing import Callable, Optional
+
+ProbeListener = Callable[[str, dict, str], None]
 
 
 class LoggingOutput:
-    def __init__(self, log: Logger):
+    def __init__(
+        self, log: Logger, tags: Optional[dict] = None, listener: Optional[ProbeListener] = None
+    ):
         self._logger = log
+        self._tags = tags or {}
+        self._listener = listener
 
     def log_event(self, event_name: str, fields: dict, level: str):
-        extra_fields = {**fields, "event": event_name}
+        extra_fields = {**self._tags, **fields, "event": event_name}
         getattr(self._logger, level)(f"Observed {event_name}", extra=extra_fields)
+        if self._listener is not None:
+            self._listener(event_name, extra_fields, level)
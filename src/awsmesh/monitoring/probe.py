@@ -1,16 +1,26 @@
 from logging import Logger, getLogger
+from typing import Optional
 
 from awsmesh.monitoring.event.count import CountMessagesEvent
 from awsmesh.monitoring.event.forward import ForwardMessageEvent
+from awsmesh.monitoring.event.lease import MessageLeaseEvent
+from awsmesh.monitoring.event.pipeline import PipelineStatusEvent
 from awsmesh.monitoring.event.poll import PollInboxEvent
-from awsmesh.monitoring.output import LoggingOutput
+from awsmesh.monitoring.event.shutdown import ShutdownEvent
+from awsmesh.monitoring.event.supervisor import SupervisorMetricsEvent, WorkerExitEvent
+from awsmesh.monitoring.output import LoggingOutput, ProbeListener
 
 logger = getLogger(__name__)
 
 
 class LoggingProbe:
-    def __init__(self, log: Logger = logger):
-        self._output = LoggingOutput(log)
+    def __init__(
+        self,
+        log: Logger = logger,
+        tags: Optional[dict] = None,
+        listener: Optional[ProbeListener] = None,
+    ):
+        self._output = LoggingOutput(log, tags, listener)
 
     def new_count_messages_event(self) -> CountMessagesEvent:
         return CountMessagesEvent(self._output)
@@ -20,3 +30,18 @@ class LoggingProbe:
 
     def new_poll_inbox_event(self) -> PollInboxEvent:
         return PollInboxEvent(self._output)
+
+    def new_pipeline_status_event(self) -> PipelineStatusEvent:
+        return PipelineStatusEvent(self._output)
+
+    def new_shutdown_event(self) -> ShutdownEvent:
+        return ShutdownEvent(self._output)
+
+    def new_supervisor_metrics_event(self) -> SupervisorMetricsEvent:
+        return SupervisorMetricsEvent(self._output)
+
+    def new_worker_exit_event(self) -> WorkerExitEvent:
+        return WorkerExitEvent(self._output)
+
+    def new_message_lease_event(self) -> MessageLeaseEvent:
+        return MessageLeaseEvent(self._output)
@@ -0,0 +1,57 @@
+import logging
+from typing import List, Optional
+
+from awsmesh.forwarder import MeshToAwsForwarder, RetryableException
+from awsmesh.scheduler import PollScheduler
+
+logger = logging.getLogger(__name__)
+
+
+class MultiMailboxForwarder:
+    def __init__(
+        self,
+        forwarders: List[MeshToAwsForwarder],
+        poll_scheduler: Optional[PollScheduler] = None,
+    ):
+        self._forwarders = forwarders
+        self._poll_scheduler = poll_scheduler
+        self._next_forwarder = 0
+
+    def forward_messages(self):
+        retryable_mailbox_exceptions = self._forward_messages_in_turn()
+
+        if self._poll_scheduler is not None:
+            self._poll_scheduler.record_poll(self._total_batch_count())
+
+        if len(retryable_mailbox_exceptions) > 0:
+            failed_mailboxes = len(retryable_mailbox_exceptions)
+            logger.info(
+                f"Raising single retryable exception, caught in {failed_mailboxes} mailbox(es)"
+            )
+            raise retryable_mailbox_exceptions[0]
+
+    def is_mailbox_empty(self):
+        return all(forwarder.is_mailbox_empty() for forwarder in self._forwarders)
+
+    def request_shutdown(self, deadline_sec: float):
+        for forwarder in self._forwarders:
+            forwarder.request_shutdown(deadline_sec)
+
+    def record_shutdown(self):
+        for forwarder in self._forwarders:
+            forwarder.record_shutdown()
+
+    def _forward_messages_in_turn(self) -> List[RetryableException]:
+        first = self._next_forwarder
+        self._next_forwarder = (first + 1) % len(self._forwarders)
+
+        retryable_mailbox_exceptions = []
+        for forwarder in self._forwarders[first:] + self._forwarders[:first]:
+            try:
+                forwarder.forward_messages()
+            except RetryableException as e:
+                retryable_mailbox_exceptions.append(e)
+        return retryable_mailbox_exceptions
+
+    def _total_batch_count(self) -> int:
+        return sum(forwarder.last_batch_count or 0 for forwarder in self._forwarders)
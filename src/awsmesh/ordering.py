@@ -0,0 +1,68 @@
+import heapq
+from dataclasses import dataclass
+from threading import Condition
+from typing import Callable, Dict, List, Set
+
+from awsmesh.mesh import MeshMessage
+
+
+class MessageGroupSequencer:
+    def __init__(self, message_group: Callable[[MeshMessage], str]):
+        self._message_group = message_group
+        self._condition = Condition()
+        self._resolved_positions: Set[int] = set()
+        self._finished_positions: Set[int] = set()
+        self._unresolved_from = 0
+        self._group_positions: Dict[str, List[int]] = {}
+        self._position_groups: Dict[int, str] = {}
+        self._failed_groups: Set[str] = set()
+
+    def wait_for_turn(self, position: int, message: MeshMessage) -> bool:
+        group = self._message_group(message)
+        with self._condition:
+            self._position_groups[position] = group
+            heapq.heappush(self._group_positions.setdefault(group, []), position)
+            self._resolve(position)
+            self._condition.wait_for(lambda: self._is_turn(position, group))
+            return group not in self._failed_groups
+
+    def finish(self, position: int):
+        with self._condition:
+            self._finish(position)
+
+    def fail(self, position: int):
+        with self._condition:
+            if position in self._position_groups:
+                self._failed_groups.add(self._position_groups[position])
+            self._finish(position)
+
+    def _finish(self, position: int):
+        self._finished_positions.add(position)
+        self._resolve(position)
+
+    def _resolve(self, position: int):
+        self._resolved_positions.add(position)
+        while self._unresolved_from in self._resolved_positions:
+            self._unresolved_from += 1
+        self._condition.notify_all()
+
+    def _is_turn(self, position: int, group: str) -> bool:
+        positions = self._group_positions[group]
+        while positions[0] in self._finished_positions:
+            heapq.heappop(positions)
+        return positions[0] == position and self._unresolved_from > position
+
+
+@dataclass
+class MessageTurn:
+    sequencer: MessageGroupSequencer
+    position: int
+
+    def wait(self, message: MeshMessage) -> bool:
+        return self.sequencer.wait_for_turn(self.position, message)
+
+    def finish(self):
+        self.sequencer.finish(self.position)
+
+    def fail(self):
+        self.sequencer.fail(self.position)
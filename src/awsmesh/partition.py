@@ -0,0 +1,18 @@
+import zlib
+from dataclasses import dataclass
+from typing import List, Optional
+
+
+@dataclass(frozen=True)
+class MessagePartition:
+    index: int
+    count: int
+
+    def owns(self, message_id: str) -> bool:
+        return zlib.crc32(message_id.encode("utf-8")) % self.count == self.index
+
+
+def owned_message_ids(partition: Optional[MessagePartition], message_ids: List[str]) -> List[str]:
+    if partition is None:
+        return message_ids
+    return [message_id for message_id in message_ids if partition.owns(message_id)]
@@ -0,0 +1,264 @@
+import logging
+from concurrent.futures import Future
+from contextlib import contextmanager
+from dataclasses import dataclass
+from queue import Full, Queue
+from threading import Lock, Thread
+from typing import Callable, List, Optional
+
+from awsmesh.backoff import RetryPolicy
+from awsmesh.forwarder import SHUTDOWN_CHECK_INTERVAL_SEC, MeshToAwsForwarder, RetryableException
+from awsmesh.lease import DynamoDbMessageLease
+from awsmesh.mesh import InvalidMeshHeader, MeshClientNetworkError, MeshInbox, MissingMeshHeader
+from awsmesh.monitoring.probe import LoggingProbe
+from awsmesh.partition import MessagePartition
+from awsmesh.scheduler import PollScheduler
+from awsmesh.uploader import MessageUploader, UploaderError
+
+logger = logging.getLogger(__name__)
+
+RETRIEVE_STAGE = "retrieve"
+UPLOAD_STAGE = "upload"
+ACKNOWLEDGE_STAGE = "acknowledge"
+
+_END_OF_BATCH = object()
+
+
+@dataclass
+class PipelineConfig:
+    retrieve_workers: int = 1
+    upload_workers: int = 1
+    acknowledge_workers: int = 1
+    queue_size: int = 10
+
+
+class PipelineStage:
+    def __init__(
+        self,
+        name: str,
+        workers: int,
+        queue_size: int,
+        handler: Callable,
+        deadline_passed: Callable[[], bool] = lambda: False,
+    ):
+        self.name = name
+        self.workers = workers
+        self.peak_busy_workers = 0
+        self.peak_queue_depth = 0
+        self._queue: Queue = Queue(maxsize=queue_size)
+        self._handler = handler
+        self._deadline_passed = deadline_passed
+        self._busy_workers = 0
+        self._lock = Lock()
+        self._threads: List[Thread] = []
+
+    def start(self):
+        self._threads = [Thread(target=self._run, daemon=True) for _ in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def put(self, item) -> bool:
+        if not self._put_before_deadline(item):
+            return False
+        with self._lock:
+            self.peak_queue_depth = max(self.peak_queue_depth, self._queue.qsize())
+        return True
+
+    def finish(self):
+        for _ in self._threads:
+            if not self._put_before_deadline(_END_OF_BATCH):
+                return
+        for thread in self._threads:
+            while thread.is_alive() and not self._deadline_passed():
+                thread.join(SHUTDOWN_CHECK_INTERVAL_SEC)
+
+    def _put_before_deadline(self, item) -> bool:
+        while not self._deadline_passed():
+            try:
+                self._queue.put(item, timeout=SHUTDOWN_CHECK_INTERVAL_SEC)
+                return True
+            except Full:
+                pass
+        return False
+
+    def _run(self):
+        while (item := self._queue.get()) is not _END_OF_BATCH:
+            self._update_busy_workers(1)
+            try:
+                self._handler(item)
+            finally:
+                self._update_busy_workers(-1)
+
+    def _update_busy_workers(self, delta: int):
+        with self._lock:
+            self._busy_workers += delta
+            self.peak_busy_workers = max(self.peak_busy_workers, self._busy_workers)
+
+
+class _PipelineBatch:
+    def __init__(self):
+        self.retryable_exceptions: List[RetryableException] = []
+        self.unexpected_exceptions: List[Exception] = []
+
+    def raise_errors(self):
+        if len(self.unexpected_exceptions) > 0:
+            raise self.unexpected_exceptions[0]
+        if len(self.retryable_exceptions) > 0:
+            logger.info(
+                "Raising single retryable exception, actually caught "
+                f"{len(self.retryable_exceptions)} message exception(s)"
+            )
+            raise self.retryable_exceptions[0]
+
+
+def _record_message_error(exception, forward_message_event):
+    if isinstance(exception, MissingMeshHeader):
+        forward_message_event.record_missing_mesh_header(exception)
+    elif isinstance(exception, InvalidMeshHeader):
+        forward_message_event.record_invalid_mesh_header(exception)
+    else:
+        forward_message_event.record_uploader_error(exception)
+
+
+class PipelinedMeshToAwsForwarder(MeshToAwsForwarder):
+    def __init__(
+        self,
+        inbox: MeshInbox,
+        uploader: MessageUploader,
+        probe: LoggingProbe,
+        disable_message_header_validation,
+        pipeline_config: PipelineConfig,
+        poll_scheduler: Optional[PollScheduler] = None,
+        drain_mode: bool = False,
+        retry_policy: Optional[RetryPolicy] = None,
+        partition: Optional[MessagePartition] = None,
+        lease: Optional[DynamoDbMessageLease] = None,
+    ):
+        super().__init__(
+            inbox,
+            uploader,
+            probe,
+            disable_message_header_validation,
+            poll_scheduler=poll_scheduler,
+            drain_mode=drain_mode,
+            retry_policy=retry_policy,
+            partition=partition,
+            lease=lease,
+        )
+        self._pipeline_config = pipeline_config
+
+    def forward_messages(self):
+        message_ids = self._poll_message_ids()
+        if len(message_ids) == 0:
+            return
+
+        batch = _PipelineBatch()
+        stages = self._build_stages(batch)
+        self._run_stages(stages, message_ids)
+        batch.retryable_exceptions += self._acknowledge_deferred_messages()
+
+        self._record_pipeline_status(stages)
+        self._record_lease_counts()
+        batch.raise_errors()
+
+    def _run_stages(self, stages: List[PipelineStage], message_ids):
+        for stage in stages:
+            stage.start()
+        for message_id in message_ids:
+            if self._is_shutting_down():
+                break
+            stages[0].put(message_id)
+        for stage in stages:
+            stage.finish()
+
+    def _build_stages(self, batch: _PipelineBatch) -> List[PipelineStage]:
+        config = self._pipeline_config
+        acknowledge_stage = PipelineStage(
+            ACKNOWLEDGE_STAGE,
+            config.acknowledge_workers,
+            config.queue_size,
+            lambda item: self._acknowledge(item, batch),
+            self._shutdown_deadline_passed,
+        )
+        upload_stage = PipelineStage(
+            UPLOAD_STAGE,
+            config.upload_workers,
+            config.queue_size,
+            lambda item: self._upload(item, acknowledge_stage, batch),
+            self._shutdown_deadline_passed,
+        )
+        retrieve_stage = PipelineStage(
+            RETRIEVE_STAGE,
+            config.retrieve_workers,
+            config.queue_size,
+            lambda message_id: self._retrieve(message_id, upload_stage, batch),
+            self._shutdown_deadline_passed,
+        )
+        return [retrieve_stage, upload_stage, acknowledge_stage]
+
+    def _retrieve(self, message_id, upload_stage: PipelineStage, batch: _PipelineBatch):
+        if self._is_shutting_down() or not self._claim_message_for_batch(message_id, batch):
+            return
+        forward_message_event = self._probe.new_forward_message_event()
+        backoff = self._retry_policy.new_backoff()
+        with self._forwarding_step(forward_message_event, backoff, batch):
+            message = self._retrieve_message(message_id, backoff)
+            forward_message_event.record_message_metadata(message)
+            if not self._disable_message_header_validation:
+                message.validate()
+            if not upload_stage.put((message, forward_message_event, backoff)):
+                self._record_unacknowledged_at_shutdown(forward_message_event, backoff)
+
+    def _claim_message_for_batch(self, message_id, batch: _PipelineBatch) -> bool:
+        try:
+            return self._claim_message(message_id)
+        except RetryableException as e:
+            batch.retryable_exceptions.append(e)
+            return False
+
+    def _upload(self, item, acknowledge_stage: PipelineStage, batch: _PipelineBatch):
+        message, forward_message_event, backoff = item
+        with self._forwarding_step(forward_message_event, backoff, batch):
+            upload = self._uploader.upload(message, forward_message_event)
+            if isinstance(upload, Future):
+                self._defer_acknowledgement(message, forward_message_event, backoff, upload)
+            elif not acknowledge_stage.put(item):
+                self._record_unacknowledged_at_shutdown(forward_message_event, backoff)
+
+    def _acknowledge(self, item, batch: _PipelineBatch):
+        message, forward_message_event, backoff = item
+        with self._forwarding_step(forward_message_event, backoff, batch):
+            self._acknowledge_message(message, forward_message_event, backoff)
+            self._record_retries(forward_message_event, backoff)
+            forward_message_event.finish()
+
+    def _record_unacknowledged_at_shutdown(self, forward_message_event, backoff):
+        forward_message_event.record_unacknowledged_at_shutdown()
+        self._record_retries(forward_message_event, backoff)
+        forward_message_event.finish()
+
+    @contextmanager
+    def _forwarding_step(self, forward_message_event, backoff, batch: _PipelineBatch):
+        try:
+            yield
+        except Exception as e:
+            self._record_forwarding_error(e, forward_message_event, batch)
+            self._record_retries(forward_message_event, backoff)
+            forward_message_event.finish()
+
+    def _record_forwarding_error(self, exception, forward_message_event, batch: _PipelineBatch):
+        if isinstance(exception, MeshClientNetworkError):
+            forward_message_event.record_mesh_client_network_error(exception)
+            batch.retryable_exceptions.append(RetryableException())
+        elif isinstance(exception, (MissingMeshHeader, InvalidMeshHeader, UploaderError)):
+            _record_message_error(exception, forward_message_event)
+        else:
+            batch.unexpected_exceptions.append(exception)
+
+    def _record_pipeline_status(self, stages: List[PipelineStage]):
+        pipeline_status_event = self._probe.new_pipeline_status_event()
+        for stage in stages:
+            pipeline_status_event.record_stage_status(
+                stage.name, stage.workers, stage.peak_busy_workers, stage.peak_queue_depth
+            )
+        pipeline_status_event.finish()
@@ -1,19 +1,383 @@
+import math
+from collections import OrderedDict
+from concurrent.futures import Future
+from threading import Lock
+from typing import Any, Dict, Optional, Sequence
+from urllib.parse import quote
+from uuid import uuid4
+
+from boto3.s3.transfer import TransferConfig, create_transfer_manager
 from botocore.exceptions import ClientError
+from s3transfer.utils import ChunksizeAdjuster
 
+from awsmesh.aggregate import S3Aggregator
+from awsmesh.checksum import Crc32Reader, DigestingReader
+from awsmesh.compression import COMPRESSION_KEY_SUFFIXES, CompressingReader, validate_compression
+from awsmesh.key_layout import KeyLayout, PartitionManifests
 from awsmesh.mesh import MeshMessage
+from awsmesh.spool import MessageSpool, SpooledBody
 from awsmesh.uploader import UploaderError, UploadEventMetadata
 
+PUT_OBJECT_UPLOAD = "put_object"
+SINGLE_PART_UPLOAD = "single_part"
+MULTIPART_UPLOAD = "multipart"
+AGGREGATE_UPLOAD = "aggregate"
+
+SMALL_OBJECT_THRESHOLD_BYTES = 1024 * 1024
+TRANSFER_CHECKSUM_ALGORITHM = "CRC32"
+STAGING_KEY_PREFIX = "_staging"
+
+PAYLOAD_MD5_METADATA_KEY = "payload-md5"
+PAYLOAD_SHA256_METADATA_KEY = "payload-sha256"
+PAYLOAD_METADATA_BYTES = len(PAYLOAD_MD5_METADATA_KEY) + 32 + len(PAYLOAD_SHA256_METADATA_KEY) + 64
+
+DEFAULT_METADATA_HEADERS = ("from", "to", "workflowid", "messageid")
+MESH_HEADER_METADATA_KEY_PREFIX = "mesh-"
+S3_METADATA_MAX_BYTES = 2 * 1024
+METADATA_SAFE_CHARACTERS = "".join(chr(c) for c in range(0x20, 0x7F) if chr(c) != "%")
+
+FILE_NAME_KEY_STRATEGY = "file_name"
+MESSAGE_ID_KEY_STRATEGY = "message_id"
+KEY_STRATEGIES = {FILE_NAME_KEY_STRATEGY, MESSAGE_ID_KEY_STRATEGY}
+
+WRITTEN_KEYS_CACHE_SIZE = 10000
+PRECONDITION_FAILED = "PreconditionFailed"
+OBJECT_NOT_FOUND_CODES = {"404", "NoSuchKey", "NotFound"}
+
+
+def _sanitize_metadata_value(value: str) -> str:
+    return quote(value.strip(), safe=METADATA_SAFE_CHARACTERS)
+
+
+def _read_up_to(message, size: int) -> bytes:
+    chunks = []
+    remaining = size
+    while remaining > 0:
+        chunk = message.read(remaining)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+class PrefixedReader:
+    def __init__(self, prefix, message):
+        self._prefix = prefix
+        self._message = message
+
+    def read(self, n=None):
+        if n is None or n < 0:
+            return self._prefix.read() + self._message.read()
+        data = self._prefix.read(n)
+        if len(data) < n:
+            data += _read_up_to(self._message, n - len(data))
+        return data
+
+
+class RecentKeys:
+    def __init__(self, max_size: int):
+        self._max_size = max_size
+        self._keys: OrderedDict = OrderedDict()
+        self._lock = Lock()
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            if key not in self._keys:
+                return False
+            self._keys.move_to_end(key)
+            return True
+
+    def add(self, key: str):
+        with self._lock:
+            self._keys[key] = None
+            self._keys.move_to_end(key)
+            while len(self._keys) > self._max_size:
+                self._keys.popitem(last=False)
+
 
 class S3Uploader:
-    def __init__(self, s3_client, bucket_name: str):
+    def __init__(
+        self,
+        s3_client,
+        bucket_name: str,
+        transfer_config: Optional[TransferConfig] = None,
+        small_object_threshold_bytes: int = SMALL_OBJECT_THRESHOLD_BYTES,
+        transfer_manager=None,
+        compression: Optional[str] = None,
+        key_strategy: str = FILE_NAME_KEY_STRATEGY,
+        written_keys_cache_size: int = WRITTEN_KEYS_CACHE_SIZE,
+        aggregator: Optional[S3Aggregator] = None,
+        spool: Optional[MessageSpool] = None,
+        metadata_headers: Sequence[str] = DEFAULT_METADATA_HEADERS,
+        key_layout: Optional[KeyLayout] = None,
+        partition_manifests: Optional[PartitionManifests] = None,
+    ):
+        validate_compression(compression)
+        if key_strategy not in KEY_STRATEGIES:
+            raise UnknownS3KeyStrategy(key_strategy)
         self._s3_client = s3_client
         self._bucket_name = bucket_name
+        self._transfer_config = transfer_config or TransferConfig()
+        self._part_size = ChunksizeAdjuster().adjust_chunksize(
+            self._transfer_config.multipart_chunksize
+        )
+        self._small_object_threshold_bytes = small_object_threshold_bytes
+        self._transfer_manager = transfer_manager or create_transfer_manager(
+            s3_client, self._transfer_config
+        )
+        self._compression = compression
+        self._idempotent = key_strategy == MESSAGE_ID_KEY_STRATEGY
+        self._written_keys = RecentKeys(written_keys_cache_size if self._idempotent else 0)
+        self._aggregator = aggregator
+        self._spool = spool or MessageSpool()
+        self._metadata_headers = metadata_headers
+        self._key_layout = key_layout or KeyLayout()
+        self._partition_manifests = partition_manifests
 
-    def upload(self, message: MeshMessage, upload_event_metadata: UploadEventMetadata):
+    def upload(
+        self, message: MeshMessage, upload_event_metadata: UploadEventMetadata
+    ) -> Optional[Future]:
         try:
-            s3_file_name = message.file_name.replace(" ", "_")
-            key = f"{message.date_delivered.strftime('%Y/%m/%d')}/{s3_file_name}"
-            self._s3_client.upload_fileobj(message, self._bucket_name, key)
+            compression = self._compression_for(message)
+            partition = self._key_layout.partition_for(message)
+            key = self._key_for(message, partition, compression)
             upload_event_metadata.record_s3_key(key)
+            if key in self._written_keys or self._was_uploaded(key):
+                upload_event_metadata.record_s3_object_already_exists()
+                self._written_keys.add(key)
+                return self._index(partition, key)
+            return self._upload_message(message, partition, key, compression, upload_event_metadata)
         except ClientError as e:
             raise UploaderError(str(e))
+
+    def flush(self):
+        if self._aggregator is not None:
+            self._aggregator.flush()
+        if self._partition_manifests is not None:
+            self._partition_manifests.flush()
+
+    def _index(self, partition: str, key: str) -> Optional[Future]:
+        if self._partition_manifests is None:
+            return None
+        return self._partition_manifests.add(partition, key)
+
+    def _upload_message(
+        self,
+        message: MeshMessage,
+        partition: str,
+        key: str,
+        compression: Optional[str],
+        upload_event_metadata: UploadEventMetadata,
+    ) -> Optional[Future]:
+        payload = DigestingReader(message)
+        stored = payload if compression is None else CompressingReader(payload, compression)
+        body = Crc32Reader(stored, self._part_size)
+        head = self._spool.spool(body, self._small_object_threshold_bytes + 1)
+        upload_event_metadata.record_spool_usage(self._spool.memory_bytes, self._spool.disk_bytes)
+        if self._aggregator is not None and len(head) <= self._small_object_threshold_bytes:
+            upload_event_metadata.record_s3_upload_strategy(AGGREGATE_UPLOAD, 1)
+            self._record_payload(compression, message, payload, body, upload_event_metadata)
+            return self._aggregator.add(
+                message, key, compression, head, payload.checksums, upload_event_metadata
+            )
+        extra_args: Dict[str, Any] = {
+            "Metadata": self._header_metadata(message, upload_event_metadata)
+        }
+        if compression is not None:
+            extra_args["ContentEncoding"] = compression
+        try:
+            uploaded = self._upload_body(
+                head, body, key, payload, extra_args, upload_event_metadata
+            )
+        finally:
+            head.close()
+        if uploaded:
+            self._record_payload(compression, message, payload, body, upload_event_metadata)
+        else:
+            upload_event_metadata.record_s3_object_already_exists()
+        self._written_keys.add(key)
+        return self._index(partition, key)
+
+    def _record_payload(
+        self,
+        compression: Optional[str],
+        message: MeshMessage,
+        payload: DigestingReader,
+        body: Crc32Reader,
+        upload_event_metadata: UploadEventMetadata,
+    ):
+        checksums = payload.checksums
+        upload_event_metadata.record_payload_checksums(checksums.md5, checksums.sha256)
+        if compression is not None:
+            upload_event_metadata.record_s3_compression(
+                compression, message.bytes_read, body.bytes_read
+            )
+
+    def _compression_for(self, message: MeshMessage) -> Optional[str]:
+        return None if message.content_compressed else self._compression
+
+    def _header_metadata(
+        self, message: MeshMessage, upload_event_metadata: UploadEventMetadata
+    ) -> dict:
+        headers = message.headers
+        metadata = {}
+        metadata_bytes = PAYLOAD_METADATA_BYTES
+        dropped_headers = []
+        for header_name in self._metadata_headers:
+            if header_name not in headers:
+                continue
+            key = MESH_HEADER_METADATA_KEY_PREFIX + header_name
+            value = _sanitize_metadata_value(str(headers[header_name]))
+            if metadata_bytes + len(key) + len(value) > S3_METADATA_MAX_BYTES:
+                dropped_headers.append(header_name)
+                continue
+            metadata[key] = value
+            metadata_bytes += len(key) + len(value)
+        if dropped_headers:
+            upload_event_metadata.record_s3_metadata_headers_dropped(dropped_headers)
+        return metadata
+
+    def _key_for(self, message: MeshMessage, partition: str, compression: Optional[str]) -> str:
+        key_prefix = partition
+        if self._idempotent:
+            key_prefix = f"{key_prefix}/{message.id}"
+        key = f"{key_prefix}/{message.file_name.replace(' ', '_')}"
+        return key if compression is None else key + COMPRESSION_KEY_SUFFIXES[compression]
+
+    def _upload_body(
+        self,
+        head: SpooledBody,
+        body: Crc32Reader,
+        key: str,
+        payload: DigestingReader,
+        extra_args: dict,
+        upload_event_metadata: UploadEventMetadata,
+    ) -> bool:
+        if len(head) <= self._small_object_threshold_bytes:
+            checksums = payload.checksums
+            extra_args["Metadata"] = {
+                **extra_args["Metadata"],
+                PAYLOAD_MD5_METADATA_KEY: checksums.md5,
+                PAYLOAD_SHA256_METADATA_KEY: checksums.sha256,
+            }
+            return self._put_object(head.payload(), body, key, extra_args, upload_event_metadata)
+        if not self._idempotent:
+            self._transfer_verified(head, body, key, extra_args, upload_event_metadata)
+            return True
+        staging_key = f"{STAGING_KEY_PREFIX}/{uuid4()}"
+        try:
+            self._transfer_verified(head, body, staging_key, extra_args, upload_event_metadata)
+            self._copy(staging_key, key)
+        finally:
+            self._delete(staging_key)
+        return True
+
+    def _transfer_verified(
+        self,
+        head: SpooledBody,
+        body: Crc32Reader,
+        key: str,
+        extra_args: dict,
+        upload_event_metadata: UploadEventMetadata,
+    ):
+        self._transfer(PrefixedReader(head, body), key, extra_args)
+        self._verify_checksum(key, body, self._stored_checksum(key), upload_event_metadata)
+        self._record_upload_strategy(body.bytes_read, upload_event_metadata)
+
+    def _put_object(
+        self,
+        payload,
+        body: Crc32Reader,
+        key: str,
+        extra_args: dict,
+        upload_event_metadata: UploadEventMetadata,
+    ) -> bool:
+        if self._idempotent:
+            extra_args = {**extra_args, "IfNoneMatch": "*"}
+        try:
+            response = self._s3_client.put_object(
+                Bucket=self._bucket_name,
+                Key=key,
+                Body=payload,
+                ChecksumCRC32=body.full_object_checksum,
+                **extra_args,
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] == PRECONDITION_FAILED:
+                self._verify_checksum(key, body, self._stored_checksum(key), upload_event_metadata)
+                return False
+            raise
+        self._verify_checksum(key, body, response.get("ChecksumCRC32"), upload_event_metadata)
+        upload_event_metadata.record_s3_upload_strategy(PUT_OBJECT_UPLOAD, 1)
+        return True
+
+    def _was_uploaded(self, key: str) -> bool:
+        return self._idempotent and self._object_exists(key)
+
+    def _object_exists(self, key: str) -> bool:
+        try:
+            self._s3_client.head_object(Bucket=self._bucket_name, Key=key)
+            return True
+        except ClientError as e:
+            if e.response["Error"]["Code"] in OBJECT_NOT_FOUND_CODES:
+                return False
+            raise
+
+    def _stored_checksum(self, key: str) -> Optional[str]:
+        response = self._s3_client.head_object(
+            Bucket=self._bucket_name, Key=key, ChecksumMode="ENABLED"
+        )
+        return response.get("ChecksumCRC32")
+
+    def _verify_checksum(
+        self,
+        key: str,
+        body: Crc32Reader,
+        stored_checksum: Optional[str],
+        upload_event_metadata: UploadEventMetadata,
+    ):
+        if stored_checksum is None:
+            upload_event_metadata.record_s3_checksum_unavailable()
+            return
+        if "-" in stored_checksum:
+            expected_checksum = body.composite_checksum
+        else:
+            expected_checksum = body.full_object_checksum
+        if stored_checksum != expected_checksum:
+            self._delete(key)
+            raise UploaderError(
+                f"S3 checksum mismatch for {key}: "
+                f"expected {expected_checksum}, got {stored_checksum}"
+            )
+        upload_event_metadata.record_s3_checksum(stored_checksum)
+
+    def _transfer(self, fileobj, key: str, extra_args: dict):
+        self._transfer_manager.upload(
+            fileobj,
+            self._bucket_name,
+            key,
+            extra_args={**extra_args, "ChecksumAlgorithm": TRANSFER_CHECKSUM_ALGORITHM},
+        ).result()
+
+    def _copy(self, source_key: str, key: str):
+        self._transfer_manager.copy(
+            {"Bucket": self._bucket_name, "Key": source_key},
+            self._bucket_name,
+            key,
+            extra_args={"ChecksumAlgorithm": TRANSFER_CHECKSUM_ALGORITHM},
+        ).result()
+
+    def _delete(self, key: str):
+        self._s3_client.delete_object(Bucket=self._bucket_name, Key=key)
+
+    def _record_upload_strategy(self, size: int, upload_event_metadata: UploadEventMetadata):
+        if size < self._transfer_config.multipart_threshold:
+            upload_event_metadata.record_s3_upload_strategy(SINGLE_PART_UPLOAD, 1)
+        else:
+            part_count = math.ceil(size / self._part_size)
+            upload_event_metadata.record_s3_upload_strategy(MULTIPART_UPLOAD, part_count)
+
+
+class UnknownS3KeyStrategy(Exception):
+    pass
@@ -0,0 +1,78 @@
+from typing import Protocol
+
+from awsmesh.backoff import ExponentialBackoff
+
+
+class PollScheduler(Protocol):
+    @property
+    def current_interval_sec(self) -> float:
+        ...
+
+    def record_poll(self, message_count: int):
+        ...
+
+    def record_success(self):
+        ...
+
+    def idle_interval(self) -> float:
+        ...
+
+    def retry_interval(self) -> float:
+        ...
+
+
+class FixedPollScheduler:
+    def __init__(self, poll_frequency_sec: float):
+        self._poll_frequency_sec = poll_frequency_sec
+
+    @property
+    def current_interval_sec(self) -> float:
+        return self._poll_frequency_sec
+
+    def record_poll(self, message_count: int):
+        pass
+
+    def record_success(self):
+        pass
+
+    def idle_interval(self) -> float:
+        return self._poll_frequency_sec
+
+    def retry_interval(self) -> float:
+        return self._poll_frequency_sec
+
+
+class AdaptivePollScheduler:
+    def __init__(
+        self,
+        min_interval_sec: float,
+        max_interval_sec: float,
+        retry_backoff: ExponentialBackoff,
+        growth_factor: float = 2.0,
+    ):
+        self._min_interval_sec = min_interval_sec
+        self._max_interval_sec = max_interval_sec
+        self._retry_backoff = retry_backoff
+        self._growth_factor = growth_factor
+        self._interval_sec = min_interval_sec
+
+    @property
+    def current_interval_sec(self) -> float:
+        return self._interval_sec
+
+    def record_poll(self, message_count: int):
+        if message_count > 0:
+            self._interval_sec = self._min_interval_sec
+        else:
+            self._interval_sec = min(
+                self._max_interval_sec, self._interval_sec * self._growth_factor
+            )
+
+    def record_success(self):
+        self._retry_backoff.reset()
+
+    def idle_interval(self) -> float:
+        return self._interval_sec
+
+    def retry_interval(self) -> float:
+        return self._retry_backoff.next_delay()
@@ -1,41 +1,415 @@
+import base64
+import codecs
+import gzip
+import json
 import logging
+import re
+import time
+from concurrent.futures import Future
+from contextlib import nullcontext
+from dataclasses import dataclass
+from threading import Lock
+from typing import Callable, List, Optional, Tuple
 
 from botocore.exceptions import ClientError
 
+from awsmesh.checksum import DigestingReader, PayloadChecksums
+from awsmesh.claim_check import ClaimCheckStore
+from awsmesh.compression import GZIP_COMPRESSION, UnsupportedCompression
 from awsmesh.mesh import MeshMessage
 from awsmesh.uploader import UploaderError, UploadEventMetadata
 
 logger = logging.getLogger(__name__)
 
+SNS_MAX_MESSAGE_BYTES = 256 * 1024
+SNS_PUBLISH_BATCH_MAX_ENTRIES = 10
+SNS_PUBLISH_BATCH_MAX_BYTES = 256 * 1024
+SNS_INVALID_PARAMETER_CODE = "InvalidParameter"
+
+PAYLOAD_STORAGE = "payloadStorage"
+INLINE_PAYLOAD_STORAGE = "inline"
+S3_PAYLOAD_STORAGE = "s3"
+
+PAYLOAD_ENCODING = "payloadEncoding"
+RAW_PAYLOAD_ENCODING = "raw"
+GZIP_BASE64_PAYLOAD_ENCODING = "gzip+base64"
+COMPRESSED_READ_FACTOR = 4
+HEAD_READ_CHUNK_BYTES = 64 * 1024
+
+LARGEST_INLINE_PAYLOAD_ATTRIBUTES = {
+    PAYLOAD_STORAGE: INLINE_PAYLOAD_STORAGE,
+    PAYLOAD_ENCODING: GZIP_BASE64_PAYLOAD_ENCODING,
+}
+CHECKSUM_PLACEHOLDERS = PayloadChecksums(md5="0" * 32, sha256="0" * 64)
+
+FIFO_TOPIC_SUFFIX = ".fifo"
+DEFAULT_FIFO_GROUP_HEADER = "from"
+FIFO_ID_MAX_LENGTH = 128
+FIFO_ID_INVALID_CHARACTERS = re.compile(r"[^\x21-\x7e]")
+
+
+@dataclass
+class SnsBatchConfig:
+    max_entries: int = SNS_PUBLISH_BATCH_MAX_ENTRIES
+    linger_sec: float = 0.5
+
+
+@dataclass
+class _PendingPublish:
+    message: str
+    message_attributes: dict
+    fifo_args: dict
+    size: int
+    upload_event_metadata: UploadEventMetadata
+    future: Future
+
+
+class _Utf8Validator:
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._bytes_validated = 0
+        self.invalid_offset: Optional[int] = None
+
+    def update(self, data: memoryview, final: bool = False):
+        if self.invalid_offset is not None:
+            return
+        pending_bytes = len(self._decoder.getstate()[0])
+        try:
+            self._decoder.decode(data, final)
+        except UnicodeDecodeError as error:
+            self.invalid_offset = self._bytes_validated - pending_bytes + error.start
+        self._bytes_validated += len(data)
+
+
+def _read_head(
+    reader: DigestingReader, max_bytes: int, stop_on_invalid_utf8: bool
+) -> Tuple[memoryview, Optional[int]]:
+    buffer = bytearray()
+    validator = _Utf8Validator()
+    while len(buffer) <= max_bytes:
+        read = _read_chunk_into(reader, buffer, max_bytes + 1 - len(buffer), validator)
+        if read == 0:
+            break
+        if stop_on_invalid_utf8 and validator.invalid_offset is not None:
+            return memoryview(buffer), validator.invalid_offset
+    if len(buffer) <= max_bytes:
+        validator.update(memoryview(b""), final=True)
+    return memoryview(buffer), validator.invalid_offset
+
+
+def _read_chunk_into(
+    reader: DigestingReader, buffer: bytearray, max_bytes: int, validator: _Utf8Validator
+) -> int:
+    start = len(buffer)
+    buffer.extend(bytes(min(HEAD_READ_CHUNK_BYTES, max_bytes)))
+    with memoryview(buffer) as view:
+        read = reader.readinto(view[start:])
+        validator.update(view[start : start + read])
+    del buffer[start + read :]
+    return read
+
+
+def _gzip_base64(data: memoryview) -> str:
+    return base64.b64encode(gzip.compress(data, compresslevel=6, mtime=0)).decode("ascii")
+
+
+def is_fifo_topic(topic_arn: str) -> bool:
+    return topic_arn.endswith(FIFO_TOPIC_SUFFIX)
+
+
+def _fifo_id(value: str) -> str:
+    return FIFO_ID_INVALID_CHARACTERS.sub("_", value)[:FIFO_ID_MAX_LENGTH]
+
+
+def _sns_attributes(message_id: str, checksums: PayloadChecksums, payload_attributes: dict) -> dict:
+    return {
+        "meshMessageId": {"DataType": "String", "StringValue": message_id},
+        "payloadMd5": {"DataType": "String", "StringValue": checksums.md5},
+        "payloadSha256": {"DataType": "String", "StringValue": checksums.sha256},
+        **{
+            name: {"DataType": "String", "StringValue": value}
+            for name, value in payload_attributes.items()
+        },
+    }
+
+
+def _attributes_size(message_attributes: dict) -> int:
+    return sum(
+        len(name.encode("utf-8"))
+        + len(attribute["DataType"].encode("utf-8"))
+        + len(attribute["StringValue"].encode("utf-8"))
+        for name, attribute in message_attributes.items()
+    )
+
+
+def _publish_size(message_content: str, message_attributes: dict) -> int:
+    return len(message_content.encode("utf-8")) + _attributes_size(message_attributes)
+
+
+def _record_publish_error(
+    code: str, error_message: str, upload_event_metadata: UploadEventMetadata
+):
+    if code == SNS_INVALID_PARAMETER_CODE:
+        upload_event_metadata.record_invalid_parameter_error(error_message)
+
 
 # flake8: noqa: C901
 class SNSUploader:
-    def __init__(self, sns_client, topic_arn: str):
+    def __init__(
+        self,
+        sns_client,
+        topic_arn: str,
+        batch_config: Optional[SnsBatchConfig] = None,
+        clock: Callable[[], float] = time.monotonic,
+        claim_check_store: Optional[ClaimCheckStore] = None,
+        fifo_group_header: str = DEFAULT_FIFO_GROUP_HEADER,
+        compression: Optional[str] = None,
+    ):
+        if compression not in (None, GZIP_COMPRESSION):
+            raise UnsupportedCompression(f"Unsupported SNS compression: {compression}")
         self._sns_client = sns_client
         self.topic_arn = topic_arn
+        self._fifo = is_fifo_topic(topic_arn)
+        self._fifo_group_header = fifo_group_header
+        self._claim_check_store = claim_check_store
+        self._inline_max_bytes = (
+            SNS_MAX_MESSAGE_BYTES
+            if claim_check_store is None
+            else min(claim_check_store.threshold_bytes, SNS_MAX_MESSAGE_BYTES)
+        )
+        self._compression = compression
+        self._read_max_bytes = self._inline_max_bytes * (
+            1 if compression is None else COMPRESSED_READ_FACTOR
+        )
+        self._requires_utf8 = compression is None and claim_check_store is None
+        self._batch_config = batch_config
+        self._clock = clock
+        self._pending: List[_PendingPublish] = []
+        self._pending_bytes = 0
+        self._oldest_pending_time: Optional[float] = None
+        self._lock = Lock()
+        self._fifo_publish_lock = Lock()
 
-    def upload(self, message: MeshMessage, upload_event_metadata: UploadEventMetadata):
+    def upload(
+        self, message: MeshMessage, upload_event_metadata: UploadEventMetadata
+    ) -> Optional[Future]:
         try:
-            message_content = message.read().decode("utf-8")
-            if message_content == "":
+            payload = DigestingReader(message)
+            head, invalid_utf8_offset = _read_head(
+                payload, self._read_max_bytes, self._requires_utf8
+            )
+            if len(head) == 0:
                 upload_event_metadata.record_sns_empty_message_error(message)
-                return
-
-            mesh_message_id_key = "meshMessageId"
-            sns_attributes = {
-                mesh_message_id_key: {
-                    "DataType": "String",
-                    "StringValue": message.id,
-                }
-            }
+                return None
+            message_content, payload_attributes = self._message_content(
+                message,
+                head,
+                invalid_utf8_offset,
+                payload,
+                upload_event_metadata,
+                self._inline_budget(message),
+            )
 
+            checksums = payload.checksums
+            upload_event_metadata.record_payload_checksums(checksums.md5, checksums.sha256)
+            sns_attributes = _sns_attributes(message.id, checksums, payload_attributes)
+
+            fifo_args = self._fifo_args(message)
+            if self._batch_config is not None:
+                return self._add_to_batch(
+                    message_content,
+                    sns_attributes,
+                    fifo_args,
+                    upload_event_metadata,
+                    self._batch_config,
+                )
             response = self._sns_client.publish(
-                TopicArn=self.topic_arn, Message=message_content, MessageAttributes=sns_attributes
+                TopicArn=self.topic_arn,
+                Message=message_content,
+                MessageAttributes=sns_attributes,
+                **fifo_args,
             )
             upload_event_metadata.record_sns_message_id(response["MessageId"])
+            return None
         except ClientError as error:
-            if error.response["Error"]["Code"] == "InvalidParameter":
-                upload_event_metadata.record_invalid_parameter_error(
-                    error.response["Error"]["Message"]
-                )
+            _record_publish_error(
+                error.response["Error"]["Code"],
+                error.response["Error"]["Message"],
+                upload_event_metadata,
+            )
+            raise UploaderError(str(error))
+        except MessageTooLarge as error:
+            upload_event_metadata.record_sns_message_too_large_error(error.limit_bytes)
             raise UploaderError(str(error))
+        except InvalidUtf8Message as error:
+            upload_event_metadata.record_sns_invalid_utf8_error(error.offset)
+            raise UploaderError(str(error))
+
+    def flush(self):
+        with self._publish_in_order():
+            with self._lock:
+                batch = self._take_pending()
+            self._publish_batch(batch)
+
+    def message_group(self, message: MeshMessage) -> str:
+        group = message.headers.get(self._fifo_group_header) or message.id
+        return _fifo_id(str(group))
+
+    def _fifo_args(self, message: MeshMessage) -> dict:
+        if not self._fifo:
+            return {}
+        return {
+            "MessageGroupId": self.message_group(message),
+            "MessageDeduplicationId": _fifo_id(message.id),
+        }
+
+    def _publish_in_order(self):
+        return self._fifo_publish_lock if self._fifo else nullcontext()
+
+    def _inline_budget(self, message: MeshMessage) -> int:
+        attributes = _sns_attributes(
+            message.id, CHECKSUM_PLACEHOLDERS, LARGEST_INLINE_PAYLOAD_ATTRIBUTES
+        )
+        return min(self._inline_max_bytes, SNS_MAX_MESSAGE_BYTES - _attributes_size(attributes))
+
+    def _message_content(
+        self,
+        message: MeshMessage,
+        head: memoryview,
+        invalid_utf8_offset: Optional[int],
+        payload: DigestingReader,
+        upload_event_metadata: UploadEventMetadata,
+        inline_budget: int,
+    ) -> Tuple[str, dict]:
+        if len(head) <= self._read_max_bytes:
+            inline_content = self._inline_content(head, invalid_utf8_offset is None, inline_budget)
+            if inline_content is not None:
+                return inline_content
+        if self._claim_check_store is None:
+            raise self._unpublishable(head, invalid_utf8_offset, inline_budget)
+        claim_check = self._claim_check_store.store(message, head, payload)
+        upload_event_metadata.record_s3_key(claim_check["key"])
+        return json.dumps({"claimCheck": claim_check}), {PAYLOAD_STORAGE: S3_PAYLOAD_STORAGE}
+
+    def _unpublishable(
+        self, head: memoryview, invalid_utf8_offset: Optional[int], inline_budget: int
+    ) -> Exception:
+        if invalid_utf8_offset is not None and len(head) <= inline_budget:
+            return InvalidUtf8Message(invalid_utf8_offset)
+        return MessageTooLarge(SNS_MAX_MESSAGE_BYTES)
+
+    def _inline_content(
+        self, head: memoryview, is_utf8: bool, inline_budget: int
+    ) -> Optional[Tuple[str, dict]]:
+        raw_fits = is_utf8 and len(head) <= inline_budget
+        if self._compression is None:
+            return (
+                (str(head, "utf-8"), {PAYLOAD_STORAGE: INLINE_PAYLOAD_STORAGE})
+                if raw_fits
+                else None
+            )
+        encoded = _gzip_base64(head)
+        if raw_fits and len(head) <= len(encoded):
+            return str(head, "utf-8"), {
+                PAYLOAD_STORAGE: INLINE_PAYLOAD_STORAGE,
+                PAYLOAD_ENCODING: RAW_PAYLOAD_ENCODING,
+            }
+        if len(encoded) <= inline_budget:
+            return encoded, {
+                PAYLOAD_STORAGE: INLINE_PAYLOAD_STORAGE,
+                PAYLOAD_ENCODING: GZIP_BASE64_PAYLOAD_ENCODING,
+            }
+        return None
+
+    def _add_to_batch(
+        self,
+        message_content: str,
+        message_attributes: dict,
+        fifo_args: dict,
+        upload_event_metadata: UploadEventMetadata,
+        batch_config: SnsBatchConfig,
+    ) -> Future:
+        size = _publish_size(message_content, message_attributes)
+        pending = _PendingPublish(
+            message_content, message_attributes, fifo_args, size, upload_event_metadata, Future()
+        )
+        batches = []
+        with self._publish_in_order():
+            with self._lock:
+                if self._pending_bytes + size > SNS_PUBLISH_BATCH_MAX_BYTES:
+                    batches.append(self._take_pending())
+                self._pending.append(pending)
+                self._pending_bytes += size
+                if self._oldest_pending_time is None:
+                    self._oldest_pending_time = self._clock()
+                if self._batch_ready(batch_config, self._oldest_pending_time):
+                    batches.append(self._take_pending())
+            for batch in batches:
+                self._publish_batch(batch)
+        return pending.future
+
+    def _batch_ready(self, batch_config: SnsBatchConfig, oldest_pending_time: float) -> bool:
+        if len(self._pending) >= batch_config.max_entries:
+            return True
+        return self._clock() - oldest_pending_time >= batch_config.linger_sec
+
+    def _take_pending(self) -> List[_PendingPublish]:
+        batch = self._pending
+        self._pending = []
+        self._pending_bytes = 0
+        self._oldest_pending_time = None
+        return batch
+
+    def _publish_batch(self, batch: List[_PendingPublish]):
+        if len(batch) == 0:
+            return
+        entries = [
+            {
+                "Id": str(index),
+                "Message": pending.message,
+                "MessageAttributes": pending.message_attributes,
+                **pending.fifo_args,
+            }
+            for index, pending in enumerate(batch)
+        ]
+        try:
+            response = self._sns_client.publish_batch(
+                TopicArn=self.topic_arn, PublishBatchRequestEntries=entries
+            )
+            self._record_batch_results(batch, response)
+        except ClientError as error:
+            self._fail_unsettled(
+                batch, error.response["Error"]["Code"], error.response["Error"]["Message"]
+            )
+        except Exception as error:
+            self._fail_unsettled(batch, type(error).__name__, str(error))
+
+    def _record_batch_results(self, batch: List[_PendingPublish], response: dict):
+        for successful in response.get("Successful", []):
+            pending = batch[int(successful["Id"])]
+            pending.upload_event_metadata.record_sns_message_id(successful["MessageId"])
+            pending.future.set_result(None)
+        for failed in response.get("Failed", []):
+            self._fail(batch[int(failed["Id"])], failed["Code"], failed.get("Message", ""))
+        self._fail_unsettled(batch, "MissingResult", "SNS PublishBatch returned no result")
+
+    def _fail_unsettled(self, batch: List[_PendingPublish], code: str, error_message: str):
+        for pending in batch:
+            if not pending.future.done():
+                self._fail(pending, code, error_message)
+
+    def _fail(self, pending: _PendingPublish, code: str, error_message: str):
+        _record_publish_error(code, error_message, pending.upload_event_metadata)
+        pending.future.set_exception(UploaderError(f"{code}: {error_message}"))
+
+
+class MessageTooLarge(Exception):
+    def __init__(self, limit_bytes: int):
+        super().__init__(f"Message exceeds the SNS limit of {limit_bytes} bytes")
+        self.limit_bytes = limit_bytes
+
+
+class InvalidUtf8Message(Exception):
+    def __init__(self, offset: int):
+        super().__init__(f"Message is not valid UTF-8 at byte offset {offset}")
+        self.offset = offset
@@ -0,0 +1,140 @@
+import io
+import mmap
+import os
+import tempfile
+from dataclasses import dataclass
+from threading import Lock
+from typing import IO, Optional
+
+SPOOL_READ_SIZE = 64 * 1024
+
+
+@dataclass
+class SpoolConfig:
+    directory: Optional[str] = None
+    message_memory_budget_bytes: int = 2 * 1024 * 1024
+    memory_budget_bytes: int = 64 * 1024 * 1024
+
+
+class MessageSpool:
+    def __init__(self, config: Optional[SpoolConfig] = None):
+        self._config = config or SpoolConfig()
+        if self._config.directory is not None:
+            os.makedirs(self._config.directory, exist_ok=True)
+        self.memory_bytes = 0
+        self.disk_bytes = 0
+        self._lock = Lock()
+
+    def spool(self, reader, max_bytes: int) -> "SpooledBody":
+        body = SpooledBody(self)
+        remaining = max_bytes
+        while remaining > 0 and (chunk := reader.read(min(SPOOL_READ_SIZE, remaining))):
+            body.append(chunk)
+            remaining -= len(chunk)
+        body.finish()
+        return body
+
+    def _new_file(self):
+        return tempfile.TemporaryFile(dir=self._config.directory)
+
+    def _reserve_memory(self, buffered_bytes: int, size: int) -> bool:
+        if buffered_bytes + size > self._config.message_memory_budget_bytes:
+            return False
+        with self._lock:
+            if self.memory_bytes + size > self._config.memory_budget_bytes:
+                return False
+            self.memory_bytes += size
+            return True
+
+    def _update_usage(self, memory_delta: int, disk_delta: int):
+        with self._lock:
+            self.memory_bytes += memory_delta
+            self.disk_bytes += disk_delta
+
+
+class SpooledBody(io.RawIOBase):
+    def __init__(self, spool: MessageSpool):
+        super().__init__()
+        self._spool = spool
+        self._buffer = bytearray()
+        self._file: Optional[IO[bytes]] = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._size = 0
+        self._position = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def on_disk(self) -> bool:
+        return self._file is not None
+
+    def append(self, data: bytes):
+        if not self.on_disk and self._spool._reserve_memory(len(self._buffer), len(data)):
+            self._buffer += data
+        else:
+            self._append_to_file(data)
+        self._size += len(data)
+
+    def finish(self):
+        if self._file is not None:
+            self._file.flush()
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def view(self) -> memoryview:
+        return memoryview(self._buffer if self._mmap is None else self._mmap)
+
+    def payload(self):
+        if not self.on_disk:
+            return self._buffer
+        self.seek(0)
+        return self
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        start = self._position
+        end = min(self._size, start + len(buffer))
+        with self.view() as view:
+            buffer[: end - start] = view[start:end]
+        self._position = end
+        return end - start
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._size
+        self._position = max(0, offset)
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
+
+    def close(self):
+        if not self.closed:
+            self._release()
+        super().close()
+
+    def _append_to_file(self, data: bytes):
+        if self._file is None:
+            self._file = self._spool._new_file()
+            self._file.write(self._buffer)
+            self._spool._update_usage(-len(self._buffer), len(self._buffer))
+            self._buffer = bytearray()
+        self._file.write(data)
+        self._spool._update_usage(0, len(data))
+
+    def _release(self):
+        if self._file is not None:
+            self._spool._update_usage(0, -self._size)
+            if self._mmap is not None:
+                self._mmap.close()
+            self._file.close()
+        else:
+            self._spool._update_usage(-len(self._buffer), 0)
+        self._buffer = bytearray()
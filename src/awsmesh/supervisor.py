@@ -0,0 +1,177 @@
+import logging
+import multiprocessing
+import time
+from collections import Counter
+from queue import Empty
+from threading import Event
+from typing import Callable, Dict, Optional
+
+from awsmesh.backoff import ExponentialBackoff
+from awsmesh.monitoring.output import ProbeListener
+from awsmesh.monitoring.probe import LoggingProbe
+from awsmesh.partition import MessagePartition
+
+logger = logging.getLogger(__name__)
+
+SUPERVISOR_CHECK_INTERVAL_SEC = 1
+WORKER_STOP_GRACE_SEC = 2
+WORKER_RESTART_INITIAL_DELAY_SEC = 1
+WORKER_RESTART_MAX_DELAY_SEC = 60
+
+WorkerTarget = Callable[[MessagePartition, ProbeListener], None]
+
+
+def _run_worker(run_worker: WorkerTarget, partition: MessagePartition, metrics_queue):
+    def report_event(event_name: str, fields: dict, level: str):
+        metrics_queue.put((event_name, fields.get("error")))
+
+    run_worker(partition, report_event)
+
+
+class ForwarderSupervisor:
+    def __init__(
+        self,
+        run_worker: WorkerTarget,
+        processes: int,
+        probe: Optional[LoggingProbe] = None,
+        metrics_interval_sec: float = 60,
+        worker_shutdown_deadline_sec: float = 0,
+        exit_event: Optional[Event] = None,
+        process_context=None,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.monotonic,
+        restart_initial_delay_sec: float = WORKER_RESTART_INITIAL_DELAY_SEC,
+        restart_max_delay_sec: float = WORKER_RESTART_MAX_DELAY_SEC,
+    ):
+        self._run_worker = run_worker
+        self._processes = processes
+        self._probe = probe or LoggingProbe()
+        self._metrics_interval_sec = metrics_interval_sec
+        self._worker_stop_timeout_sec = worker_shutdown_deadline_sec + WORKER_STOP_GRACE_SEC
+        self._exit_event = exit_event or Event()
+        self._context = process_context or multiprocessing.get_context("fork")
+        self._sleep = sleep
+        self._clock = clock
+        self._restart_initial_delay_sec = restart_initial_delay_sec
+        self._restart_max_delay_sec = restart_max_delay_sec
+        self._metrics_queue = self._context.Queue()
+        self._workers: Dict[int, multiprocessing.process.BaseProcess] = {}
+        self._worker_start_times: Dict[int, float] = {}
+        self._restart_backoffs: Dict[int, ExponentialBackoff] = {}
+        self._restart_times: Dict[int, float] = {}
+        self._event_counts: Counter = Counter()
+        self._error_counts: Counter = Counter()
+        self._worker_restarts = 0
+
+    def start(self):
+        logger.info("Started forwarder supervisor")
+        for index in range(self._processes):
+            self._start_worker(index)
+
+        next_report = self._clock() + self._metrics_interval_sec
+        while not self._exit_event.is_set():
+            self._exit_event.wait(SUPERVISOR_CHECK_INTERVAL_SEC)
+            self._collect_metrics()
+            self._restart_exited_workers()
+            if self._clock() >= next_report:
+                self._report_metrics()
+                next_report = self._clock() + self._metrics_interval_sec
+
+        self._stop_workers()
+        self._report_metrics()
+        logger.info("Exiting forwarder supervisor")
+
+    def stop(self):
+        logger.info("Received request to stop")
+        self._exit_event.set()
+
+    def _start_worker(self, index: int):
+        worker = self._context.Process(
+            target=_run_worker,
+            args=(self._run_worker, MessagePartition(index, self._processes), self._metrics_queue),
+            name=f"forwarder-worker-{index}",
+        )
+        worker.start()
+        self._workers[index] = worker
+        self._worker_start_times[index] = self._clock()
+
+    def _restart_exited_workers(self):
+        if self._exit_event.is_set():
+            return
+        for index, worker in list(self._workers.items()):
+            if worker.is_alive():
+                self._reset_backoff_of_surviving_worker(index)
+            elif index in self._restart_times:
+                self._restart_worker_when_due(index)
+            else:
+                self._schedule_restart(index, worker)
+
+    def _schedule_restart(self, index: int, worker: multiprocessing.process.BaseProcess):
+        restart_delay_sec = self._restart_backoff(index).next_delay()
+        worker_exit_event = self._probe.new_worker_exit_event()
+        worker_exit_event.record_worker(index, worker.exitcode)
+        worker_exit_event.record_restart_delay(restart_delay_sec)
+        worker_exit_event.finish()
+        self._restart_times[index] = self._clock() + restart_delay_sec
+        self._restart_worker_when_due(index)
+
+    def _restart_worker_when_due(self, index: int):
+        if self._clock() < self._restart_times[index]:
+            return
+        del self._restart_times[index]
+        self._worker_restarts += 1
+        self._start_worker(index)
+
+    def _reset_backoff_of_surviving_worker(self, index: int):
+        if self._clock() - self._worker_start_times[index] >= self._restart_max_delay_sec:
+            self._restart_backoff(index).reset()
+
+    def _restart_backoff(self, index: int) -> ExponentialBackoff:
+        if index not in self._restart_backoffs:
+            self._restart_backoffs[index] = ExponentialBackoff(
+                self._restart_initial_delay_sec, self._restart_max_delay_sec
+            )
+        return self._restart_backoffs[index]
+
+    def _collect_metrics(self):
+        while True:
+            try:
+                event_name, error = self._metrics_queue.get_nowait()
+            except Empty:
+                return
+            self._event_counts[event_name] += 1
+            if error is not None:
+                self._error_counts[error] += 1
+
+    def _report_metrics(self):
+        supervisor_metrics_event = self._probe.new_supervisor_metrics_event()
+        supervisor_metrics_event.record_workers(len(self._workers), self._worker_restarts)
+        supervisor_metrics_event.record_event_counts(dict(self._event_counts))
+        supervisor_metrics_event.record_error_counts(dict(self._error_counts))
+        supervisor_metrics_event.finish()
+        self._event_counts.clear()
+        self._error_counts.clear()
+
+    def _stop_workers(self):
+        for worker in self._workers.values():
+            if worker.is_alive():
+                worker.terminate()
+        self._wait_for_workers_to_exit()
+        self._kill_remaining_workers()
+
+    def _wait_for_workers_to_exit(self):
+        deadline = self._clock() + self._worker_stop_timeout_sec
+        while self._any_worker_alive() and self._clock() < deadline:
+            self._collect_metrics()
+            self._sleep(SUPERVISOR_CHECK_INTERVAL_SEC / 10)
+        self._collect_metrics()
+
+    def _kill_remaining_workers(self):
+        for worker in self._workers.values():
+            if worker.is_alive():
+                logger.warning(f"Killing {worker.name} after it failed to stop in time")
+                worker.kill()
+            worker.join()
+
+    def _any_worker_alive(self) -> bool:
+        return any(worker.is_alive() for worker in self._workers.values())
@@ -1,4 +1,5 @@
-from typing import Protocol
+from concurrent.futures import Future
+from typing import List, Optional, Protocol
 
 from awsmesh.mesh import MeshMessage
 
@@ -11,6 +12,33 @@ class UploadEventMetadata(Protocol):
     def record_s3_key(self, key):
         ...
 
+    def record_s3_upload_strategy(self, strategy: str, part_count: int):
+        ...
+
+    def record_spool_usage(self, memory_bytes: int, disk_bytes: int):
+        ...
+
+    def record_s3_aggregate(self, aggregate_key: str, offset: int):
+        ...
+
+    def record_s3_object_already_exists(self):
+        ...
+
+    def record_s3_compression(self, compression: str, raw_bytes: int, compressed_bytes: int):
+        ...
+
+    def record_s3_metadata_headers_dropped(self, header_names: List[str]):
+        ...
+
+    def record_payload_checksums(self, md5: str, sha256: str):
+        ...
+
+    def record_s3_checksum(self, checksum: str):
+        ...
+
+    def record_s3_checksum_unavailable(self):
+        ...
+
     def record_sns_message_id(self, sns_message_id):
         ...
 
@@ -20,7 +48,18 @@ class UploadEventMetadata(Protocol):
     def record_sns_empty_message_error(self, message):
         ...
 
+    def record_sns_message_too_large_error(self, limit_bytes: int):
+        ...
+
+    def record_sns_invalid_utf8_error(self, offset: int):
+        ...
+
 
 class MessageUploader(Protocol):
-    def upload(self, message: MeshMessage, upload_event_metadata: UploadEventMetadata):
+    def upload(
+        self, message: MeshMessage, upload_event_metadata: UploadEventMetadata
+    ) -> Optional[Future]:
+        ...
+
+    def flush(self):
         ...
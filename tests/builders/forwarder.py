@@ -9,7 +9,9 @@ def build_forwarder(**kwargs):
     mock_uploader = kwargs.get("uploader", MagicMock())
     mock_probe = kwargs.get("probe", MagicMock())
     disable_message_header_validation = kwargs.get("disable_message_header_validation", False)
-    mock_uploader.upload.side_effect = kwargs.get("uploader_error", None)
+    mock_uploader.upload.side_effect = kwargs.get(
+        "uploader_error", mock_uploader.upload.side_effect
+    )
     mock_mesh_inbox.list_message_ids.return_value = [
         m_id for m_id in kwargs.get("list_message_ids", [])
     ]
@@ -19,5 +21,16 @@ def build_forwarder(**kwargs):
     mock_mesh_inbox.count_messages.return_value = kwargs.get("inbox_message_count", 0)
 
     return MeshToAwsForwarder(
-        mock_mesh_inbox, mock_uploader, mock_probe, disable_message_header_validation
+        mock_mesh_inbox,
+        mock_uploader,
+        mock_probe,
+        disable_message_header_validation,
+        workers=kwargs.get("workers", 1),
+        poll_scheduler=kwargs.get("poll_scheduler", None),
+        drain_mode=kwargs.get("drain_mode", False),
+        retry_policy=kwargs.get("retry_policy", None),
+        sleep=kwargs.get("sleep", MagicMock()),
+        partition=kwargs.get("partition", None),
+        lease=kwargs.get("lease", None),
+        message_group=kwargs.get("message_group", None),
     )
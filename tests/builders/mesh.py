@@ -1,3 +1,4 @@
+from io import BytesIO
 from unittest.mock import MagicMock
 
 from requests import ConnectionError, HTTPError, Request, Response
@@ -8,6 +9,7 @@ from awsmesh.mesh import (
     MESH_STATUS_SUCCESS,
     MeshClientNetworkError,
     MeshInbox,
+    MeshMessage,
 )
 from tests.builders.common import a_datetime, a_string
 
@@ -44,6 +46,7 @@ def build_mex_headers(**kwargs):
         "messagetype": kwargs.get("message_type", MESH_MESSAGE_TYPE_DATA),
         "filename": kwargs.get("file_name", a_filename(mocked_timestamp)),
         "messageid": kwargs.get("message_id", a_string()),
+        "workflowid": kwargs.get("workflow_id", a_string()),
         "from": kwargs.get("from", a_string()),
     }
 
@@ -55,9 +58,16 @@ def mock_client_message(**kwargs):
     message.acknowledge.side_effect = kwargs.get("acknowledge_error", None)
     message.mex_header = lambda key: mex_headers[key]
     message.mex_headers.return_value = mex_headers.items()
+    del message.readinto
     return message
 
 
+def build_mesh_message(content=b"", **kwargs):
+    client_message = mock_client_message(**kwargs)
+    client_message.read.side_effect = BytesIO(content).read
+    return MeshMessage(client_message)
+
+
 def mock_mesh_message(**kwargs):
     message = MagicMock()
     message.id = kwargs.get("message_id", a_string())
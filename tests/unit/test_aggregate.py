@@ -0,0 +1,233 @@
+import hashlib
+import json
+import tarfile
+from base64 import b64decode
+from io import BytesIO
+from unittest.mock import MagicMock, patch
+
+import pytest
+from botocore.exceptions import EndpointConnectionError
+
+from awsmesh.aggregate import (
+    AGGREGATE_BUILDERS,
+    NDJSON_AGGREGATE_FORMAT,
+    TAR_AGGREGATE_FORMAT,
+    AggregationConfig,
+    S3Aggregator,
+    UnknownAggregateFormat,
+)
+from awsmesh.checksum import PayloadChecksums
+from awsmesh.spool import MessageSpool
+from awsmesh.uploader import UploaderError
+from tests.builders.aws import build_client_error
+from tests.builders.mesh import mock_mesh_message
+
+
+def _written_objects(mock_s3_client):
+    return {
+        call.kwargs["Key"]: call.kwargs["Body"] for call in mock_s3_client.put_object.call_args_list
+    }
+
+
+def _aggregate_and_manifest(mock_s3_client):
+    objects = _written_objects(mock_s3_client)
+    manifest_key = next(key for key in objects if key.endswith(".manifest.json"))
+    manifest = json.loads(objects[manifest_key])
+    return objects[manifest["object"]], manifest
+
+
+def _entry_bytes(aggregate, entry):
+    start = entry["offset"]
+    end = start + entry["length"]
+    return aggregate[start:end]
+
+
+def _checksums(body):
+    return PayloadChecksums(
+        md5=hashlib.md5(body).hexdigest(), sha256=hashlib.sha256(body).hexdigest()
+    )
+
+
+def _add(aggregator, message_id, body, event=None):
+    return aggregator.add(
+        mock_mesh_message(message_id=message_id),
+        f"2020/11/02/{message_id}.dat",
+        None,
+        MessageSpool().spool(BytesIO(body), len(body)),
+        _checksums(body),
+        event or MagicMock(),
+    )
+
+
+def test_buffers_messages_until_flushed():
+    mock_s3_client = MagicMock()
+    aggregator = S3Aggregator(mock_s3_client, "test_bucket", AggregationConfig())
+
+    future = _add(aggregator, "first", b"one")
+
+    mock_s3_client.put_object.assert_not_called()
+    assert not future.done()
+    aggregator.flush()
+    assert future.result() is None
+
+
+def test_writes_ndjson_aggregate_with_byte_offset_manifest():
+    mock_s3_client = MagicMock()
+    aggregator = S3Aggregator(
+        mock_s3_client, "test_bucket", AggregationConfig(object_format=NDJSON_AGGREGATE_FORMAT)
+    )
+
+    _add(aggregator, "first", b"one")
+    _add(aggregator, "second", b"two")
+    aggregator.flush()
+
+    aggregate, manifest = _aggregate_and_manifest(mock_s3_client)
+    assert manifest["format"] == "ndjson"
+    assert [entry["messageId"] for entry in manifest["messages"]] == ["first", "second"]
+    bodies = [
+        b64decode(json.loads(_entry_bytes(aggregate, entry))["body"])
+        for entry in manifest["messages"]
+    ]
+    assert bodies == [b"one", b"two"]
+
+
+def test_writes_tar_aggregate_with_byte_offset_manifest():
+    mock_s3_client = MagicMock()
+    aggregator = S3Aggregator(
+        mock_s3_client, "test_bucket", AggregationConfig(object_format=TAR_AGGREGATE_FORMAT)
+    )
+
+    _add(aggregator, "first", b"one")
+    _add(aggregator, "second", b"second body")
+    aggregator.flush()
+
+    aggregate, manifest = _aggregate_and_manifest(mock_s3_client)
+    assert manifest["object"].endswith(".tar")
+    bodies = [_entry_bytes(aggregate, entry) for entry in manifest["messages"]]
+    assert bodies == [b"one", b"second body"]
+    with tarfile.open(fileobj=BytesIO(aggregate)) as tar:
+        assert tar.getnames() == ["2020/11/02/first.dat", "2020/11/02/second.dat"]
+
+
+def test_writes_aggregate_when_message_count_limit_is_reached():
+    mock_s3_client = MagicMock()
+    aggregator = S3Aggregator(mock_s3_client, "test_bucket", AggregationConfig(max_messages=2))
+
+    first = _add(aggregator, "first", b"one")
+    second = _add(aggregator, "second", b"two")
+
+    assert first.done() and second.done()
+    assert mock_s3_client.put_object.call_count == 2
+
+
+def test_writes_aggregate_when_byte_limit_is_reached():
+    mock_s3_client = MagicMock()
+    aggregator = S3Aggregator(mock_s3_client, "test_bucket", AggregationConfig(max_bytes=5))
+
+    first = _add(aggregator, "first", b"one")
+    second = _add(aggregator, "second", b"two")
+
+    assert first.done() and second.done()
+
+
+def test_writes_aggregate_when_oldest_message_reaches_max_age():
+    clock = MagicMock(side_effect=[0, 0, 61])
+    aggregator = S3Aggregator(
+        MagicMock(), "test_bucket", AggregationConfig(max_age_sec=60), clock=clock
+    )
+
+    first = _add(aggregator, "first", b"one")
+    second = _add(aggregator, "second", b"two")
+
+    assert first.done() and second.done()
+
+
+def test_records_aggregate_key_and_offset_on_message_events():
+    forward_message_event = MagicMock()
+    mock_s3_client = MagicMock()
+    aggregator = S3Aggregator(mock_s3_client, "test_bucket", AggregationConfig())
+
+    _add(aggregator, "first", b"one", forward_message_event)
+    aggregator.flush()
+
+    _, manifest = _aggregate_and_manifest(mock_s3_client)
+    forward_message_event.record_s3_aggregate.assert_called_once_with(manifest["object"], 0)
+
+
+def test_fails_buffered_uploads_when_aggregate_cannot_be_written():
+    mock_s3_client = MagicMock()
+    mock_s3_client.put_object.side_effect = build_client_error(message="failed")
+    aggregator = S3Aggregator(mock_s3_client, "test_bucket", AggregationConfig())
+
+    future = _add(aggregator, "first", b"one")
+    aggregator.flush()
+
+    with pytest.raises(UploaderError):
+        future.result()
+
+
+def test_fails_buffered_uploads_when_s3_cannot_be_reached():
+    mock_s3_client = MagicMock()
+    mock_s3_client.put_object.side_effect = EndpointConnectionError(endpoint_url="s3")
+    aggregator = S3Aggregator(mock_s3_client, "test_bucket", AggregationConfig())
+
+    future = _add(aggregator, "first", b"one")
+    aggregator.flush()
+
+    with pytest.raises(UploaderError):
+        future.result(timeout=0)
+
+
+def test_fails_buffered_uploads_when_aggregate_cannot_be_built():
+    aggregator = S3Aggregator(MagicMock(), "test_bucket", AggregationConfig())
+    future = _add(aggregator, "first", b"one")
+
+    with patch.dict(AGGREGATE_BUILDERS, {NDJSON_AGGREGATE_FORMAT: MagicMock(side_effect=OSError)}):
+        with pytest.raises(OSError):
+            aggregator.flush()
+
+    with pytest.raises(UploaderError):
+        future.result(timeout=0)
+
+
+def test_flush_does_nothing_when_no_messages_are_buffered():
+    mock_s3_client = MagicMock()
+    aggregator = S3Aggregator(mock_s3_client, "test_bucket", AggregationConfig())
+
+    aggregator.flush()
+
+    mock_s3_client.put_object.assert_not_called()
+
+
+def test_raises_for_unknown_aggregate_format():
+    with pytest.raises(UnknownAggregateFormat):
+        S3Aggregator(MagicMock(), "test_bucket", AggregationConfig(object_format="zip"))
+
+
+def test_releases_spooled_bodies_once_aggregate_is_written():
+    spool = MessageSpool()
+    aggregator = S3Aggregator(MagicMock(), "test_bucket", AggregationConfig())
+
+    aggregator.add(
+        mock_mesh_message(),
+        "a/key",
+        None,
+        spool.spool(BytesIO(b"body"), 4),
+        _checksums(b"body"),
+        MagicMock(),
+    )
+    aggregator.flush()
+
+    assert spool.memory_bytes == 0
+
+
+def test_records_payload_checksums_in_manifest():
+    mock_s3_client = MagicMock()
+    aggregator = S3Aggregator(mock_s3_client, "test_bucket", AggregationConfig())
+
+    _add(aggregator, "first", b"hello")
+    aggregator.flush()
+
+    _, manifest = _aggregate_and_manifest(mock_s3_client)
+    assert manifest["messages"][0]["sha256"] == hashlib.sha256(b"hello").hexdigest()
+    assert manifest["messages"][0]["md5"] == hashlib.md5(b"hello").hexdigest()
@@ -0,0 +1,48 @@
+from awsmesh.backoff import ExponentialBackoff, RetryPolicy
+
+
+def _no_jitter(low, high):
+    return high
+
+
+def test_delay_grows_exponentially():
+    backoff = ExponentialBackoff(initial_delay_sec=1, max_delay_sec=100, jitter=_no_jitter)
+
+    delays = [backoff.next_delay() for _ in range(4)]
+
+    assert delays == [1, 2, 4, 8]
+
+
+def test_delay_is_capped_at_max_delay():
+    backoff = ExponentialBackoff(initial_delay_sec=1, max_delay_sec=5, jitter=_no_jitter)
+
+    delays = [backoff.next_delay() for _ in range(5)]
+
+    assert delays == [1, 2, 4, 5, 5]
+
+
+def test_delay_is_jittered_between_half_and_full_delay():
+    backoff = ExponentialBackoff(initial_delay_sec=8, max_delay_sec=100)
+
+    delay = backoff.next_delay()
+
+    assert 4 <= delay <= 8
+
+
+def test_reset_starts_again_from_initial_delay():
+    backoff = ExponentialBackoff(initial_delay_sec=1, max_delay_sec=100, jitter=_no_jitter)
+    backoff.next_delay()
+    backoff.next_delay()
+
+    backoff.reset()
+
+    assert backoff.attempts == 0
+    assert backoff.next_delay() == 1
+
+
+def test_retry_policy_creates_a_fresh_backoff_each_time():
+    retry_policy = RetryPolicy(max_attempts=3, initial_delay_sec=2, max_delay_sec=4)
+    backoff = retry_policy.new_backoff()
+    backoff.next_delay()
+
+    assert retry_policy.new_backoff().attempts == 0
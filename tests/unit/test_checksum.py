@@ -0,0 +1,57 @@
+import hashlib
+import zlib
+from base64 import b64encode
+from io import BytesIO
+
+from awsmesh.checksum import Crc32Reader, DigestingReader
+
+
+def _encode(crc):
+    return b64encode(crc.to_bytes(4, byteorder="big")).decode("ascii")
+
+
+def _read_all(reader, chunk_size=3):
+    chunks = []
+    while chunk := reader.read(chunk_size):
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def test_digesting_reader_passes_content_through():
+    assert _read_all(DigestingReader(BytesIO(b"some content"))) == b"some content"
+
+
+def test_digesting_reader_computes_md5_and_sha256_of_content_read():
+    reader = DigestingReader(BytesIO(b"some content"))
+
+    _read_all(reader)
+
+    assert reader.checksums.md5 == hashlib.md5(b"some content").hexdigest()
+    assert reader.checksums.sha256 == hashlib.sha256(b"some content").hexdigest()
+
+
+def test_crc32_reader_computes_full_object_checksum():
+    reader = Crc32Reader(BytesIO(b"some content"), part_size=5)
+
+    assert _read_all(reader) == b"some content"
+    assert reader.full_object_checksum == _encode(zlib.crc32(b"some content"))
+    assert reader.bytes_read == 12
+
+
+def test_crc32_reader_computes_composite_checksum_across_part_boundaries():
+    reader = Crc32Reader(BytesIO(b"some content"), part_size=5)
+
+    _read_all(reader, chunk_size=7)
+
+    part_crcs = b"".join(
+        zlib.crc32(part).to_bytes(4, byteorder="big") for part in [b"some ", b"conte", b"nt"]
+    )
+    assert reader.composite_checksum == f"{_encode(zlib.crc32(part_crcs))}-3"
+
+
+def test_crc32_reader_composite_checksum_has_no_empty_trailing_part():
+    reader = Crc32Reader(BytesIO(b"0123456789"), part_size=5)
+
+    _read_all(reader)
+
+    assert reader.composite_checksum.endswith("-2")
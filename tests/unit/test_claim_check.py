@@ -0,0 +1,79 @@
+from io import BytesIO
+from unittest.mock import MagicMock
+
+from awsmesh.checksum import DigestingReader
+from awsmesh.claim_check import ClaimCheckConfig, ClaimCheckStore
+from tests.builders.mesh import build_mesh_message, build_mex_headers
+
+
+def _read_all(fileobj, chunk_size=4):
+    chunks = []
+    while chunk := fileobj.read(chunk_size):
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def _build_transfer_manager(uploaded):
+    transfer_manager = MagicMock()
+
+    def upload(fileobj, bucket, key):
+        uploaded[(bucket, key)] = _read_all(fileobj)
+        return MagicMock()
+
+    transfer_manager.upload.side_effect = upload
+    return transfer_manager
+
+
+def _store_message(store, content, head_size):
+    message = build_mesh_message(
+        content,
+        message_id="the-message-id",
+        mex_headers=build_mex_headers(status_timestamp="20201102000000"),
+    )
+    payload = DigestingReader(message)
+    head = memoryview(payload.read(head_size))
+    return store.store(message, head, payload)
+
+
+def test_streams_buffered_head_and_rest_of_message_to_s3():
+    uploaded = {}
+    store = ClaimCheckStore(
+        MagicMock(),
+        ClaimCheckConfig(bucket_name="claim_bucket"),
+        transfer_manager=_build_transfer_manager(uploaded),
+    )
+
+    _store_message(store, b"0123456789abcdef", head_size=5)
+
+    assert uploaded == {
+        ("claim_bucket", "claim-checks/2020/11/02/the-message-id"): b"0123456789abcdef"
+    }
+
+
+def test_returns_pointer_with_bucket_key_size_and_checksum():
+    store = ClaimCheckStore(
+        MagicMock(),
+        ClaimCheckConfig(bucket_name="claim_bucket", key_prefix="offloaded"),
+        transfer_manager=_build_transfer_manager({}),
+    )
+
+    pointer = _store_message(store, b"0123456789abcdef", head_size=5)
+
+    payload = DigestingReader(BytesIO(b"0123456789abcdef"))
+    payload.read()
+    assert pointer == {
+        "bucket": "claim_bucket",
+        "key": "offloaded/2020/11/02/the-message-id",
+        "size": 16,
+        "sha256": payload.checksums.sha256,
+    }
+
+
+def test_exposes_threshold_from_config():
+    store = ClaimCheckStore(
+        MagicMock(),
+        ClaimCheckConfig(bucket_name="claim_bucket", threshold_bytes=1024),
+        transfer_manager=MagicMock(),
+    )
+
+    assert store.threshold_bytes == 1024
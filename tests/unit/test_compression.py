@@ -0,0 +1,70 @@
+import gzip
+from io import BytesIO
+from unittest.mock import patch
+
+import pytest
+
+from awsmesh.compression import (
+    GZIP_COMPRESSION,
+    ZSTD_COMPRESSION,
+    CompressingReader,
+    UnsupportedCompression,
+    validate_compression,
+    zstandard,
+)
+
+
+def _read_all(fileobj, chunk_size=100):
+    chunks = []
+    while chunk := fileobj.read(chunk_size):
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def test_gzip_compresses_source_in_chunks():
+    content = b"a,b,c\n" * 10000
+    reader = CompressingReader(BytesIO(content), GZIP_COMPRESSION)
+
+    compressed = _read_all(reader)
+
+    assert gzip.decompress(compressed) == content
+    assert len(compressed) < len(content)
+
+
+def test_counts_compressed_bytes_read():
+    reader = CompressingReader(BytesIO(b"a,b,c\n" * 10000), GZIP_COMPRESSION)
+
+    compressed = reader.read()
+
+    assert reader.bytes_read == len(compressed)
+
+
+def test_compresses_empty_source():
+    reader = CompressingReader(BytesIO(b""), GZIP_COMPRESSION)
+
+    assert gzip.decompress(reader.read()) == b""
+
+
+@pytest.mark.skipif(zstandard is None, reason="zstandard is not installed")
+def test_zstd_compresses_source_in_chunks():
+    content = b"a,b,c\n" * 10000
+    reader = CompressingReader(BytesIO(content), ZSTD_COMPRESSION)
+
+    compressed = _read_all(reader)
+
+    assert zstandard.ZstdDecompressor().decompressobj().decompress(compressed) == content
+
+
+def test_accepts_no_compression():
+    validate_compression(None)
+
+
+def test_raises_for_unknown_compression():
+    with pytest.raises(UnsupportedCompression):
+        validate_compression("bzip2")
+
+
+@patch("awsmesh.compression.zstandard", None)
+def test_raises_for_zstd_when_zstandard_is_not_installed():
+    with pytest.raises(UnsupportedCompression):
+        validate_compression(ZSTD_COMPRESSION)
@@ -1,5 +1,8 @@
+import json
 from unittest import mock
 
+import pytest
+
 from awsmesh.config import ForwarderConfig
 
 
@@ -18,6 +21,8 @@ def test_read_config_from_environment():
         "ENDPOINT_URL": "https://an.endpoint:3000",
         "SSM_ENDPOINT_URL": "https://an.endpoint:3001",
         "DISABLE_MESSAGE_HEADER_VALIDATION": "true",
+        "FORWARDER_WORKERS": "8",
+        "FORWARDER_MODE": "pipeline",
     }
 
     expected_config = ForwarderConfig(
@@ -34,6 +39,8 @@ def test_read_config_from_environment():
         endpoint_url="https://an.endpoint:3000",
         ssm_endpoint_url="https://an.endpoint:3001",
         disable_message_header_validation=True,
+        forwarder_workers="8",
+        forwarder_mode="pipeline",
     )
 
     actual_config = ForwarderConfig.from_environment_variables(environment)
@@ -69,6 +76,8 @@ def test_read_config_from_environment_uses_default_when_no_var_set():
         endpoint_url=None,
         ssm_endpoint_url=None,
         disable_message_header_validation=False,
+        forwarder_workers="1",
+        forwarder_mode="sync",
     )
 
     actual_config = ForwarderConfig.from_environment_variables(environment)
@@ -112,6 +121,83 @@ def test_an_invalid_string_value_for_disable_validation_setting_is_interpreted_a
     assert actual_config.disable_message_header_validation == False
 
 
+def test_mailbox_configs_is_the_config_itself_when_no_mailboxes_are_set():
+    config = ForwarderConfig.from_environment_variables(_dummy_env_data_for_required_variables())
+
+    assert config.mailbox_configs() == [config]
+
+
+def test_mailbox_configs_override_top_level_config_per_mailbox():
+    environment = _dummy_env_data_for_required_variables()
+    environment["MESH_MAILBOXES"] = json.dumps(
+        [
+            {"mesh_mailbox_ssm_param_name": "/params/mesh/first-mailbox"},
+            {
+                "mesh_mailbox_ssm_param_name": "/params/mesh/second-mailbox",
+                "mesh_password_ssm_param_name": "/params/mesh/second-password",
+                "message_destination": "sns",
+                "sns_topic_arn": "a-topic-arn",
+            },
+        ]
+    )
+    config = ForwarderConfig.from_environment_variables(environment)
+
+    first, second = config.mailbox_configs()
+
+    assert first.mesh_mailbox_ssm_param_name == "/params/mesh/first-mailbox"
+    assert first.mesh_password_ssm_param_name == "/params/mesh/password"
+    assert first.s3_bucket_name == "mesh-data-bucket"
+    assert second.mesh_mailbox_ssm_param_name == "/params/mesh/second-mailbox"
+    assert second.mesh_password_ssm_param_name == "/params/mesh/second-password"
+    assert second.message_destination == "sns"
+    assert second.sns_topic_arn == "a-topic-arn"
+
+
+def test_mailbox_configs_parse_overrides_like_environment_variables():
+    environment = _dummy_env_data_for_required_variables()
+    environment["MESH_MAILBOXES"] = json.dumps(
+        [
+            {
+                "sns_publish_batch": "false",
+                "s3_partition_manifests": True,
+                "s3_small_object_threshold": 5242880,
+                "sns_publish_batch_linger": 0.25,
+            }
+        ]
+    )
+    config = ForwarderConfig.from_environment_variables(environment)
+
+    (mailbox,) = config.mailbox_configs()
+
+    assert not mailbox.sns_publish_batch
+    assert mailbox.s3_partition_manifests
+    assert mailbox.s3_small_object_threshold == "5242880"
+    assert mailbox.sns_publish_batch_linger == "0.25"
+
+
+@pytest.mark.parametrize(
+    "mesh_mailboxes",
+    [
+        "not json",
+        "{}",
+        "[]",
+        '[{"poll_frequency": "1"}]',
+        '[{"s3_small_object_threshold": null}]',
+        '[{"s3_bucket_name": ["a-bucket"]}]',
+        '[{"s3_key_shard_count": true}]',
+        '[{"sns_publish_batch": "maybe"}]',
+        '[{"sns_publish_batch": 1}]',
+    ],
+)
+def test_mailbox_configs_exits_when_mailboxes_are_invalid(mesh_mailboxes):
+    environment = _dummy_env_data_for_required_variables()
+    environment["MESH_MAILBOXES"] = mesh_mailboxes
+    config = ForwarderConfig.from_environment_variables(environment)
+
+    with pytest.raises(SystemExit):
+        config.mailbox_configs()
+
+
 def _dummy_env_data_for_required_variables():
     return {
         "MESH_URL": "nice-mesh.biz",
@@ -1,11 +1,17 @@
 import logging
+import time
+from concurrent.futures import Future
+from threading import Event, Thread
 from unittest import mock
 from unittest.mock import MagicMock, call, patch
 
 import pytest
 
+from awsmesh.backoff import RetryPolicy
 from awsmesh.forwarder import RetryableException
-from awsmesh.mesh import InvalidMeshHeader, MissingMeshHeader
+from awsmesh.lease import MessageLeaseError
+from awsmesh.mesh import MESH_LIST_MESSAGES_PAGE_LIMIT, InvalidMeshHeader, MissingMeshHeader
+from awsmesh.partition import MessagePartition
 from awsmesh.uploader import UploaderError
 from tests.builders.common import a_string
 from tests.builders.forwarder import build_forwarder
@@ -516,3 +522,697 @@ def test_records_error_when_message_uploader_raises_uploader_error():
         ],
         any_order=False,
     )
+
+
+def test_forwards_multiple_messages_concurrently_when_configured_with_workers():
+    mock_messages = [mock_mesh_message() for _ in range(5)]
+    messages_by_id = {message.id: message for message in mock_messages}
+    mock_uploader = MagicMock()
+
+    forwarder = build_forwarder(
+        list_message_ids=list(messages_by_id.keys()),
+        retrieve_message=lambda message_id: messages_by_id[message_id],
+        uploader=mock_uploader,
+        workers=3,
+    )
+
+    forwarder.forward_messages()
+
+    mock_uploader.upload.assert_has_calls(
+        [call(message, mock.ANY) for message in mock_messages], any_order=True
+    )
+    assert mock_uploader.upload.call_count == 5
+    for mock_message in mock_messages:
+        mock_message.acknowledge.assert_called_once()
+
+
+def test_records_a_forward_message_event_per_message_when_forwarding_concurrently():
+    mock_messages = [mock_mesh_message() for _ in range(4)]
+    messages_by_id = {message.id: message for message in mock_messages}
+    probe = MagicMock()
+
+    forwarder = build_forwarder(
+        list_message_ids=list(messages_by_id.keys()),
+        retrieve_message=lambda message_id: messages_by_id[message_id],
+        probe=probe,
+        workers=2,
+    )
+
+    forwarder.forward_messages()
+
+    assert probe.new_forward_message_event.call_count == 4
+    assert probe.new_forward_message_event().finish.call_count == 4
+
+
+def test_that_when_forwarding_concurrently_network_errors_are_raised_as_a_single_retryable_exception():
+    good_message = mock_mesh_message()
+    mock_uploader = MagicMock()
+    logger = logging.getLogger("awsmesh.forwarder")
+
+    def retrieve_message(message_id):
+        if message_id == good_message.id:
+            return good_message
+        raise mesh_client_network_error()
+
+    forwarder = build_forwarder(
+        list_message_ids=["bad_message_id", good_message.id, "another_bad_message_id"],
+        retrieve_message=retrieve_message,
+        uploader=mock_uploader,
+        workers=3,
+    )
+
+    with patch.object(logger, "info") as mock_info:
+        with pytest.raises(RetryableException):
+            forwarder.forward_messages()
+
+    mock_uploader.upload.assert_called_once_with(good_message, mock.ANY)
+    mock_info.assert_called_once_with(
+        "Raising single retryable exception, actually caught 2 message exception(s)"
+    )
+
+
+def test_that_when_forwarding_concurrently_a_non_network_error_is_not_caught():
+    non_network_exception = Exception("some funky unexpected occurrence on retrieving message")
+    forwarder = build_forwarder(
+        list_message_ids=["bad_message_id"],
+        retrieve_message=[non_network_exception],
+        workers=2,
+    )
+
+    with pytest.raises(Exception) as raised_e_info:
+        forwarder.forward_messages()
+
+    assert raised_e_info.value == non_network_exception
+
+
+def _a_slow_retrieval(messages_by_id):
+    message_ids = list(messages_by_id.keys())
+
+    def retrieve_message(message_id):
+        time.sleep(0.01 * (len(message_ids) - message_ids.index(message_id)))
+        return messages_by_id[message_id]
+
+    return retrieve_message
+
+
+def test_uploads_messages_of_a_group_in_list_order_when_forwarding_concurrently():
+    mock_messages = [mock_mesh_message(sender=sender) for sender in "ABABBAAB"]
+    messages_by_id = {message.id: message for message in mock_messages}
+    uploaded = []
+    mock_uploader = MagicMock()
+    mock_uploader.upload.side_effect = lambda message, _: uploaded.append(message)
+
+    forwarder = build_forwarder(
+        list_message_ids=list(messages_by_id.keys()),
+        retrieve_message=_a_slow_retrieval(messages_by_id),
+        uploader=mock_uploader,
+        workers=4,
+        message_group=lambda message: message.sender,
+    )
+
+    forwarder.forward_messages()
+
+    for sender in "AB":
+        assert [m for m in uploaded if m.sender == sender] == [
+            m for m in mock_messages if m.sender == sender
+        ]
+
+
+def test_leaves_rest_of_a_group_for_redelivery_once_one_of_its_messages_fails_to_upload():
+    mock_messages = [
+        mock_mesh_message(sender="A", message_id="a1"),
+        mock_mesh_message(sender="A", message_id="a2"),
+        mock_mesh_message(sender="B", message_id="b1"),
+    ]
+    messages_by_id = {message.id: message for message in mock_messages}
+    uploaded = []
+    mock_uploader = MagicMock()
+
+    def upload(message, _):
+        if message.id == "a1":
+            raise UploaderError("failed")
+        uploaded.append(message.id)
+
+    mock_uploader.upload.side_effect = upload
+
+    forwarder = build_forwarder(
+        list_message_ids=list(messages_by_id.keys()),
+        retrieve_message=_a_slow_retrieval(messages_by_id),
+        uploader=mock_uploader,
+        workers=3,
+        message_group=lambda message: message.sender,
+    )
+
+    forwarder.forward_messages()
+
+    assert uploaded == ["b1"]
+    messages_by_id["a2"].acknowledge.assert_not_called()
+    messages_by_id["b1"].acknowledge.assert_called_once()
+
+
+def test_does_not_hold_back_a_group_behind_a_message_that_failed_before_upload():
+    good_message = mock_mesh_message(sender="A")
+    mock_uploader = MagicMock()
+
+    def retrieve_message(message_id):
+        if message_id == good_message.id:
+            return good_message
+        raise mesh_client_network_error()
+
+    forwarder = build_forwarder(
+        list_message_ids=["bad_message_id", good_message.id],
+        retrieve_message=retrieve_message,
+        uploader=mock_uploader,
+        workers=2,
+        message_group=lambda message: message.sender,
+    )
+
+    with pytest.raises(RetryableException):
+        forwarder.forward_messages()
+
+    mock_uploader.upload.assert_called_once_with(good_message, mock.ANY)
+
+
+def test_records_poll_interval_from_poll_scheduler():
+    probe = MagicMock()
+    poll_inbox_event = MagicMock()
+    probe.new_poll_inbox_event.return_value = poll_inbox_event
+    poll_scheduler = MagicMock()
+    poll_scheduler.current_interval_sec = 8
+    mesh_message = mock_mesh_message()
+
+    forwarder = build_forwarder(
+        list_message_ids=[mesh_message.id],
+        retrieve_message=[mesh_message],
+        probe=probe,
+        poll_scheduler=poll_scheduler,
+    )
+
+    forwarder.forward_messages()
+
+    poll_scheduler.record_poll.assert_called_once_with(1)
+    poll_inbox_event.record_poll_interval.assert_called_once_with(8)
+
+
+def test_infers_empty_mailbox_without_counting_when_draining_and_poll_was_not_a_full_page():
+    probe = MagicMock()
+    forwarder = build_forwarder(
+        list_message_ids=[a_string() for _ in range(3)],
+        retrieve_message=[mock_mesh_message() for _ in range(3)],
+        inbox_message_count=3,
+        drain_mode=True,
+        probe=probe,
+    )
+
+    forwarder.forward_messages()
+
+    assert forwarder.is_mailbox_empty() is True
+    probe.new_count_messages_event.assert_not_called()
+
+
+def test_counts_messages_when_draining_and_poll_returned_a_full_page():
+    message_ids = [a_string() for _ in range(MESH_LIST_MESSAGES_PAGE_LIMIT)]
+    forwarder = build_forwarder(
+        list_message_ids=message_ids,
+        retrieve_message=lambda message_id: mock_mesh_message(message_id=message_id),
+        inbox_message_count=1,
+        drain_mode=True,
+    )
+
+    forwarder.forward_messages()
+
+    assert forwarder.is_mailbox_empty() is False
+
+
+def test_counts_messages_when_draining_and_poll_failed():
+    mesh_inbox = MagicMock()
+    forwarder = build_forwarder(
+        mesh_inbox=mesh_inbox,
+        list_message_ids_error=mesh_client_network_error(),
+        inbox_message_count=0,
+        drain_mode=True,
+    )
+
+    with pytest.raises(RetryableException):
+        forwarder.forward_messages()
+
+    assert forwarder.is_mailbox_empty() is True
+    mesh_inbox.count_messages.assert_called_once()
+
+
+def test_counts_messages_after_short_poll_when_not_draining():
+    forwarder = build_forwarder(list_message_ids=[], inbox_message_count=1)
+
+    forwarder.forward_messages()
+
+    assert forwarder.is_mailbox_empty() is False
+
+
+def test_retries_retrieving_a_message_after_a_network_error():
+    mock_message = mock_mesh_message()
+    mock_uploader = MagicMock()
+    sleep = MagicMock()
+
+    forwarder = build_forwarder(
+        list_message_ids=[mock_message.id],
+        retrieve_message=[mesh_client_network_error(), mock_message],
+        uploader=mock_uploader,
+        retry_policy=RetryPolicy(max_attempts=3),
+        sleep=sleep,
+    )
+
+    forwarder.forward_messages()
+
+    mock_uploader.upload.assert_called_once_with(mock_message, mock.ANY)
+    mock_message.acknowledge.assert_called_once()
+    sleep.assert_called_once()
+
+
+def test_retries_acknowledging_a_message_without_uploading_it_again():
+    mock_message = mock_mesh_message(acknowledge_error=[mesh_client_network_error(), None])
+    mock_uploader = MagicMock()
+
+    forwarder = build_forwarder(
+        list_message_ids=[mock_message.id],
+        retrieve_message=[mock_message],
+        uploader=mock_uploader,
+        retry_policy=RetryPolicy(max_attempts=2),
+    )
+
+    forwarder.forward_messages()
+
+    assert mock_message.acknowledge.call_count == 2
+    mock_uploader.upload.assert_called_once()
+
+
+def test_records_retry_count_on_forward_message_event():
+    probe = MagicMock()
+    forward_message_event = MagicMock()
+    probe.new_forward_message_event.return_value = forward_message_event
+    mock_message = mock_mesh_message(acknowledge_error=[mesh_client_network_error(), None])
+
+    forwarder = build_forwarder(
+        list_message_ids=[mock_message.id],
+        retrieve_message=[mesh_client_network_error(), mock_message],
+        probe=probe,
+        retry_policy=RetryPolicy(max_attempts=3),
+    )
+
+    forwarder.forward_messages()
+
+    forward_message_event.record_retry_count.assert_called_once_with(2)
+
+
+def test_raises_retryable_exception_once_retry_attempts_are_exhausted():
+    probe = MagicMock()
+    forward_message_event = MagicMock()
+    probe.new_forward_message_event.return_value = forward_message_event
+    sleep = MagicMock()
+
+    forwarder = build_forwarder(
+        list_message_ids=["some_id"],
+        retrieve_message=[mesh_client_network_error() for _ in range(3)],
+        probe=probe,
+        retry_policy=RetryPolicy(max_attempts=3),
+        sleep=sleep,
+    )
+
+    with pytest.raises(RetryableException):
+        forwarder.forward_messages()
+
+    assert sleep.call_count == 2
+    forward_message_event.record_retry_count.assert_called_once_with(2)
+
+
+def test_continues_with_other_messages_while_retrying_one_message():
+    good_message = mock_mesh_message()
+    flaky_message = mock_mesh_message()
+    mock_uploader = MagicMock()
+    retrieve_outcomes = {
+        flaky_message.id: [mesh_client_network_error(), flaky_message],
+        good_message.id: [good_message],
+    }
+
+    def retrieve_message(message_id):
+        outcome = retrieve_outcomes[message_id].pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    forwarder = build_forwarder(
+        list_message_ids=[flaky_message.id, good_message.id],
+        retrieve_message=retrieve_message,
+        uploader=mock_uploader,
+        retry_policy=RetryPolicy(max_attempts=2),
+    )
+
+    forwarder.forward_messages()
+
+    mock_uploader.upload.assert_has_calls(
+        [call(flaky_message, mock.ANY), call(good_message, mock.ANY)]
+    )
+
+
+def test_stops_taking_new_messages_once_shutdown_is_requested():
+    first_message = mock_mesh_message()
+    second_message = mock_mesh_message()
+    mock_uploader = MagicMock()
+    forwarder = build_forwarder(
+        list_message_ids=[first_message.id, second_message.id],
+        retrieve_message=[first_message, second_message],
+        uploader=mock_uploader,
+    )
+    mock_uploader.upload.side_effect = lambda message, event: forwarder.request_shutdown(10)
+
+    forwarder.forward_messages()
+
+    mock_uploader.upload.assert_called_once_with(first_message, mock.ANY)
+    first_message.acknowledge.assert_called_once()
+
+
+def test_stops_waiting_for_in_flight_messages_once_shutdown_deadline_has_passed():
+    blocked_message = mock_mesh_message()
+    release_upload = Event()
+    mock_uploader = MagicMock()
+    forwarder = build_forwarder(
+        list_message_ids=[blocked_message.id],
+        retrieve_message=[blocked_message],
+        uploader=mock_uploader,
+        workers=2,
+    )
+
+    def upload(message, event):
+        forwarder.request_shutdown(0)
+        release_upload.wait(5)
+
+    mock_uploader.upload.side_effect = upload
+
+    forwarder.forward_messages()
+
+    blocked_message.acknowledge.assert_not_called()
+    release_upload.set()
+
+
+def test_does_not_retry_messages_once_shutdown_is_requested():
+    sleep = MagicMock()
+    forwarder = build_forwarder(
+        list_message_ids=["some_id"],
+        retrieve_message=[mesh_client_network_error(), mock_mesh_message()],
+        retry_policy=RetryPolicy(max_attempts=3),
+        sleep=sleep,
+    )
+    forwarder.request_shutdown(10)
+
+    with pytest.raises(RetryableException):
+        forwarder._process_message("some_id")
+
+    sleep.assert_not_called()
+
+
+def test_records_completed_and_unfinished_messages_on_shutdown():
+    probe = MagicMock()
+    shutdown_event = MagicMock()
+    probe.new_shutdown_event.return_value = shutdown_event
+    first_message = mock_mesh_message(message_id="first")
+    second_message = mock_mesh_message(message_id="second")
+    mock_uploader = MagicMock()
+    forwarder = build_forwarder(
+        list_message_ids=[first_message.id, second_message.id],
+        retrieve_message=[first_message, second_message],
+        uploader=mock_uploader,
+        probe=probe,
+    )
+    mock_uploader.upload.side_effect = lambda message, event: forwarder.request_shutdown(10)
+
+    forwarder.forward_messages()
+    forwarder.record_shutdown()
+
+    shutdown_event.assert_has_calls(
+        [
+            call.record_completed_message_ids(["first"]),
+            call.record_unfinished_message_ids(["second"]),
+            call.finish(),
+        ],
+        any_order=False,
+    )
+
+
+def test_exposes_message_count_of_last_poll():
+    forwarder = build_forwarder(list_message_ids=["1", "2"], retrieve_message=[MagicMock()] * 2)
+
+    forwarder.forward_messages()
+
+    assert forwarder.last_batch_count == 2
+
+
+def test_only_forwards_messages_owned_by_partition():
+    message_ids = [f"message-{i}" for i in range(10)]
+    partition = MessagePartition(1, 2)
+    owned_ids = [m_id for m_id in message_ids if partition.owns(m_id)]
+    mesh_inbox = MagicMock()
+    probe = MagicMock()
+    poll_inbox_event = MagicMock()
+    probe.new_poll_inbox_event.return_value = poll_inbox_event
+
+    forwarder = build_forwarder(
+        mesh_inbox=mesh_inbox,
+        list_message_ids=message_ids,
+        retrieve_message=lambda message_id: mock_mesh_message(message_id=message_id),
+        partition=partition,
+        probe=probe,
+    )
+
+    forwarder.forward_messages()
+
+    assert mesh_inbox.retrieve_message.call_args_list == [call(m_id) for m_id in owned_ids]
+    poll_inbox_event.record_message_batch_count.assert_called_once_with(10)
+    poll_inbox_event.record_owned_message_count.assert_called_once_with(len(owned_ids))
+
+
+def test_infers_empty_mailbox_when_partition_owned_none_of_the_polled_messages():
+    partition = MessagePartition(0, 2)
+    message_ids = [m_id for m_id in [f"message-{i}" for i in range(10)] if not partition.owns(m_id)]
+    probe = MagicMock()
+    forwarder = build_forwarder(
+        list_message_ids=message_ids,
+        inbox_message_count=len(message_ids),
+        partition=partition,
+        probe=probe,
+    )
+
+    forwarder.forward_messages()
+
+    assert forwarder.is_mailbox_empty() is True
+    probe.new_count_messages_event.assert_not_called()
+
+
+def test_only_forwards_messages_claimed_through_the_lease_and_records_counts():
+    claimed_message = mock_mesh_message()
+    lease = MagicMock()
+    lease.claim.side_effect = lambda message_id: message_id == claimed_message.id
+    mesh_inbox = MagicMock()
+    probe = MagicMock()
+
+    forwarder = build_forwarder(
+        mesh_inbox=mesh_inbox,
+        list_message_ids=[a_string(), claimed_message.id, a_string()],
+        retrieve_message=[claimed_message],
+        lease=lease,
+        probe=probe,
+    )
+
+    forwarder.forward_messages()
+
+    mesh_inbox.retrieve_message.assert_called_once_with(claimed_message.id)
+    claimed_message.acknowledge.assert_called_once()
+    message_lease_event = probe.new_message_lease_event.return_value
+    message_lease_event.record_lease_counts.assert_called_once_with(1, 2)
+    message_lease_event.finish.assert_called_once()
+
+
+def test_raises_retryable_exception_and_records_error_when_lease_fails():
+    lease_error = MessageLeaseError("throttled")
+    lease = MagicMock()
+    lease.claim.side_effect = lease_error
+    mesh_inbox = MagicMock()
+    probe = MagicMock()
+
+    forwarder = build_forwarder(
+        mesh_inbox=mesh_inbox, list_message_ids=[a_string()], lease=lease, probe=probe
+    )
+
+    with pytest.raises(RetryableException):
+        forwarder.forward_messages()
+
+    mesh_inbox.retrieve_message.assert_not_called()
+    probe.new_message_lease_event.return_value.record_message_lease_error.assert_called_once_with(
+        lease_error
+    )
+
+
+def test_infers_empty_mailbox_when_lease_claimed_none_of_the_polled_messages():
+    lease = MagicMock()
+    lease.claim.return_value = False
+    probe = MagicMock()
+    forwarder = build_forwarder(
+        list_message_ids=[a_string(), a_string()], inbox_message_count=2, lease=lease, probe=probe
+    )
+
+    forwarder.forward_messages()
+
+    assert forwarder.is_mailbox_empty() is True
+    probe.new_count_messages_event.assert_not_called()
+
+
+def test_does_not_record_lease_counts_without_a_lease():
+    probe = MagicMock()
+    forwarder = build_forwarder(list_message_ids=[], probe=probe)
+
+    forwarder.forward_messages()
+
+    probe.new_message_lease_event.assert_not_called()
+
+
+def _a_deferred_uploader(error=None):
+    uploads = []
+    mock_uploader = MagicMock()
+
+    def upload(message, forward_message_event):
+        future = Future()
+        uploads.append(future)
+        return future
+
+    def flush():
+        for future in uploads:
+            future.set_exception(error) if error else future.set_result(None)
+
+    mock_uploader.upload.side_effect = upload
+    mock_uploader.flush.side_effect = flush
+    return mock_uploader
+
+
+def test_acknowledges_deferred_upload_after_flushing_uploader():
+    mock_message = mock_mesh_message()
+    mock_uploader = _a_deferred_uploader()
+    mock_message.acknowledge.side_effect = lambda: mock_uploader.flush.assert_called_once()
+
+    forwarder = build_forwarder(
+        list_message_ids=[mock_message.id], retrieve_message=[mock_message], uploader=mock_uploader
+    )
+
+    forwarder.forward_messages()
+
+    mock_message.acknowledge.assert_called_once()
+
+
+def test_does_not_acknowledge_deferred_upload_that_fails():
+    mock_message = mock_mesh_message()
+    error = UploaderError("failed")
+    probe = MagicMock()
+    forward_message_event = probe.new_forward_message_event.return_value
+
+    forwarder = build_forwarder(
+        list_message_ids=[mock_message.id],
+        retrieve_message=[mock_message],
+        uploader=_a_deferred_uploader(error),
+        probe=probe,
+    )
+
+    forwarder.forward_messages()
+
+    mock_message.acknowledge.assert_not_called()
+    forward_message_event.record_uploader_error.assert_called_once_with(error)
+    forward_message_event.finish.assert_called_once()
+
+
+def test_finishes_deferred_forward_message_event_once_acknowledged():
+    mock_messages = [mock_mesh_message(), mock_mesh_message()]
+    probe = MagicMock()
+    forward_message_event = probe.new_forward_message_event.return_value
+
+    forwarder = build_forwarder(
+        list_message_ids=[message.id for message in mock_messages],
+        retrieve_message=mock_messages,
+        uploader=_a_deferred_uploader(),
+        probe=probe,
+    )
+
+    forwarder.forward_messages()
+
+    assert forward_message_event.finish.call_count == 2
+
+
+def test_does_not_flush_uploader_when_no_upload_was_deferred():
+    mock_message = mock_mesh_message()
+    mock_uploader = MagicMock()
+
+    forwarder = build_forwarder(
+        list_message_ids=[mock_message.id], retrieve_message=[mock_message], uploader=mock_uploader
+    )
+
+    forwarder.forward_messages()
+
+    mock_uploader.flush.assert_not_called()
+
+
+def test_leaves_in_flight_messages_unacknowledged_once_shutdown_deadline_has_passed():
+    probe = MagicMock()
+    shutdown_event = MagicMock()
+    probe.new_shutdown_event.return_value = shutdown_event
+    processed = Event()
+    probe.new_forward_message_event.return_value.finish.side_effect = processed.set
+    blocked_message = mock_mesh_message(message_id="blocked")
+    release_upload = Event()
+    mock_uploader = MagicMock()
+    forwarder = build_forwarder(
+        list_message_ids=[blocked_message.id],
+        retrieve_message=[blocked_message],
+        uploader=mock_uploader,
+        probe=probe,
+        workers=2,
+    )
+
+    def upload(message, event):
+        forwarder.request_shutdown(0)
+        release_upload.wait(5)
+
+    mock_uploader.upload.side_effect = upload
+
+    forwarder.forward_messages()
+    release_upload.set()
+    processed.wait(5)
+    forwarder.record_shutdown()
+
+    blocked_message.acknowledge.assert_not_called()
+    probe.new_forward_message_event().record_unacknowledged_at_shutdown.assert_called_once()
+    shutdown_event.record_unfinished_message_ids.assert_called_once_with(["blocked"])
+
+
+def test_stops_waiting_for_a_hung_acknowledgement_once_shutdown_deadline_has_passed():
+    probe = MagicMock()
+    shutdown_event = MagicMock()
+    probe.new_shutdown_event.return_value = shutdown_event
+    hung_message = mock_mesh_message(message_id="hung")
+    acknowledging = Event()
+    release_acknowledge = Event()
+    forwarder = build_forwarder(
+        list_message_ids=[hung_message.id],
+        retrieve_message=[hung_message],
+        probe=probe,
+        workers=2,
+    )
+
+    def acknowledge():
+        acknowledging.set()
+        release_acknowledge.wait(5)
+
+    hung_message.acknowledge.side_effect = acknowledge
+    Thread(target=forwarder.forward_messages, daemon=True).start()
+    acknowledging.wait(5)
+    forwarder.request_shutdown(0.1)
+
+    forwarder.record_shutdown()
+
+    assert not release_acknowledge.is_set()
+    release_acknowledge.set()
+    shutdown_event.record_unfinished_message_ids.assert_called_once_with(["hung"])
@@ -1,8 +1,23 @@
 import logging
 from unittest.mock import MagicMock, call, patch
 
+import pytest
+
+from awsmesh.aggregate import AggregationConfig
 from awsmesh.forwarder import RetryableException
-from awsmesh.forwarder_service import MeshToAwsForwarderService
+from awsmesh.forwarder_service import (
+    PIPELINE_FORWARDER_MODE,
+    ForwardingConfig,
+    MailboxConfig,
+    MeshToAwsForwarderService,
+    UnsupportedFifoTopicMode,
+    UnsupportedPartitionManifestMode,
+    build_forwarder_service,
+)
+from awsmesh.key_layout import KeyLayoutConfig
+from awsmesh.message_destination_resolver import MessageDestinationConfig
+from awsmesh.partition import MessagePartition
+from awsmesh.pipeline import PipelineConfig
 
 
 def test_calls_forward_messages_multiple_times_until_exit_event_is_set():
@@ -125,3 +140,144 @@ def test_keeps_iterating_after_retryable_exception_was_caught():
     forwarder_service.start()
 
     assert forwarder.forward_messages.call_count == 2
+
+
+def test_waits_for_idle_interval_of_poll_scheduler_when_mailbox_is_empty():
+    forwarder = MagicMock()
+    forwarder.is_mailbox_empty.return_value = True
+    exit_event = MagicMock()
+    exit_event.is_set.side_effect = [False, True]
+    poll_scheduler = MagicMock()
+    poll_scheduler.idle_interval.return_value = 4
+
+    forwarder_service = MeshToAwsForwarderService(
+        forwarder=forwarder,
+        poll_frequency_sec=60,
+        exit_event=exit_event,
+        poll_scheduler=poll_scheduler,
+    )
+    forwarder_service.start()
+
+    poll_scheduler.record_success.assert_called_once()
+    exit_event.wait.assert_called_once_with(4)
+
+
+def test_waits_for_retry_interval_of_poll_scheduler_on_retryable_exception():
+    forwarder = MagicMock()
+    forwarder.forward_messages.side_effect = RetryableException()
+    exit_event = MagicMock()
+    exit_event.is_set.side_effect = [False, True]
+    poll_scheduler = MagicMock()
+    poll_scheduler.retry_interval.return_value = 3
+
+    forwarder_service = MeshToAwsForwarderService(
+        forwarder=forwarder,
+        poll_frequency_sec=60,
+        exit_event=exit_event,
+        poll_scheduler=poll_scheduler,
+    )
+    forwarder_service.start()
+
+    poll_scheduler.record_success.assert_not_called()
+    exit_event.wait.assert_called_once_with(3)
+
+
+def test_requests_graceful_shutdown_of_forwarder_when_stopping_with_a_deadline():
+    forwarder = MagicMock()
+    exit_event = MagicMock()
+
+    forwarder_service = MeshToAwsForwarderService(
+        forwarder=forwarder, poll_frequency_sec=0, exit_event=exit_event, shutdown_deadline_sec=20
+    )
+    forwarder_service.stop()
+
+    forwarder.request_shutdown.assert_called_once_with(20)
+    exit_event.set.assert_called_once()
+
+
+def test_records_shutdown_summary_when_exiting_with_a_deadline():
+    forwarder = MagicMock()
+    exit_event = MagicMock()
+    exit_event.is_set.return_value = True
+
+    forwarder_service = MeshToAwsForwarderService(
+        forwarder=forwarder, poll_frequency_sec=0, exit_event=exit_event, shutdown_deadline_sec=20
+    )
+    forwarder_service.start()
+
+    forwarder.record_shutdown.assert_called_once()
+
+
+def test_does_not_shut_down_forwarder_gracefully_without_a_deadline():
+    forwarder = MagicMock()
+    exit_event = MagicMock()
+    exit_event.is_set.return_value = True
+
+    forwarder_service = MeshToAwsForwarderService(
+        forwarder=forwarder, poll_frequency_sec=0, exit_event=exit_event
+    )
+    forwarder_service.stop()
+    forwarder_service.start()
+
+    forwarder.request_shutdown.assert_not_called()
+    forwarder.record_shutdown.assert_not_called()
+
+
+def _an_sns_mailbox(sns_topic_arn="some_arn"):
+    return MailboxConfig(
+        mesh_config=MagicMock(),
+        message_destination_config=MessageDestinationConfig(
+            message_destination="sns",
+            s3_bucket_name=None,
+            endpoint_url=None,
+            sns_topic_arn=sns_topic_arn,
+        ),
+    )
+
+
+@pytest.mark.parametrize(
+    "forwarding_config",
+    [
+        ForwardingConfig(mode=PIPELINE_FORWARDER_MODE, pipeline=PipelineConfig(upload_workers=2)),
+        ForwardingConfig(mode=PIPELINE_FORWARDER_MODE, pipeline=PipelineConfig(retrieve_workers=2)),
+        ForwardingConfig(partition=MessagePartition(index=0, count=2)),
+    ],
+)
+def test_rejects_fifo_topic_when_messages_could_be_published_out_of_list_order(
+    forwarding_config,
+):
+    fifo_mailbox = _an_sns_mailbox(sns_topic_arn="arn:aws:sns:eu-west-2:123456789012:mesh.fifo")
+
+    with pytest.raises(UnsupportedFifoTopicMode):
+        build_forwarder_service([fifo_mailbox], 0, False, forwarding_config)
+
+
+@patch("awsmesh.forwarder_service.MeshToAwsForwarder")
+@patch("awsmesh.forwarder_service.SharedAwsClients")
+@patch("awsmesh.forwarder_service.mesh_client")
+def test_orders_fifo_topic_publishes_by_message_group_when_forwarding_concurrently(
+    _, __, mock_forwarder
+):
+    fifo_mailbox = _an_sns_mailbox(sns_topic_arn="arn:aws:sns:eu-west-2:123456789012:mesh.fifo")
+
+    build_forwarder_service([fifo_mailbox], 0, False, ForwardingConfig(workers=4))
+
+    assert mock_forwarder.call_args.kwargs["message_group"] is not None
+
+
+@patch("awsmesh.forwarder_service.SharedAwsClients")
+def test_rejects_partition_manifests_for_aggregated_messages(_):
+    mailbox = MailboxConfig(
+        mesh_config=MagicMock(),
+        message_destination_config=MessageDestinationConfig(
+            message_destination="s3",
+            s3_bucket_name="a-bucket",
+            endpoint_url=None,
+            sns_topic_arn=None,
+            s3_aggregation=AggregationConfig(),
+            s3_key_layout=KeyLayoutConfig(partition_manifests=True),
+        ),
+    )
+
+    with pytest.raises(UnsupportedPartitionManifestMode):
+        build_forwarder_service([mailbox], 0, False)
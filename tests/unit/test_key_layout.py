@@ -0,0 +1,244 @@
+import json
+import zlib
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import pytest
+from botocore.exceptions import EndpointConnectionError
+
+from awsmesh.key_layout import (
+    KeyLayout,
+    KeyLayoutConfig,
+    PartitionManifests,
+    UnknownKeyLayoutField,
+    partition_manifest_key,
+)
+from awsmesh.uploader import UploaderError
+from tests.builders.aws import build_client_error
+from tests.builders.mesh import mock_mesh_message
+
+
+def _a_message(**kwargs):
+    return mock_mesh_message(date_delivered=datetime(2020, 11, 2, 13, 45), **kwargs)
+
+
+def _written_manifest(mock_s3_client):
+    return json.loads(mock_s3_client.put_object.call_args.kwargs["Body"])
+
+
+def _a_bucket_client(existing_keys=()):
+    objects = dict.fromkeys(existing_keys, b"")
+
+    def head_object(Bucket, Key):
+        if Key not in objects:
+            raise build_client_error(code="404")
+        return {}
+
+    def put_object(Bucket, Key, Body, IfNoneMatch=None, **kwargs):
+        if IfNoneMatch == "*" and Key in objects:
+            raise build_client_error(code="PreconditionFailed")
+        objects[Key] = Body
+        return {}
+
+    mock_s3_client = MagicMock()
+    mock_s3_client.head_object.side_effect = head_object
+    mock_s3_client.put_object.side_effect = put_object
+    return mock_s3_client
+
+
+def test_default_layout_partitions_by_day():
+    assert KeyLayout().partition_for(_a_message()) == "2020/11/02"
+
+
+def test_partitions_by_hour():
+    layout = KeyLayout(KeyLayoutConfig(layout="{year}/{month}/{day}/{hour}"))
+
+    assert layout.partition_for(_a_message()) == "2020/11/02/13"
+
+
+def test_partitions_by_sanitized_sender():
+    layout = KeyLayout(KeyLayoutConfig(layout="{sender}/{year}/{month}/{day}"))
+
+    assert layout.partition_for(_a_message(sender="X26 OT/001")) == "X26_OT_001/2020/11/02"
+
+
+def test_shards_prefix_by_hash_of_message_id():
+    layout = KeyLayout(KeyLayoutConfig(layout="{shard}/{year}/{month}/{day}", shard_count=256))
+
+    partition = layout.partition_for(_a_message(message_id="a_message_id"))
+
+    assert partition == f"{zlib.crc32(b'a_message_id') % 256:02x}/2020/11/02"
+
+
+def test_spreads_messages_over_every_shard():
+    layout = KeyLayout(KeyLayoutConfig(layout="{shard}", shard_count=4))
+
+    shards = {layout.partition_for(_a_message(message_id=f"message_{i}")) for i in range(100)}
+
+    assert shards == {"0", "1", "2", "3"}
+
+
+def test_raises_for_unknown_layout_field():
+    with pytest.raises(UnknownKeyLayoutField):
+        KeyLayout(KeyLayoutConfig(layout="{year}/{mailbox}"))
+
+
+def test_writes_partition_manifest_segment_on_flush():
+    mock_s3_client = _a_bucket_client()
+    manifests = PartitionManifests(mock_s3_client, "test_bucket")
+
+    first = manifests.add("a/partition", "a/partition/first.dat")
+    second = manifests.add("a/partition", "a/partition/second.dat")
+    manifests.flush()
+
+    assert mock_s3_client.put_object.call_args.kwargs["Key"] == (
+        "a/partition/_manifests/00000000.json"
+    )
+    assert mock_s3_client.put_object.call_args.kwargs["IfNoneMatch"] == "*"
+    assert _written_manifest(mock_s3_client) == {
+        "partition": "a/partition",
+        "keys": ["a/partition/first.dat", "a/partition/second.dat"],
+    }
+    assert first.result() is None
+    assert second.result() is None
+
+
+def test_does_not_write_manifest_before_flush():
+    mock_s3_client = MagicMock()
+    manifests = PartitionManifests(mock_s3_client, "test_bucket")
+
+    upload = manifests.add("a/partition", "a/partition/first.dat")
+
+    mock_s3_client.put_object.assert_not_called()
+    assert not upload.done()
+
+
+def test_writes_next_numbered_manifest_segment_without_reading_previous_ones():
+    mock_s3_client = _a_bucket_client()
+    manifests = PartitionManifests(mock_s3_client, "test_bucket")
+
+    manifests.add("a/partition", "a/partition/first.dat")
+    manifests.flush()
+    manifests.add("a/partition", "a/partition/second.dat")
+    manifests.flush()
+
+    written = [call.kwargs for call in mock_s3_client.put_object.call_args_list]
+    assert [call["Key"] for call in written] == [
+        "a/partition/_manifests/00000000.json",
+        "a/partition/_manifests/00000001.json",
+    ]
+    assert json.loads(written[1]["Body"])["keys"] == ["a/partition/second.dat"]
+    mock_s3_client.get_object.assert_not_called()
+
+
+def test_continues_after_segments_written_before_a_restart():
+    mock_s3_client = _a_bucket_client(
+        [partition_manifest_key("a/partition", segment) for segment in range(11)]
+    )
+    manifests = PartitionManifests(mock_s3_client, "test_bucket")
+
+    manifests.add("a/partition", "a/partition/first.dat")
+    manifests.flush()
+
+    assert mock_s3_client.put_object.call_args.kwargs["Key"] == (
+        "a/partition/_manifests/00000011.json"
+    )
+    assert mock_s3_client.head_object.call_count < 11
+
+
+def test_claims_next_segment_when_another_forwarder_claimed_it_first():
+    mock_s3_client = _a_bucket_client()
+    manifests = PartitionManifests(mock_s3_client, "test_bucket")
+    manifests.add("a/partition", "a/partition/first.dat")
+    manifests.flush()
+    mock_s3_client.put_object(
+        Bucket="test_bucket", Key=partition_manifest_key("a/partition", 1), Body=b""
+    )
+
+    manifests.add("a/partition", "a/partition/second.dat")
+    manifests.flush()
+
+    assert mock_s3_client.put_object.call_args.kwargs["Key"] == (
+        "a/partition/_manifests/00000002.json"
+    )
+
+
+def test_retries_segment_claim_after_conditional_request_conflict():
+    mock_s3_client = _a_bucket_client()
+    mock_s3_client.put_object.side_effect = [
+        build_client_error(code="ConditionalRequestConflict"),
+        {},
+    ]
+    manifests = PartitionManifests(mock_s3_client, "test_bucket")
+
+    upload = manifests.add("a/partition", "a/partition/first.dat")
+    manifests.flush()
+
+    keys = [call.kwargs["Key"] for call in mock_s3_client.put_object.call_args_list]
+    assert keys == ["a/partition/_manifests/00000000.json"] * 2
+    assert upload.result() is None
+
+
+def test_lists_redelivered_key_once_per_segment():
+    mock_s3_client = _a_bucket_client()
+    manifests = PartitionManifests(mock_s3_client, "test_bucket")
+
+    manifests.add("a/partition", "a/partition/first.dat")
+    manifests.add("a/partition", "a/partition/first.dat")
+    manifests.flush()
+
+    assert _written_manifest(mock_s3_client)["keys"] == ["a/partition/first.dat"]
+
+
+def test_writes_one_manifest_segment_per_partition():
+    mock_s3_client = _a_bucket_client()
+    manifests = PartitionManifests(mock_s3_client, "test_bucket")
+
+    manifests.add("first/partition", "first/partition/a.dat")
+    manifests.add("second/partition", "second/partition/b.dat")
+    manifests.flush()
+
+    written_keys = [call.kwargs["Key"] for call in mock_s3_client.put_object.call_args_list]
+    assert len(written_keys) == 2
+    assert written_keys[0].startswith("first/partition/_manifests/")
+    assert written_keys[1].startswith("second/partition/_manifests/")
+
+
+def test_fails_uploads_when_manifest_cannot_be_written():
+    mock_s3_client = _a_bucket_client()
+    mock_s3_client.put_object.side_effect = build_client_error(code="AccessDenied")
+    manifests = PartitionManifests(mock_s3_client, "test_bucket")
+
+    upload = manifests.add("a/partition", "a/partition/first.dat")
+    manifests.flush()
+
+    with pytest.raises(UploaderError):
+        upload.result()
+
+
+def test_fails_uploads_when_s3_cannot_be_reached():
+    mock_s3_client = _a_bucket_client()
+    mock_s3_client.put_object.side_effect = EndpointConnectionError(endpoint_url="https://s3")
+    manifests = PartitionManifests(mock_s3_client, "test_bucket")
+
+    upload = manifests.add("a/partition", "a/partition/first.dat")
+    manifests.flush()
+
+    with pytest.raises(UploaderError):
+        upload.result()
+
+
+def test_settles_every_upload_when_manifest_write_fails_unexpectedly():
+    mock_s3_client = _a_bucket_client()
+    mock_s3_client.put_object.side_effect = RuntimeError("unexpected")
+    manifests = PartitionManifests(mock_s3_client, "test_bucket")
+
+    first = manifests.add("first/partition", "first/partition/a.dat")
+    second = manifests.add("second/partition", "second/partition/b.dat")
+    with pytest.raises(RuntimeError):
+        manifests.flush()
+
+    with pytest.raises(UploaderError):
+        first.result(timeout=0)
+    with pytest.raises(UploaderError):
+        second.result(timeout=0)
@@ -0,0 +1,96 @@
+from unittest.mock import MagicMock
+
+import boto3
+import pytest
+from botocore.exceptions import ClientError, EndpointConnectionError
+from moto import mock_dynamodb2
+
+from awsmesh.lease import DynamoDbMessageLease, LeaseCounts, MessageLeaseError
+
+TABLE_NAME = "mesh-message-leases"
+TTL_SEC = 60
+
+
+@pytest.fixture
+def dynamodb_client():
+    with mock_dynamodb2():
+        client = boto3.client(
+            "dynamodb",
+            region_name="eu-west-2",
+            aws_access_key_id="testing",
+            aws_secret_access_key="testing",
+        )
+        client.create_table(
+            TableName=TABLE_NAME,
+            KeySchema=[{"AttributeName": "MessageId", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "MessageId", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        yield client
+
+
+def _build_lease(dynamodb_client, owner_id, now):
+    return DynamoDbMessageLease(dynamodb_client, TABLE_NAME, owner_id, TTL_SEC, clock=lambda: now)
+
+
+def test_claims_an_unclaimed_message(dynamodb_client):
+    lease = _build_lease(dynamodb_client, "instance-a", now=1000)
+
+    assert lease.claim("message-1") is True
+
+    item = dynamodb_client.get_item(TableName=TABLE_NAME, Key={"MessageId": {"S": "message-1"}})
+    assert item["Item"]["LeaseOwner"] == {"S": "instance-a"}
+    assert item["Item"]["LeaseExpiresAt"] == {"N": str(1000 + TTL_SEC)}
+
+
+def test_does_not_claim_a_message_held_by_another_live_instance(dynamodb_client):
+    _build_lease(dynamodb_client, "instance-a", now=1000).claim("message-1")
+
+    assert _build_lease(dynamodb_client, "instance-b", now=1030).claim("message-1") is False
+
+
+def test_claims_a_message_whose_lease_expired(dynamodb_client):
+    _build_lease(dynamodb_client, "instance-a", now=1000).claim("message-1")
+
+    assert _build_lease(dynamodb_client, "instance-b", now=1000 + TTL_SEC + 1).claim("message-1")
+
+
+def test_renews_a_lease_it_already_holds(dynamodb_client):
+    _build_lease(dynamodb_client, "instance-a", now=1000).claim("message-1")
+
+    assert _build_lease(dynamodb_client, "instance-a", now=1030).claim("message-1") is True
+
+
+def test_raises_lease_error_when_dynamodb_fails():
+    dynamodb_client = MagicMock()
+    dynamodb_client.put_item.side_effect = ClientError(
+        {"Error": {"Code": "ProvisionedThroughputExceededException", "Message": "slow down"}},
+        "PutItem",
+    )
+    lease = DynamoDbMessageLease(dynamodb_client, TABLE_NAME, "instance-a", TTL_SEC)
+
+    with pytest.raises(MessageLeaseError):
+        lease.claim("message-1")
+
+
+def test_raises_lease_error_when_dynamodb_is_unreachable():
+    dynamodb_client = MagicMock()
+    dynamodb_client.put_item.side_effect = EndpointConnectionError(endpoint_url="dynamodb")
+    lease = DynamoDbMessageLease(dynamodb_client, TABLE_NAME, "instance-a", TTL_SEC)
+
+    with pytest.raises(MessageLeaseError):
+        lease.claim("message-1")
+
+
+def test_lease_counts_keep_first_error():
+    lease_counts = LeaseCounts()
+    first_error = MessageLeaseError("first")
+
+    lease_counts.record_claim(True)
+    lease_counts.record_claim(False)
+    lease_counts.record_claim(True)
+    lease_counts.record_error(first_error)
+    lease_counts.record_error(MessageLeaseError("second"))
+
+    assert (lease_counts.claimed, lease_counts.skipped) == (2, 1)
+    assert lease_counts.error is first_error
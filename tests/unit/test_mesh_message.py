@@ -1,3 +1,5 @@
+from io import BytesIO
+
 import pytest
 
 from awsmesh.mesh import (
@@ -16,6 +18,7 @@ from tests.builders.mesh import (
     TEST_INBOX_URL,
     a_filename,
     a_timestamp,
+    build_mesh_message,
     build_mex_headers,
     mesh_client_connection_error,
     mesh_client_http_error,
@@ -53,6 +56,92 @@ def test_calls_read_on_underlying_client_message():
     assert actual_value == expected_value
 
 
+def test_counts_bytes_read_from_underlying_client_message():
+    client_message = mock_client_message()
+    client_message.read.side_effect = [b"abc", b"de", b""]
+    message = MeshMessage(client_message)
+
+    while message.read(2):
+        pass
+
+    assert message.bytes_read == 5
+
+
+def test_reads_into_a_preallocated_buffer():
+    message = build_mesh_message(b"some content")
+    buffer = bytearray(4)
+
+    read = message.readinto(buffer)
+
+    assert read == 4
+    assert buffer == b"some"
+    assert message.bytes_read == 4
+
+
+def test_reads_directly_into_buffer_when_client_message_supports_it():
+    client_message = mock_client_message()
+    client_message.readinto = BytesIO(b"some content").readinto
+    message = MeshMessage(client_message)
+    buffer = bytearray(4)
+
+    read = message.readinto(buffer)
+
+    assert buffer == b"some"
+    assert message.bytes_read == read == 4
+    client_message.read.assert_not_called()
+
+
+def test_reads_whole_message_when_no_size_is_given():
+    message = build_mesh_message(b"some content")
+
+    assert message.read() == b"some content"
+
+
+def test_content_length_is_unknown_until_message_has_been_read():
+    message = build_mesh_message(b"some content")
+
+    assert message.content_length is None
+    message.read()
+    assert message.content_length == 12
+
+
+def test_chunk_count_is_read_from_chunk_range_header():
+    mex_headers = {**build_mex_headers(), "chunk-range": "1:3"}
+    message = MeshMessage(mock_client_message(mex_headers=mex_headers))
+
+    assert message.chunk_count == 3
+
+
+def test_chunk_count_defaults_to_one_for_unchunked_message():
+    message = build_mesh_message()
+
+    assert message.chunk_count == 1
+
+
+def test_exposes_whether_content_is_compressed():
+    message = build_mesh_message(mex_headers=build_mex_headers(content_compressed="Y"))
+
+    assert message.content_compressed
+
+
+def test_content_is_not_compressed_without_content_compressed_header():
+    mex_headers = build_mex_headers()
+    del mex_headers["content-compressed"]
+    message = build_mesh_message(mex_headers=mex_headers)
+
+    assert not message.content_compressed
+
+
+def test_closes_underlying_client_message():
+    client_message = mock_client_message()
+    message = MeshMessage(client_message)
+
+    message.close()
+
+    client_message.close.assert_called_once()
+    assert message.closed
+
+
 def test_exposes_filename():
     mocked_timestamp = a_timestamp()
     mocked_filename = a_filename(mocked_timestamp)
@@ -1,14 +1,21 @@
-from unittest.mock import MagicMock
+from unittest.mock import ANY, MagicMock, call, patch
 
 import pytest
+from boto3.s3.transfer import TransferConfig
 
+from awsmesh.aggregate import AggregationConfig
+from awsmesh.claim_check import ClaimCheckConfig
+from awsmesh.compression import UnsupportedCompression
+from awsmesh.key_layout import KeyLayoutConfig
 from awsmesh.message_destination_resolver import (
     MessageDestinationConfig,
+    SharedAwsClients,
     UnknownMessageDestination,
+    build_transfer_config,
     resolve_message_uploader,
 )
 from awsmesh.s3 import S3Uploader
-from awsmesh.sns import SNSUploader
+from awsmesh.sns import SnsBatchConfig, SNSUploader
 
 
 def test_returns_s3_uploader_when_message_destination_is_s3():
@@ -50,3 +57,172 @@ def test_throws_exception_if_unknown_message_destination():
     )
     with pytest.raises(UnknownMessageDestination):
         resolve_message_uploader(config)
+
+
+def test_shared_aws_clients_reuses_client_for_same_service_and_endpoint():
+    aws = MagicMock()
+    shared_clients = SharedAwsClients(aws)
+    first_config = MessageDestinationConfig(
+        message_destination="s3",
+        s3_bucket_name="first_bucket",
+        endpoint_url="endpoint_url",
+        sns_topic_arn=None,
+    )
+    second_config = MessageDestinationConfig(
+        message_destination="s3",
+        s3_bucket_name="second_bucket",
+        endpoint_url="endpoint_url",
+        sns_topic_arn=None,
+    )
+
+    resolve_message_uploader(first_config, shared_clients)
+    resolve_message_uploader(second_config, shared_clients)
+
+    aws.client.assert_called_once_with(service_name="s3", endpoint_url="endpoint_url")
+
+
+def test_shared_aws_clients_creates_separate_client_per_service():
+    aws = MagicMock()
+    shared_clients = SharedAwsClients(aws)
+
+    shared_clients.client("s3", "endpoint_url")
+    shared_clients.client("sns", "endpoint_url")
+
+    aws.client.assert_has_calls(
+        [
+            call(service_name="s3", endpoint_url="endpoint_url"),
+            call(service_name="sns", endpoint_url="endpoint_url"),
+        ]
+    )
+
+
+def test_builds_transfer_config_from_message_destination_config():
+    config = MessageDestinationConfig(
+        message_destination="s3",
+        s3_bucket_name="s3_bucket_name",
+        endpoint_url=None,
+        sns_topic_arn=None,
+        s3_multipart_threshold_bytes=16 * 1024 * 1024,
+        s3_multipart_chunksize_bytes=32 * 1024 * 1024,
+        s3_max_concurrency=4,
+    )
+
+    transfer_config = build_transfer_config(config)
+
+    assert transfer_config.multipart_threshold == 16 * 1024 * 1024
+    assert transfer_config.multipart_chunksize == 32 * 1024 * 1024
+    assert transfer_config.max_concurrency == 4
+
+
+def test_builds_default_transfer_config_when_not_configured():
+    config = MessageDestinationConfig(
+        message_destination="s3",
+        s3_bucket_name="s3_bucket_name",
+        endpoint_url=None,
+        sns_topic_arn=None,
+    )
+
+    transfer_config = build_transfer_config(config)
+
+    assert transfer_config.multipart_threshold == TransferConfig().multipart_threshold
+    assert transfer_config.max_concurrency == TransferConfig().max_concurrency
+
+
+def test_raises_for_unsupported_s3_compression():
+    config = MessageDestinationConfig(
+        message_destination="s3",
+        s3_bucket_name="s3_bucket_name",
+        endpoint_url=None,
+        sns_topic_arn=None,
+        s3_compression="bzip2",
+    )
+
+    with pytest.raises(UnsupportedCompression):
+        resolve_message_uploader(config, MagicMock())
+
+
+@patch("awsmesh.message_destination_resolver.S3Aggregator")
+def test_builds_aggregator_when_s3_aggregation_is_configured(mock_s3_aggregator):
+    aggregation_config = AggregationConfig(max_messages=10)
+    config = MessageDestinationConfig(
+        message_destination="s3",
+        s3_bucket_name="s3_bucket_name",
+        endpoint_url=None,
+        sns_topic_arn=None,
+        s3_aggregation=aggregation_config,
+    )
+    aws = MagicMock()
+
+    resolve_message_uploader(config, aws)
+
+    mock_s3_aggregator.assert_called_once_with(
+        aws.client.return_value, "s3_bucket_name", aggregation_config
+    )
+
+
+@patch("awsmesh.message_destination_resolver.PartitionManifests")
+def test_builds_partition_manifests_when_enabled(mock_partition_manifests):
+    config = MessageDestinationConfig(
+        message_destination="s3",
+        s3_bucket_name="s3_bucket_name",
+        endpoint_url=None,
+        sns_topic_arn=None,
+        s3_key_layout=KeyLayoutConfig(partition_manifests=True),
+    )
+    aws = MagicMock()
+
+    resolve_message_uploader(config, aws)
+
+    mock_partition_manifests.assert_called_once_with(aws.client.return_value, "s3_bucket_name")
+
+
+@patch("awsmesh.message_destination_resolver.SNSUploader")
+def test_passes_sns_batch_config_to_sns_uploader(mock_sns_uploader):
+    batch_config = SnsBatchConfig(linger_sec=2)
+    config = MessageDestinationConfig(
+        message_destination="sns",
+        s3_bucket_name=None,
+        endpoint_url=None,
+        sns_topic_arn="some_arn",
+        sns_batch=batch_config,
+    )
+    aws = MagicMock()
+
+    resolve_message_uploader(config, aws)
+
+    assert mock_sns_uploader.call_args.kwargs["batch_config"] == batch_config
+
+
+@patch("awsmesh.message_destination_resolver.SNSUploader")
+def test_passes_sns_compression_to_sns_uploader(mock_sns_uploader):
+    config = MessageDestinationConfig(
+        message_destination="sns",
+        s3_bucket_name=None,
+        endpoint_url=None,
+        sns_topic_arn="some_arn",
+        sns_compression="gzip",
+    )
+    aws = MagicMock()
+
+    resolve_message_uploader(config, aws)
+
+    assert mock_sns_uploader.call_args.kwargs["compression"] == "gzip"
+
+
+@patch("awsmesh.message_destination_resolver.ClaimCheckStore")
+def test_builds_claim_check_store_for_sns_uploader_when_configured(mock_claim_check_store):
+    claim_check_config = ClaimCheckConfig(bucket_name="claim_bucket")
+    config = MessageDestinationConfig(
+        message_destination="sns",
+        s3_bucket_name=None,
+        endpoint_url="endpoint_url",
+        sns_topic_arn="some_arn",
+        sns_claim_check=claim_check_config,
+    )
+    mock_claim_check_store.return_value.threshold_bytes = 1024
+    aws = MagicMock()
+
+    resolve_message_uploader(config, aws)
+
+    aws.client.assert_any_call(service_name="s3", endpoint_url="endpoint_url")
+    mock_claim_check_store.assert_called_once_with(aws.client.return_value, claim_check_config, ANY)
@@ -7,6 +7,9 @@ from awsmesh.monitoring.error import (
     MISSING_MESH_HEADER_ERROR,
     SNS_EMPTY_MESSAGE_ERROR,
     SNS_INVALID_PARAMETER_ERROR,
+    SNS_INVALID_UTF8_ERROR,
+    SNS_MESSAGE_TOO_LARGE_ERROR,
+    UNACKNOWLEDGED_AT_SHUTDOWN_ERROR,
     UPLOADER_ERROR,
 )
 from awsmesh.monitoring.event.forward import FORWARD_MESSAGE_EVENT, ForwardMessageEvent
@@ -55,6 +58,118 @@ def test_record_s3_key():
     mock_output.log_event.assert_called_with(FORWARD_MESSAGE_EVENT, {"s3Key": key}, "info")
 
 
+def test_record_s3_upload_strategy():
+    mock_output = MagicMock()
+
+    forward_message_event = ForwardMessageEvent(mock_output)
+    forward_message_event.record_s3_upload_strategy("multipart", 7)
+    forward_message_event.finish()
+
+    mock_output.log_event.assert_called_with(
+        FORWARD_MESSAGE_EVENT, {"s3UploadStrategy": "multipart", "s3UploadPartCount": 7}, "info"
+    )
+
+
+def test_record_s3_metadata_headers_dropped():
+    mock_output = MagicMock()
+
+    forward_message_event = ForwardMessageEvent(mock_output)
+    forward_message_event.record_s3_metadata_headers_dropped(["subject"])
+    forward_message_event.finish()
+
+    mock_output.log_event.assert_called_with(
+        FORWARD_MESSAGE_EVENT, {"s3MetadataDroppedHeaders": ["subject"]}, "info"
+    )
+
+
+def test_record_payload_checksums():
+    mock_output = MagicMock()
+
+    forward_message_event = ForwardMessageEvent(mock_output)
+    forward_message_event.record_payload_checksums("an-md5", "a-sha256")
+    forward_message_event.finish()
+
+    mock_output.log_event.assert_called_with(
+        FORWARD_MESSAGE_EVENT, {"payloadMd5": "an-md5", "payloadSha256": "a-sha256"}, "info"
+    )
+
+
+def test_record_s3_checksum():
+    mock_output = MagicMock()
+
+    forward_message_event = ForwardMessageEvent(mock_output)
+    forward_message_event.record_s3_checksum("AAAAAA==")
+    forward_message_event.finish()
+
+    mock_output.log_event.assert_called_with(
+        FORWARD_MESSAGE_EVENT, {"s3ChecksumCrc32": "AAAAAA=="}, "info"
+    )
+
+
+def test_record_s3_checksum_unavailable():
+    mock_output = MagicMock()
+
+    forward_message_event = ForwardMessageEvent(mock_output)
+    forward_message_event.record_s3_checksum_unavailable()
+    forward_message_event.finish()
+
+    mock_output.log_event.assert_called_with(
+        FORWARD_MESSAGE_EVENT, {"s3ChecksumUnavailable": True}, "warning"
+    )
+
+
+def test_record_spool_usage():
+    mock_output = MagicMock()
+
+    forward_message_event = ForwardMessageEvent(mock_output)
+    forward_message_event.record_spool_usage(1024, 2048)
+    forward_message_event.finish()
+
+    mock_output.log_event.assert_called_with(
+        FORWARD_MESSAGE_EVENT, {"spoolMemoryBytes": 1024, "spoolDiskBytes": 2048}, "info"
+    )
+
+
+def test_record_s3_aggregate():
+    mock_output = MagicMock()
+
+    forward_message_event = ForwardMessageEvent(mock_output)
+    forward_message_event.record_s3_aggregate("aggregates/2020/11/02/an-id.ndjson", 512)
+    forward_message_event.finish()
+
+    mock_output.log_event.assert_called_with(
+        FORWARD_MESSAGE_EVENT,
+        {"s3AggregateKey": "aggregates/2020/11/02/an-id.ndjson", "s3AggregateOffset": 512},
+        "info",
+    )
+
+
+def test_record_s3_object_already_exists():
+    mock_output = MagicMock()
+
+    forward_message_event = ForwardMessageEvent(mock_output)
+    forward_message_event.record_s3_object_already_exists()
+    forward_message_event.finish()
+
+    mock_output.log_event.assert_called_with(
+        FORWARD_MESSAGE_EVENT, {"s3ObjectAlreadyExists": True}, "info"
+    )
+
+
+def test_record_s3_compression():
+    mock_output = MagicMock()
+
+    forward_message_event = ForwardMessageEvent(mock_output)
+    forward_message_event.record_s3_compression("gzip", 1000, 100)
+    forward_message_event.finish()
+
+    mock_output.log_event.assert_called_with(
+        FORWARD_MESSAGE_EVENT,
+        {"s3Compression": "gzip", "rawByteCount": 1000, "compressedByteCount": 100},
+        "info",
+    )
+
+
 def test_record_sns_message_id():
     mock_output = MagicMock()
     message_id = a_string()
@@ -99,6 +214,34 @@ def test_record_sns_empty_message_error():
     )
 
 
+def test_record_sns_message_too_large_error():
+    mock_output = MagicMock()
+
+    forward_message_event = ForwardMessageEvent(mock_output)
+    forward_message_event.record_sns_message_too_large_error(262144)
+    forward_message_event.finish()
+
+    mock_output.log_event.assert_called_with(
+        FORWARD_MESSAGE_EVENT,
+        {"error": SNS_MESSAGE_TOO_LARGE_ERROR, "snsMessageLimitBytes": 262144},
+        "error",
+    )
+
+
+def test_record_sns_invalid_utf8_error():
+    mock_output = MagicMock()
+
+    forward_message_event = ForwardMessageEvent(mock_output)
+    forward_message_event.record_sns_invalid_utf8_error(42)
+    forward_message_event.finish()
+
+    mock_output.log_event.assert_called_with(
+        FORWARD_MESSAGE_EVENT,
+        {"error": SNS_INVALID_UTF8_ERROR, "invalidUtf8Offset": 42},
+        "error",
+    )
+
+
 def test_record_missing_mesh_header():
     mock_output = MagicMock()
     missing_header_exception = MissingMeshHeader(header_name=a_string())
@@ -167,3 +310,27 @@ def test_record_uploader_error():
     mock_output.log_event.assert_called_with(
         FORWARD_MESSAGE_EVENT, {"error": UPLOADER_ERROR, "errorMessage": error_message}, "info"
     )
+
+
+def test_record_unacknowledged_at_shutdown():
+    mock_output = MagicMock()
+
+    forward_message_event = ForwardMessageEvent(mock_output)
+    forward_message_event.record_unacknowledged_at_shutdown()
+    forward_message_event.finish()
+
+    mock_output.log_event.assert_called_with(
+        FORWARD_MESSAGE_EVENT,
+        {"error": UNACKNOWLEDGED_AT_SHUTDOWN_ERROR, "willBeRedelivered": True},
+        "warning",
+    )
+
+
+def test_record_retry_count():
+    mock_output = MagicMock()
+
+    forward_message_event = ForwardMessageEvent(mock_output)
+    forward_message_event.record_retry_count(3)
+    forward_message_event.finish()
+
+    mock_output.log_event.assert_called_with(FORWARD_MESSAGE_EVENT, {"retryCount": 3}, "info")
@@ -0,0 +1,31 @@
+from unittest.mock import MagicMock
+
+from awsmesh.lease import MessageLeaseError
+from awsmesh.monitoring.error import MESSAGE_LEASE_ERROR
+from awsmesh.monitoring.event.lease import MESSAGE_LEASE_EVENT, MessageLeaseEvent
+
+
+def test_record_lease_counts():
+    mock_output = MagicMock()
+
+    message_lease_event = MessageLeaseEvent(mock_output)
+    message_lease_event.record_lease_counts(3, 2)
+    message_lease_event.finish()
+
+    mock_output.log_event.assert_called_with(
+        MESSAGE_LEASE_EVENT, {"claimedMessageCount": 3, "skippedMessageCount": 2}, "info"
+    )
+
+
+def test_record_message_lease_error():
+    mock_output = MagicMock()
+
+    message_lease_event = MessageLeaseEvent(mock_output)
+    message_lease_event.record_message_lease_error(MessageLeaseError("table not found"))
+    message_lease_event.finish()
+
+    mock_output.log_event.assert_called_with(
+        MESSAGE_LEASE_EVENT,
+        {"error": MESSAGE_LEASE_ERROR, "errorMessage": "table not found"},
+        "info",
+    )
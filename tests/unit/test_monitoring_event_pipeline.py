@@ -0,0 +1,28 @@
+from unittest.mock import MagicMock
+
+from awsmesh.monitoring.event.pipeline import PIPELINE_STATUS_EVENT, PipelineStatusEvent
+
+
+def test_finish_calls_log_event_with_event_name():
+    mock_output = MagicMock()
+
+    pipeline_status_event = PipelineStatusEvent(mock_output)
+    pipeline_status_event.finish()
+
+    mock_output.log_event.assert_called_with(PIPELINE_STATUS_EVENT, {}, "info")
+
+
+def test_record_stage_status():
+    mock_output = MagicMock()
+
+    pipeline_status_event = PipelineStatusEvent(mock_output)
+    pipeline_status_event.record_stage_status(
+        "upload", workers=4, peak_busy_workers=3, peak_queue_depth=7
+    )
+    pipeline_status_event.finish()
+
+    mock_output.log_event.assert_called_with(
+        PIPELINE_STATUS_EVENT,
+        {"uploadWorkers": 4, "uploadPeakBusyWorkers": 3, "uploadPeakQueueDepth": 7},
+        "info",
+    )
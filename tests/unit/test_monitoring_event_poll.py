@@ -38,3 +38,23 @@ def test_record_mesh_client_network_error():
         {"error": MESH_CLIENT_NETWORK_ERROR, "errorMessage": error_message},
         "info",
     )
+
+
+def test_record_poll_interval():
+    mock_output = MagicMock()
+
+    poll_inbox_event = PollInboxEvent(mock_output)
+    poll_inbox_event.record_poll_interval(2.5)
+    poll_inbox_event.finish()
+
+    mock_output.log_event.assert_called_with(POLL_INBOX_EVENT, {"pollIntervalSec": 2.5}, "info")
+
+
+def test_record_owned_message_count():
+    mock_output = MagicMock()
+
+    poll_inbox_event = PollInboxEvent(mock_output)
+    poll_inbox_event.record_owned_message_count(3)
+    poll_inbox_event.finish()
+
+    mock_output.log_event.assert_called_with(POLL_INBOX_EVENT, {"ownedMessageCount": 3}, "info")
@@ -0,0 +1,46 @@
+from unittest.mock import MagicMock
+
+from awsmesh.monitoring.event.shutdown import SHUTDOWN_EVENT, ShutdownEvent
+
+
+def test_finish_calls_log_event_with_event_name():
+    mock_output = MagicMock()
+
+    shutdown_event = ShutdownEvent(mock_output)
+    shutdown_event.finish()
+
+    mock_output.log_event.assert_called_with(SHUTDOWN_EVENT, {}, "info")
+
+
+def test_record_completed_message_ids():
+    mock_output = MagicMock()
+
+    shutdown_event = ShutdownEvent(mock_output)
+    shutdown_event.record_completed_message_ids(["a", "b"])
+    shutdown_event.record_unfinished_message_ids([])
+    shutdown_event.finish()
+
+    mock_output.log_event.assert_called_with(
+        SHUTDOWN_EVENT,
+        {
+            "completedMessageIds": ["a", "b"],
+            "completedMessageCount": 2,
+            "unfinishedMessageIds": [],
+            "unfinishedMessageCount": 0,
+        },
+        "info",
+    )
+
+
+def test_record_unfinished_message_ids_logs_a_warning():
+    mock_output = MagicMock()
+
+    shutdown_event = ShutdownEvent(mock_output)
+    shutdown_event.record_unfinished_message_ids(["c"])
+    shutdown_event.finish()
+
+    mock_output.log_event.assert_called_with(
+        SHUTDOWN_EVENT,
+        {"unfinishedMessageIds": ["c"], "unfinishedMessageCount": 1},
+        "warning",
+    )
@@ -0,0 +1,42 @@
+from unittest.mock import MagicMock
+
+from awsmesh.monitoring.event.supervisor import (
+    SUPERVISOR_METRICS_EVENT,
+    WORKER_EXIT_EVENT,
+    SupervisorMetricsEvent,
+    WorkerExitEvent,
+)
+
+
+def test_record_supervisor_metrics():
+    mock_output = MagicMock()
+
+    supervisor_metrics_event = SupervisorMetricsEvent(mock_output)
+    supervisor_metrics_event.record_workers(4, 1)
+    supervisor_metrics_event.record_event_counts({"POLL_MESSAGE": 8})
+    supervisor_metrics_event.record_error_counts({"MESH_CLIENT_NETWORK_ERROR": 2})
+    supervisor_metrics_event.finish()
+
+    mock_output.log_event.assert_called_with(
+        SUPERVISOR_METRICS_EVENT,
+        {
+            "workerCount": 4,
+            "workerRestarts": 1,
+            "eventCounts": {"POLL_MESSAGE": 8},
+            "errorCounts": {"MESH_CLIENT_NETWORK_ERROR": 2},
+        },
+        "info",
+    )
+
+
+def test_worker_exit_is_logged_as_error():
+    mock_output = MagicMock()
+
+    worker_exit_event = WorkerExitEvent(mock_output)
+    worker_exit_event.record_worker(2, -9)
+    worker_exit_event.record_restart_delay(1.5)
+    worker_exit_event.finish()
+
+    mock_output.log_event.assert_called_with(
+        WORKER_EXIT_EVENT, {"partition": 2, "exitCode": -9, "restartDelaySeconds": 1.5}, "error"
+    )
@@ -23,3 +23,29 @@ def test_log_event_logs_event_name_in_extra_fields():
     logging_output.log_event(event_name, {}, "info")
 
     mock_logger.info.assert_called_with(f"Observed {event_name}", extra={"event": event_name})
+
+
+def test_log_event_includes_tags_in_extra_fields():
+    mock_logger = MagicMock()
+    logging_output = LoggingOutput(mock_logger, tags={"mailbox": "A-MAILBOX"})
+    event_name = "AN_EVENT"
+
+    logging_output.log_event(event_name, {"field": "field_value"}, "info")
+
+    mock_logger.info.assert_called_with(
+        f"Observed {event_name}",
+        extra={"mailbox": "A-MAILBOX", "field": "field_value", "event": event_name},
+    )
+
+
+def test_log_event_notifies_listener_with_logged_fields():
+    listener = MagicMock()
+    logging_output = LoggingOutput(MagicMock(), tags={"mailbox": "A-MAILBOX"}, listener=listener)
+
+    logging_output.log_event("AN_EVENT", {"field": "field_value"}, "warning")
+
+    listener.assert_called_once_with(
+        "AN_EVENT",
+        {"mailbox": "A-MAILBOX", "field": "field_value", "event": "AN_EVENT"},
+        "warning",
+    )
@@ -1,5 +1,5 @@
 import logging
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, call, patch
 
 from awsmesh.monitoring.probe import LoggingProbe
 
@@ -76,3 +76,36 @@ def test_binds_poll_message_event_to_logger():
     mock_logger.info.assert_called_once_with(
         "Observed POLL_MESSAGE", extra={"event": "POLL_MESSAGE"}
     )
+
+
+def test_binds_pipeline_status_event_to_logger():
+    mock_logger = MagicMock()
+
+    probe = LoggingProbe(mock_logger)
+
+    pipeline_status_event = probe.new_pipeline_status_event()
+
+    pipeline_status_event.finish()
+
+    mock_logger.info.assert_called_once_with(
+        "Observed PIPELINE_STATUS", extra={"event": "PIPELINE_STATUS"}
+    )
+
+
+def test_tags_every_event_with_probe_tags():
+    mock_logger = MagicMock()
+
+    probe = LoggingProbe(mock_logger, tags={"mailbox": "A-MAILBOX"})
+
+    probe.new_poll_inbox_event().finish()
+    probe.new_forward_message_event().finish()
+
+    mock_logger.info.assert_has_calls(
+        [
+            call("Observed POLL_MESSAGE", extra={"mailbox": "A-MAILBOX", "event": "POLL_MESSAGE"}),
+            call(
+                "Observed FORWARD_MESH_MESSAGE",
+                extra={"mailbox": "A-MAILBOX", "event": "FORWARD_MESH_MESSAGE"},
+            ),
+        ]
+    )
@@ -0,0 +1,83 @@
+from unittest.mock import MagicMock, call
+
+import pytest
+
+from awsmesh.forwarder import RetryableException
+from awsmesh.multi_mailbox import MultiMailboxForwarder
+
+
+def _build_mailbox_forwarder(name, calls, last_batch_count=0):
+    forwarder = MagicMock()
+    forwarder.forward_messages.side_effect = lambda: calls.append(name)
+    forwarder.last_batch_count = last_batch_count
+    return forwarder
+
+
+def test_forwards_messages_from_every_mailbox():
+    calls = []
+    forwarders = [_build_mailbox_forwarder(name, calls) for name in ["a", "b", "c"]]
+    multi_mailbox_forwarder = MultiMailboxForwarder(forwarders)
+
+    multi_mailbox_forwarder.forward_messages()
+
+    assert calls == ["a", "b", "c"]
+
+
+def test_rotates_the_first_mailbox_to_forward_on_every_cycle():
+    calls = []
+    forwarders = [_build_mailbox_forwarder(name, calls) for name in ["a", "b", "c"]]
+    multi_mailbox_forwarder = MultiMailboxForwarder(forwarders)
+
+    for _ in range(4):
+        multi_mailbox_forwarder.forward_messages()
+
+    assert calls == ["a", "b", "c", "b", "c", "a", "c", "a", "b", "a", "b", "c"]
+
+
+def test_keeps_forwarding_other_mailboxes_when_one_raises_retryable_exception():
+    calls = []
+    failing_forwarder = MagicMock()
+    failing_forwarder.forward_messages.side_effect = RetryableException()
+    other_forwarder = _build_mailbox_forwarder("other", calls)
+    multi_mailbox_forwarder = MultiMailboxForwarder([failing_forwarder, other_forwarder])
+
+    with pytest.raises(RetryableException):
+        multi_mailbox_forwarder.forward_messages()
+
+    assert calls == ["other"]
+
+
+def test_records_total_batch_count_of_all_mailboxes_with_poll_scheduler():
+    calls = []
+    poll_scheduler = MagicMock()
+    forwarders = [
+        _build_mailbox_forwarder("a", calls, last_batch_count=3),
+        _build_mailbox_forwarder("b", calls, last_batch_count=None),
+        _build_mailbox_forwarder("c", calls, last_batch_count=2),
+    ]
+    multi_mailbox_forwarder = MultiMailboxForwarder(forwarders, poll_scheduler=poll_scheduler)
+
+    multi_mailbox_forwarder.forward_messages()
+
+    poll_scheduler.record_poll.assert_called_once_with(5)
+
+
+def test_mailbox_is_empty_only_when_every_mailbox_is_empty():
+    empty_forwarder = MagicMock()
+    empty_forwarder.is_mailbox_empty.return_value = True
+    non_empty_forwarder = MagicMock()
+    non_empty_forwarder.is_mailbox_empty.return_value = False
+
+    assert MultiMailboxForwarder([empty_forwarder, empty_forwarder]).is_mailbox_empty()
+    assert not MultiMailboxForwarder([empty_forwarder, non_empty_forwarder]).is_mailbox_empty()
+
+
+def test_requests_and_records_shutdown_of_every_mailbox():
+    forwarders = [MagicMock(), MagicMock()]
+    multi_mailbox_forwarder = MultiMailboxForwarder(forwarders)
+
+    multi_mailbox_forwarder.request_shutdown(10)
+    multi_mailbox_forwarder.record_shutdown()
+
+    for forwarder in forwarders:
+        assert forwarder.method_calls == [call.request_shutdown(10), call.record_shutdown()]
@@ -0,0 +1,84 @@
+from threading import Thread
+from unittest.mock import MagicMock
+
+from awsmesh.ordering import MessageGroupSequencer, MessageTurn
+from tests.builders.mesh import mock_mesh_message
+
+
+def _a_sequencer():
+    return MessageGroupSequencer(lambda message: message.sender)
+
+
+def _start_waiting(turn, message, turns_taken):
+    def take_turn():
+        turn.wait(message)
+        turns_taken.append(turn.position)
+
+    thread = Thread(target=take_turn)
+    thread.start()
+    return thread
+
+
+def test_takes_turn_immediately_when_no_earlier_message_is_outstanding():
+    sequencer = _a_sequencer()
+    turns_taken = []
+
+    _start_waiting(MessageTurn(sequencer, 0), mock_mesh_message(sender="A"), turns_taken).join(1)
+
+    assert turns_taken == [0]
+
+
+def test_waits_for_earlier_message_of_the_same_group_to_finish():
+    sequencer = _a_sequencer()
+    turns_taken = []
+    sequencer.wait_for_turn(0, mock_mesh_message(sender="A"))
+
+    waiting = _start_waiting(MessageTurn(sequencer, 1), mock_mesh_message(sender="A"), turns_taken)
+    waiting.join(0.1)
+    assert turns_taken == []
+
+    sequencer.finish(0)
+    waiting.join(1)
+    assert turns_taken == [1]
+
+
+def test_waits_until_earlier_messages_have_declared_their_group():
+    sequencer = _a_sequencer()
+    turns_taken = []
+
+    waiting = _start_waiting(MessageTurn(sequencer, 1), mock_mesh_message(sender="A"), turns_taken)
+    waiting.join(0.1)
+    assert turns_taken == []
+
+    sequencer.wait_for_turn(0, mock_mesh_message(sender="B"))
+    waiting.join(1)
+    assert turns_taken == [1]
+
+
+def test_does_not_wait_for_earlier_message_that_finished_without_a_turn():
+    sequencer = _a_sequencer()
+    turns_taken = []
+    sequencer.finish(0)
+
+    _start_waiting(MessageTurn(sequencer, 1), mock_mesh_message(sender="A"), turns_taken).join(1)
+
+    assert turns_taken == [1]
+
+
+def test_derives_group_from_message():
+    message_group = MagicMock(return_value="A")
+    sequencer = MessageGroupSequencer(message_group)
+    message = mock_mesh_message()
+
+    sequencer.wait_for_turn(0, message)
+
+    message_group.assert_called_once_with(message)
+
+
+def test_holds_back_rest_of_group_once_an_earlier_message_of_it_failed():
+    sequencer = _a_sequencer()
+    sequencer.wait_for_turn(0, mock_mesh_message(sender="A"))
+    sequencer.fail(0)
+
+    assert sequencer.wait_for_turn(1, mock_mesh_message(sender="A")) is False
+    assert sequencer.wait_for_turn(2, mock_mesh_message(sender="B")) is True
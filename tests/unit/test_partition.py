@@ -0,0 +1,27 @@
+from awsmesh.partition import MessagePartition, owned_message_ids
+
+MESSAGE_IDS = [f"20220101000000_{i:06d}" for i in range(100)]
+
+
+def test_every_message_is_owned_by_exactly_one_partition():
+    partitions = [MessagePartition(index, 4) for index in range(4)]
+
+    for message_id in MESSAGE_IDS:
+        assert sum(partition.owns(message_id) for partition in partitions) == 1
+
+
+def test_ownership_is_deterministic():
+    assert [MessagePartition(1, 3).owns(m_id) for m_id in MESSAGE_IDS] == [
+        MessagePartition(1, 3).owns(m_id) for m_id in MESSAGE_IDS
+    ]
+
+
+def test_messages_are_spread_over_partitions():
+    partitions = [MessagePartition(index, 4) for index in range(4)]
+
+    for partition in partitions:
+        assert len(owned_message_ids(partition, MESSAGE_IDS)) > 0
+
+
+def test_owns_every_message_without_a_partition():
+    assert owned_message_ids(None, MESSAGE_IDS) == MESSAGE_IDS
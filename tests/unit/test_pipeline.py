@@ -0,0 +1,303 @@
+import logging
+from concurrent.futures import Future
+from threading import Event
+from unittest import mock
+from unittest.mock import MagicMock, call, patch
+
+import pytest
+
+from awsmesh.backoff import RetryPolicy
+from awsmesh.forwarder import RetryableException
+from awsmesh.lease import MessageLeaseError
+from awsmesh.mesh import MissingMeshHeader
+from awsmesh.pipeline import PipelineConfig, PipelinedMeshToAwsForwarder, PipelineStage
+from awsmesh.uploader import UploaderError
+from tests.builders.mesh import mesh_client_network_error, mock_mesh_message
+
+
+def _build_pipelined_forwarder(messages, **kwargs):
+    mock_mesh_inbox = MagicMock()
+    messages_by_id = {message.id: message for message in messages}
+    mock_mesh_inbox.list_message_ids.return_value = list(messages_by_id.keys())
+    mock_mesh_inbox.retrieve_message.side_effect = kwargs.get(
+        "retrieve_message", lambda message_id: messages_by_id[message_id]
+    )
+    mock_uploader = kwargs.get("uploader", MagicMock())
+
+    return PipelinedMeshToAwsForwarder(
+        mock_mesh_inbox,
+        mock_uploader,
+        kwargs.get("probe", MagicMock()),
+        False,
+        kwargs.get("pipeline_config", PipelineConfig(2, 2, 2, 2)),
+        retry_policy=kwargs.get("retry_policy", None),
+        lease=kwargs.get("lease", None),
+    )
+
+
+def test_forwards_and_acknowledges_all_messages():
+    mock_messages = [mock_mesh_message() for _ in range(6)]
+    mock_uploader = MagicMock()
+
+    forwarder = _build_pipelined_forwarder(mock_messages, uploader=mock_uploader)
+
+    forwarder.forward_messages()
+
+    mock_uploader.upload.assert_has_calls(
+        [call(message, mock.ANY) for message in mock_messages], any_order=True
+    )
+    for mock_message in mock_messages:
+        mock_message.validate.assert_called_once()
+        mock_message.acknowledge.assert_called_once()
+
+
+def test_finishes_one_forward_message_event_per_message():
+    mock_messages = [mock_mesh_message() for _ in range(3)]
+    probe = MagicMock()
+
+    forwarder = _build_pipelined_forwarder(mock_messages, probe=probe)
+
+    forwarder.forward_messages()
+
+    assert probe.new_forward_message_event.call_count == 3
+    assert probe.new_forward_message_event().finish.call_count == 3
+
+
+def test_retrieves_next_message_while_previous_message_is_uploading():
+    first_message = mock_mesh_message()
+    second_message = mock_mesh_message()
+    second_message_retrieved = Event()
+    mock_uploader = MagicMock()
+
+    def retrieve_message(message_id):
+        if message_id == second_message.id:
+            second_message_retrieved.set()
+            return second_message
+        return first_message
+
+    def upload(message, forward_message_event):
+        if message is first_message:
+            assert second_message_retrieved.wait(5)
+
+    mock_uploader.upload.side_effect = upload
+    forwarder = _build_pipelined_forwarder(
+        [first_message, second_message],
+        retrieve_message=retrieve_message,
+        uploader=mock_uploader,
+        pipeline_config=PipelineConfig(1, 1, 1, 1),
+    )
+
+    forwarder.forward_messages()
+
+    first_message.acknowledge.assert_called_once()
+    second_message.acknowledge.assert_called_once()
+
+
+def test_does_not_acknowledge_message_when_upload_fails():
+    message = mock_mesh_message()
+    probe = MagicMock()
+    forward_message_event = MagicMock()
+    probe.new_forward_message_event.return_value = forward_message_event
+    mock_uploader = MagicMock()
+    exception = UploaderError("error_message")
+    mock_uploader.upload.side_effect = exception
+
+    forwarder = _build_pipelined_forwarder([message], uploader=mock_uploader, probe=probe)
+
+    forwarder.forward_messages()
+
+    message.acknowledge.assert_not_called()
+    forward_message_event.assert_has_calls(
+        [
+            call.record_message_metadata(message),
+            call.record_uploader_error(exception),
+            call.finish(),
+        ],
+        any_order=False,
+    )
+
+
+def test_does_not_upload_message_with_missing_header():
+    header_error = MissingMeshHeader(header_name="fruit_header")
+    message = mock_mesh_message(validation_error=header_error)
+    mock_uploader = MagicMock()
+
+    forwarder = _build_pipelined_forwarder([message], uploader=mock_uploader)
+
+    forwarder.forward_messages()
+
+    mock_uploader.upload.assert_not_called()
+
+
+def test_raises_single_retryable_exception_for_network_errors():
+    message = mock_mesh_message(acknowledge_error=mesh_client_network_error())
+    other_message = mock_mesh_message(acknowledge_error=mesh_client_network_error())
+    logger = logging.getLogger("awsmesh.pipeline")
+
+    forwarder = _build_pipelined_forwarder([message, other_message])
+
+    with patch.object(logger, "info") as mock_info:
+        with pytest.raises(RetryableException):
+            forwarder.forward_messages()
+
+    mock_info.assert_called_once_with(
+        "Raising single retryable exception, actually caught 2 message exception(s)"
+    )
+
+
+def test_raises_unexpected_exception_after_the_batch_has_finished():
+    non_network_exception = Exception("some funky unexpected occurrence on retrieving message")
+    good_message = mock_mesh_message()
+
+    def retrieve_message(message_id):
+        if message_id == good_message.id:
+            return good_message
+        raise non_network_exception
+
+    forwarder = _build_pipelined_forwarder(
+        [mock_mesh_message(), good_message], retrieve_message=retrieve_message
+    )
+
+    with pytest.raises(Exception) as raised_e_info:
+        forwarder.forward_messages()
+
+    assert raised_e_info.value == non_network_exception
+    good_message.acknowledge.assert_called_once()
+
+
+def test_records_pipeline_status_for_each_stage():
+    probe = MagicMock()
+    pipeline_status_event = MagicMock()
+    probe.new_pipeline_status_event.return_value = pipeline_status_event
+
+    forwarder = _build_pipelined_forwarder(
+        [mock_mesh_message()], probe=probe, pipeline_config=PipelineConfig(3, 2, 1, 5)
+    )
+
+    forwarder.forward_messages()
+
+    pipeline_status_event.assert_has_calls(
+        [
+            call.record_stage_status("retrieve", 3, 1, 1),
+            call.record_stage_status("upload", 2, 1, 1),
+            call.record_stage_status("acknowledge", 1, 1, 1),
+            call.finish(),
+        ],
+        any_order=False,
+    )
+
+
+def test_does_not_record_pipeline_status_when_there_are_no_messages():
+    probe = MagicMock()
+
+    forwarder = _build_pipelined_forwarder([], probe=probe)
+
+    forwarder.forward_messages()
+
+    probe.new_pipeline_status_event.assert_not_called()
+
+
+def test_stage_tracks_peak_queue_depth():
+    stage = PipelineStage("test", workers=1, queue_size=3, handler=MagicMock())
+
+    stage.put("one")
+    stage.put("two")
+    stage.start()
+    stage.finish()
+
+    assert stage.peak_queue_depth == 2
+
+
+def test_retries_acknowledgement_in_acknowledge_stage():
+    message = mock_mesh_message(acknowledge_error=[mesh_client_network_error(), None])
+    probe = MagicMock()
+    forward_message_event = MagicMock()
+    probe.new_forward_message_event.return_value = forward_message_event
+
+    forwarder = _build_pipelined_forwarder(
+        [message], probe=probe, retry_policy=RetryPolicy(max_attempts=2, initial_delay_sec=0)
+    )
+
+    forwarder.forward_messages()
+
+    assert message.acknowledge.call_count == 2
+    forward_message_event.record_retry_count.assert_called_once_with(1)
+
+
+def test_only_retrieves_messages_claimed_through_the_lease():
+    messages = [mock_mesh_message() for _ in range(4)]
+    claimed_ids = {messages[0].id, messages[2].id}
+    lease = MagicMock()
+    lease.claim.side_effect = lambda message_id: message_id in claimed_ids
+    probe = MagicMock()
+    forwarder = _build_pipelined_forwarder(messages, lease=lease, probe=probe)
+
+    forwarder.forward_messages()
+
+    for message in messages:
+        assert message.acknowledge.called == (message.id in claimed_ids)
+    probe.new_message_lease_event.return_value.record_lease_counts.assert_called_once_with(2, 2)
+
+
+def test_raises_retryable_exception_when_lease_fails():
+    messages = [mock_mesh_message()]
+    lease = MagicMock()
+    lease.claim.side_effect = MessageLeaseError("throttled")
+    forwarder = _build_pipelined_forwarder(messages, lease=lease)
+
+    with pytest.raises(RetryableException):
+        forwarder.forward_messages()
+
+    messages[0].acknowledge.assert_not_called()
+
+
+def test_acknowledges_deferred_uploads_after_flushing_uploader():
+    mock_messages = [mock_mesh_message() for _ in range(3)]
+    uploads = []
+    mock_uploader = MagicMock()
+    mock_uploader.upload.side_effect = (
+        lambda message, event: uploads.append(Future()) or uploads[-1]
+    )
+    mock_uploader.flush.side_effect = lambda: [future.set_result(None) for future in uploads]
+
+    forwarder = _build_pipelined_forwarder(mock_messages, uploader=mock_uploader)
+
+    forwarder.forward_messages()
+
+    mock_uploader.flush.assert_called_once()
+    for mock_message in mock_messages:
+        mock_message.acknowledge.assert_called_once()
+
+
+def test_stops_waiting_for_pipeline_stages_once_shutdown_deadline_has_passed():
+    blocked_message = mock_mesh_message()
+    release_upload = Event()
+    mock_uploader = MagicMock()
+    forwarder = _build_pipelined_forwarder([blocked_message], uploader=mock_uploader)
+
+    def upload(message, event):
+        forwarder.request_shutdown(0)
+        release_upload.wait(5)
+
+    mock_uploader.upload.side_effect = upload
+
+    forwarder.forward_messages()
+
+    assert not release_upload.is_set()
+    release_upload.set()
+    blocked_message.acknowledge.assert_not_called()
+
+
+def test_records_message_as_unacknowledged_when_shutdown_deadline_passes_during_upload():
+    message = mock_mesh_message()
+    probe = MagicMock()
+    mock_uploader = MagicMock()
+    forwarder = _build_pipelined_forwarder([message], uploader=mock_uploader, probe=probe)
+    mock_uploader.upload.side_effect = lambda message, event: forwarder.request_shutdown(0)
+
+    forwarder.forward_messages()
+
+    message.acknowledge.assert_not_called()
+    forward_message_event = probe.new_forward_message_event()
+    forward_message_event.record_unacknowledged_at_shutdown.assert_called_once()
+    forward_message_event.finish.assert_called_once()
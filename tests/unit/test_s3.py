@@ -1,75 +1,970 @@
-from datetime import datetime
-from unittest.mock import MagicMock
+import gzip
+import hashlib
+import os
+import zlib
+from base64 import b64encode
+from concurrent.futures import Future
+from unittest.mock import MagicMock, patch
 
+import boto3
 import pytest
+from boto3.s3.transfer import TransferConfig
+from botocore.stub import Stubber
 
-from awsmesh.s3 import S3Uploader
+from awsmesh.key_layout import KeyLayout, KeyLayoutConfig
+from awsmesh.s3 import (
+    AGGREGATE_UPLOAD,
+    MESSAGE_ID_KEY_STRATEGY,
+    MULTIPART_UPLOAD,
+    PUT_OBJECT_UPLOAD,
+    SINGLE_PART_UPLOAD,
+    RecentKeys,
+    S3Uploader,
+    UnknownS3KeyStrategy,
+)
+from awsmesh.spool import MessageSpool, SpoolConfig
 from awsmesh.uploader import UploaderError
 from tests.builders.aws import build_client_error
+from tests.builders.mesh import build_mesh_message, build_mex_headers
+
+KB = 1024
+MB = 1024 * KB
+
+
+def _a_mesh_message(
+    content=b"some content",
+    file_name="a_file_A1BH13.dat",
+    content_compressed="N",
+    message_id="20201102000000_ABCDEF",
+    **headers,
+):
+    return build_mesh_message(
+        content,
+        message_id=message_id,
+        mex_headers={
+            **build_mex_headers(
+                file_name=file_name,
+                status_timestamp="20201102000000",
+                content_compressed=content_compressed,
+                message_id=message_id,
+                workflow_id="A_WORKFLOW",
+                **{"from": "X26OT001", "to": "X26OT002"},
+            ),
+            **headers,
+        },
+    )
+
+
+HEADER_METADATA = {
+    "mesh-from": "X26OT001",
+    "mesh-to": "X26OT002",
+    "mesh-workflowid": "A_WORKFLOW",
+    "mesh-messageid": "20201102000000_ABCDEF",
+}
+
+
+def _a_s3_client():
+    s3_client = MagicMock()
+    s3_client.put_object.return_value = {}
+    s3_client.head_object.return_value = {}
+    return s3_client
+
+
+def _crc32(content):
+    return b64encode(zlib.crc32(content).to_bytes(4, byteorder="big")).decode("ascii")
+
+
+def _payload_metadata(content):
+    return {
+        "payload-md5": hashlib.md5(content).hexdigest(),
+        "payload-sha256": hashlib.sha256(content).hexdigest(),
+    }
+
+
+def _read_all(fileobj, chunk_size=1000):
+    chunks = []
+    while chunk := fileobj.read(chunk_size):
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def _build_transfer_manager(uploaded):
+    transfer_manager = MagicMock()
+
+    def upload(fileobj, bucket, key, extra_args=None):
+        uploaded[(bucket, key)] = _read_all(fileobj)
+        return MagicMock()
+
+    transfer_manager.upload.side_effect = upload
+    return transfer_manager
 
 
 def test_upload():
-    mock_s3_client = MagicMock()
+    mock_s3_client = _a_s3_client()
     bucket_name = "test_bucket"
-    mesh_message = MagicMock()
     file_name = "a_file_A1BH13.dat"
-    mesh_message.file_name = file_name
-    mesh_message.date_delivered = datetime(year=2020, month=11, day=2)
+    mesh_message = _a_mesh_message(content=b"small", file_name=file_name)
 
-    uploader = S3Uploader(mock_s3_client, bucket_name)
+    uploader = S3Uploader(mock_s3_client, bucket_name, transfer_manager=MagicMock())
     uploader.upload(mesh_message, MagicMock())
 
-    mock_s3_client.upload_fileobj.assert_called_once_with(
-        mesh_message, bucket_name, f"2020/11/02/{file_name}"
+    mock_s3_client.put_object.assert_called_once_with(
+        Bucket=bucket_name,
+        Key=f"2020/11/02/{file_name}",
+        Body=b"small",
+        ChecksumCRC32=_crc32(b"small"),
+        Metadata={**HEADER_METADATA, **_payload_metadata(b"small")},
     )
 
 
 def test_upload_records_key():
-    mock_s3_client = MagicMock()
-    bucket_name = "test_bucket"
-    mesh_message = MagicMock()
     file_name = "a_file_A1BH13.dat"
-    mesh_message.file_name = file_name
-    mesh_message.date_delivered = datetime(year=2020, month=11, day=2)
     forward_message_event = MagicMock()
 
-    uploader = S3Uploader(mock_s3_client, bucket_name)
+    uploader = S3Uploader(_a_s3_client(), "test_bucket", transfer_manager=MagicMock())
 
-    uploader.upload(mesh_message, forward_message_event)
+    uploader.upload(_a_mesh_message(file_name=file_name), forward_message_event)
     expected_key = f"2020/11/02/{file_name}"
 
     forward_message_event.record_s3_key.assert_called_once_with(expected_key)
 
 
 def test_replaces_spaces_with_underscore():
-    mock_s3_client = MagicMock()
-    bucket_name = "test_bucket"
-    mesh_message = MagicMock()
-    file_name = "a file A1BH13.dat"
-    mesh_message.file_name = file_name
-    mesh_message.date_delivered = datetime(year=2020, month=11, day=2)
+    mock_s3_client = _a_s3_client()
+    mesh_message = _a_mesh_message(file_name="a file A1BH13.dat")
 
     expected_key = "2020/11/02/a_file_A1BH13.dat"
 
-    uploader = S3Uploader(mock_s3_client, bucket_name)
+    uploader = S3Uploader(mock_s3_client, "test_bucket", transfer_manager=MagicMock())
     uploader.upload(mesh_message, MagicMock())
 
-    mock_s3_client.upload_fileobj.assert_called_once_with(mesh_message, bucket_name, expected_key)
+    assert mock_s3_client.put_object.call_args.kwargs["Key"] == expected_key
 
 
 def test_upload_error_raised_when_upload_raises_exception():
-    mock_s3_client = MagicMock()
-    bucket_name = "test_bucket"
-    mesh_message = MagicMock()
-    file_name = "a file A1BH13.dat"
-    mesh_message.file_name = file_name
-    mesh_message.date_delivered = datetime(year=2020, month=11, day=2)
-
-    uploader = S3Uploader(mock_s3_client, bucket_name)
+    mock_s3_client = _a_s3_client()
     error_message = "test_error"
-    mock_s3_client.upload_fileobj.side_effect = build_client_error(message=error_message)
+    mock_s3_client.put_object.side_effect = build_client_error(message=error_message)
+
+    uploader = S3Uploader(mock_s3_client, "test_bucket", transfer_manager=MagicMock())
 
     with pytest.raises(UploaderError) as e:
-        uploader.upload(mesh_message, MagicMock())
+        uploader.upload(_a_mesh_message(), MagicMock())
 
     assert error_message in str(e.value)
+
+
+def test_records_put_object_strategy_for_small_message():
+    forward_message_event = MagicMock()
+
+    uploader = S3Uploader(_a_s3_client(), "test_bucket", transfer_manager=MagicMock())
+    uploader.upload(_a_mesh_message(), forward_message_event)
+
+    forward_message_event.record_s3_upload_strategy.assert_called_once_with(PUT_OBJECT_UPLOAD, 1)
+
+
+def test_uploads_message_over_small_object_threshold_through_transfer_manager():
+    mock_s3_client = _a_s3_client()
+    uploaded = {}
+    content = bytes(range(256)) * 20
+
+    uploader = S3Uploader(
+        mock_s3_client,
+        "test_bucket",
+        small_object_threshold_bytes=1024,
+        transfer_manager=_build_transfer_manager(uploaded),
+    )
+    uploader.upload(_a_mesh_message(content=content), MagicMock())
+
+    mock_s3_client.put_object.assert_not_called()
+    assert uploaded == {("test_bucket", "2020/11/02/a_file_A1BH13.dat"): content}
+
+
+def test_uploads_message_of_exactly_small_object_threshold_with_put_object():
+    mock_s3_client = _a_s3_client()
+    transfer_manager = MagicMock()
+
+    uploader = S3Uploader(
+        mock_s3_client,
+        "test_bucket",
+        small_object_threshold_bytes=1024,
+        transfer_manager=transfer_manager,
+    )
+    uploader.upload(_a_mesh_message(content=b"x" * 1024), MagicMock())
+
+    assert mock_s3_client.put_object.call_args.kwargs["Body"] == b"x" * 1024
+    transfer_manager.upload.assert_not_called()
+
+
+def test_reuses_one_transfer_manager_across_messages():
+    uploaded = {}
+    transfer_manager = _build_transfer_manager(uploaded)
+
+    uploader = S3Uploader(
+        _a_s3_client(),
+        "test_bucket",
+        small_object_threshold_bytes=0,
+        transfer_manager=transfer_manager,
+    )
+    uploader.upload(_a_mesh_message(file_name="first.dat"), MagicMock())
+    uploader.upload(_a_mesh_message(file_name="second.dat"), MagicMock())
+
+    assert transfer_manager.upload.call_count == 2
+    assert set(uploaded.keys()) == {
+        ("test_bucket", "2020/11/02/first.dat"),
+        ("test_bucket", "2020/11/02/second.dat"),
+    }
+
+
+def test_fills_transfer_manager_reads_past_the_buffered_head():
+    read_sizes = []
+    transfer_manager = MagicMock()
+
+    def upload(fileobj, bucket, key, extra_args=None):
+        while chunk := fileobj.read(4 * KB):
+            read_sizes.append(len(chunk))
+        return MagicMock()
+
+    transfer_manager.upload.side_effect = upload
+    uploader = S3Uploader(
+        _a_s3_client(),
+        "test_bucket",
+        small_object_threshold_bytes=KB,
+        transfer_manager=transfer_manager,
+    )
+    uploader.upload(_a_mesh_message(content=b"x" * (10 * KB)), MagicMock())
+
+    assert read_sizes == [4 * KB, 4 * KB, 2 * KB]
+
+
+def test_upload_error_raised_when_transfer_manager_upload_fails():
+    transfer_manager = MagicMock()
+    transfer_manager.upload.return_value.result.side_effect = build_client_error(message="failed")
+
+    uploader = S3Uploader(
+        _a_s3_client(),
+        "test_bucket",
+        small_object_threshold_bytes=0,
+        transfer_manager=transfer_manager,
+    )
+
+    with pytest.raises(UploaderError):
+        uploader.upload(_a_mesh_message(), MagicMock())
+
+
+def test_records_single_part_strategy_for_message_under_multipart_threshold():
+    forward_message_event = MagicMock()
+    transfer_config = TransferConfig(multipart_threshold=8 * KB, multipart_chunksize=8 * KB)
+
+    uploader = S3Uploader(
+        _a_s3_client(),
+        "test_bucket",
+        transfer_config,
+        small_object_threshold_bytes=KB,
+        transfer_manager=_build_transfer_manager({}),
+    )
+    uploader.upload(_a_mesh_message(content=b"x" * (8 * KB - 1)), forward_message_event)
+
+    forward_message_event.record_s3_upload_strategy.assert_called_once_with(SINGLE_PART_UPLOAD, 1)
+
+
+def test_records_multipart_strategy_and_part_count_for_message_over_multipart_threshold():
+    forward_message_event = MagicMock()
+    transfer_config = TransferConfig(multipart_threshold=8 * MB, multipart_chunksize=8 * MB)
+
+    uploader = S3Uploader(
+        _a_s3_client(),
+        "test_bucket",
+        transfer_config,
+        small_object_threshold_bytes=KB,
+        transfer_manager=_build_transfer_manager({}),
+    )
+    uploader.upload(_a_mesh_message(content=b"x" * (20 * MB)), forward_message_event)
+
+    forward_message_event.record_s3_upload_strategy.assert_called_once_with(MULTIPART_UPLOAD, 3)
+
+
+def test_records_part_count_of_chunksize_adjusted_to_s3_minimum_part_size():
+    forward_message_event = MagicMock()
+    transfer_config = TransferConfig(multipart_threshold=2 * MB, multipart_chunksize=MB)
+
+    uploader = S3Uploader(
+        _a_s3_client(),
+        "test_bucket",
+        transfer_config,
+        small_object_threshold_bytes=KB,
+        transfer_manager=_build_transfer_manager({}),
+    )
+    uploader.upload(_a_mesh_message(content=b"x" * (12 * MB)), forward_message_event)
+
+    forward_message_event.record_s3_upload_strategy.assert_called_once_with(MULTIPART_UPLOAD, 3)
+
+
+@patch("awsmesh.s3.create_transfer_manager")
+def test_creates_transfer_manager_with_transfer_config(mock_create_transfer_manager):
+    mock_s3_client = _a_s3_client()
+    transfer_config = TransferConfig(max_concurrency=3)
+
+    S3Uploader(mock_s3_client, "test_bucket", transfer_config)
+
+    mock_create_transfer_manager.assert_called_once_with(mock_s3_client, transfer_config)
+
+
+def test_compresses_message_and_sets_content_encoding_and_key_suffix():
+    mock_s3_client = _a_s3_client()
+    content = b"a,b,c\n" * 1000
+
+    uploader = S3Uploader(
+        mock_s3_client, "test_bucket", transfer_manager=MagicMock(), compression="gzip"
+    )
+    uploader.upload(_a_mesh_message(content=content), MagicMock())
+
+    put_object_kwargs = mock_s3_client.put_object.call_args.kwargs
+    assert put_object_kwargs["Key"] == "2020/11/02/a_file_A1BH13.dat.gz"
+    assert put_object_kwargs["ContentEncoding"] == "gzip"
+    assert gzip.decompress(put_object_kwargs["Body"]) == content
+
+
+def test_records_raw_and_compressed_byte_counts():
+    mock_s3_client = _a_s3_client()
+    forward_message_event = MagicMock()
+    content = b"a,b,c\n" * 1000
+
+    uploader = S3Uploader(
+        mock_s3_client, "test_bucket", transfer_manager=MagicMock(), compression="gzip"
+    )
+    uploader.upload(_a_mesh_message(content=content), forward_message_event)
+
+    compressed_size = len(mock_s3_client.put_object.call_args.kwargs["Body"])
+    forward_message_event.record_s3_compression.assert_called_once_with(
+        "gzip", len(content), compressed_size
+    )
+
+
+def test_does_not_compress_message_that_is_already_compressed():
+    mock_s3_client = _a_s3_client()
+    forward_message_event = MagicMock()
+
+    uploader = S3Uploader(
+        mock_s3_client, "test_bucket", transfer_manager=MagicMock(), compression="gzip"
+    )
+    uploader.upload(
+        _a_mesh_message(content=b"compressed", content_compressed="Y"), forward_message_event
+    )
+
+    mock_s3_client.put_object.assert_called_once_with(
+        Bucket="test_bucket",
+        Key="2020/11/02/a_file_A1BH13.dat",
+        Body=b"compressed",
+        ChecksumCRC32=_crc32(b"compressed"),
+        Metadata={**HEADER_METADATA, **_payload_metadata(b"compressed")},
+    )
+    forward_message_event.record_s3_compression.assert_not_called()
+
+
+def test_streams_compressed_message_over_small_object_threshold_through_transfer_manager():
+    content = os.urandom(8 * KB)
+    transfer_manager = _build_transfer_manager({})
+
+    uploader = S3Uploader(
+        _a_s3_client(),
+        "test_bucket",
+        small_object_threshold_bytes=KB,
+        transfer_manager=transfer_manager,
+        compression="gzip",
+    )
+    uploader.upload(_a_mesh_message(content=content), MagicMock())
+
+    transfer_manager.upload.assert_called_once()
+    assert transfer_manager.upload.call_args.kwargs["extra_args"] == {
+        "Metadata": HEADER_METADATA,
+        "ContentEncoding": "gzip",
+        "ChecksumAlgorithm": "CRC32",
+    }
+
+
+def test_message_id_key_strategy_includes_message_id_in_key():
+    mock_s3_client = _a_s3_client()
+    mock_s3_client.head_object.side_effect = build_client_error(code="404")
+
+    uploader = S3Uploader(
+        mock_s3_client,
+        "test_bucket",
+        transfer_manager=MagicMock(),
+        key_strategy=MESSAGE_ID_KEY_STRATEGY,
+    )
+    uploader.upload(_a_mesh_message(message_id="20201102000000_ABCDEF"), MagicMock())
+
+    put_object_kwargs = mock_s3_client.put_object.call_args.kwargs
+    assert put_object_kwargs["Key"] == "2020/11/02/20201102000000_ABCDEF/a_file_A1BH13.dat"
+    assert put_object_kwargs["IfNoneMatch"] == "*"
+
+
+def test_records_existing_object_when_conditional_put_fails():
+    mock_s3_client = _a_s3_client()
+    mock_s3_client.put_object.side_effect = build_client_error(code="PreconditionFailed")
+    mock_s3_client.head_object.side_effect = [
+        build_client_error(code="404"),
+        {"ChecksumCRC32": _crc32(b"some content")},
+    ]
+    forward_message_event = MagicMock()
+
+    uploader = S3Uploader(
+        mock_s3_client,
+        "test_bucket",
+        transfer_manager=MagicMock(),
+        key_strategy=MESSAGE_ID_KEY_STRATEGY,
+    )
+    uploader.upload(_a_mesh_message(), forward_message_event)
+
+    forward_message_event.record_s3_object_already_exists.assert_called_once()
+    forward_message_event.record_s3_upload_strategy.assert_not_called()
+    mock_s3_client.delete_object.assert_not_called()
+
+
+def test_deletes_existing_object_and_fails_when_it_does_not_match_message():
+    mock_s3_client = _a_s3_client()
+    mock_s3_client.put_object.side_effect = build_client_error(code="PreconditionFailed")
+    mock_s3_client.head_object.side_effect = [
+        build_client_error(code="404"),
+        {"ChecksumCRC32": _crc32(b"corrupt")},
+    ]
+    forward_message_event = MagicMock()
+
+    uploader = S3Uploader(
+        mock_s3_client,
+        "test_bucket",
+        transfer_manager=MagicMock(),
+        key_strategy=MESSAGE_ID_KEY_STRATEGY,
+    )
+
+    with pytest.raises(UploaderError):
+        uploader.upload(_a_mesh_message(), forward_message_event)
+
+    mock_s3_client.delete_object.assert_called_once_with(
+        Bucket="test_bucket", Key="2020/11/02/20201102000000_ABCDEF/a_file_A1BH13.dat"
+    )
+    forward_message_event.record_s3_object_already_exists.assert_not_called()
+
+
+def test_skips_redelivered_message_without_reading_its_body():
+    mock_s3_client = _a_s3_client()
+    mock_s3_client.head_object.side_effect = build_client_error(code="404")
+    redelivered_message = _a_mesh_message(message_id="20201102000000_ABCDEF")
+    forward_message_event = MagicMock()
+
+    uploader = S3Uploader(
+        mock_s3_client,
+        "test_bucket",
+        transfer_manager=MagicMock(),
+        key_strategy=MESSAGE_ID_KEY_STRATEGY,
+    )
+    uploader.upload(_a_mesh_message(message_id="20201102000000_ABCDEF"), MagicMock())
+    uploader.upload(redelivered_message, forward_message_event)
+
+    mock_s3_client.put_object.assert_called_once()
+    mock_s3_client.head_object.assert_called_once()
+    assert redelivered_message.bytes_read == 0
+    forward_message_event.record_s3_object_already_exists.assert_called_once()
+
+
+def test_does_not_skip_messages_with_the_same_file_name_under_file_name_key_strategy():
+    mock_s3_client = _a_s3_client()
+
+    uploader = S3Uploader(mock_s3_client, "test_bucket", transfer_manager=MagicMock())
+    uploader.upload(_a_mesh_message(message_id="first"), MagicMock())
+    uploader.upload(_a_mesh_message(message_id="second"), MagicMock())
+
+    assert mock_s3_client.put_object.call_count == 2
+    assert "IfNoneMatch" not in mock_s3_client.put_object.call_args.kwargs
+
+
+def test_does_not_download_large_message_when_object_already_exists():
+    transfer_manager = MagicMock()
+    forward_message_event = MagicMock()
+    message = _a_mesh_message()
+
+    uploader = S3Uploader(
+        _a_s3_client(),
+        "test_bucket",
+        small_object_threshold_bytes=0,
+        transfer_manager=transfer_manager,
+        key_strategy=MESSAGE_ID_KEY_STRATEGY,
+    )
+    uploader.upload(message, forward_message_event)
+
+    transfer_manager.upload.assert_not_called()
+    assert message.bytes_read == 0
+    forward_message_event.record_s3_object_already_exists.assert_called_once()
+
+
+def test_does_not_download_small_message_when_object_already_exists():
+    mock_s3_client = _a_s3_client()
+    forward_message_event = MagicMock()
+    message = _a_mesh_message()
+
+    uploader = S3Uploader(
+        mock_s3_client,
+        "test_bucket",
+        transfer_manager=MagicMock(),
+        key_strategy=MESSAGE_ID_KEY_STRATEGY,
+    )
+    uploader.upload(message, forward_message_event)
+
+    mock_s3_client.head_object.assert_called_once_with(
+        Bucket="test_bucket", Key="2020/11/02/20201102000000_ABCDEF/a_file_A1BH13.dat"
+    )
+    mock_s3_client.put_object.assert_not_called()
+    assert message.bytes_read == 0
+    forward_message_event.record_s3_object_already_exists.assert_called_once()
+
+
+def test_does_not_check_for_existing_object_under_file_name_key_strategy():
+    mock_s3_client = _a_s3_client()
+
+    uploader = S3Uploader(mock_s3_client, "test_bucket", transfer_manager=MagicMock())
+    uploader.upload(_a_mesh_message(), MagicMock())
+
+    mock_s3_client.head_object.assert_not_called()
+    mock_s3_client.put_object.assert_called_once()
+
+
+def test_transfers_large_message_when_object_does_not_exist():
+    mock_s3_client = _a_s3_client()
+    mock_s3_client.head_object.side_effect = [build_client_error(code="404"), {}]
+    transfer_manager = _build_transfer_manager({})
+
+    uploader = S3Uploader(
+        mock_s3_client,
+        "test_bucket",
+        small_object_threshold_bytes=0,
+        transfer_manager=transfer_manager,
+        key_strategy=MESSAGE_ID_KEY_STRATEGY,
+    )
+    uploader.upload(_a_mesh_message(), MagicMock())
+
+    transfer_manager.upload.assert_called_once()
+
+
+def test_raises_for_unknown_key_strategy():
+    with pytest.raises(UnknownS3KeyStrategy):
+        S3Uploader(_a_s3_client(), "test_bucket", transfer_manager=MagicMock(), key_strategy="bad")
+
+
+def test_recent_keys_evicts_least_recently_used_key():
+    recent_keys = RecentKeys(2)
+
+    recent_keys.add("first")
+    recent_keys.add("second")
+    assert "first" in recent_keys
+    recent_keys.add("third")
+
+    assert "first" in recent_keys
+    assert "second" not in recent_keys
+    assert "third" in recent_keys
+
+
+def test_hands_small_messages_to_aggregator():
+    mock_s3_client = _a_s3_client()
+    aggregator = MagicMock()
+    aggregator.add.return_value = Future()
+    forward_message_event = MagicMock()
+    mesh_message = _a_mesh_message(content=b"small")
+
+    uploader = S3Uploader(
+        mock_s3_client, "test_bucket", transfer_manager=MagicMock(), aggregator=aggregator
+    )
+    upload = uploader.upload(mesh_message, forward_message_event)
+
+    assert upload is aggregator.add.return_value
+    message, key, content_encoding, body, checksums, event = aggregator.add.call_args.args
+    assert (message, key, content_encoding, event) == (
+        mesh_message,
+        "2020/11/02/a_file_A1BH13.dat",
+        None,
+        forward_message_event,
+    )
+    assert body.read() == b"small"
+    assert checksums.sha256 == hashlib.sha256(b"small").hexdigest()
+    mock_s3_client.put_object.assert_not_called()
+    forward_message_event.record_s3_upload_strategy.assert_called_once_with(AGGREGATE_UPLOAD, 1)
+
+
+def test_does_not_aggregate_messages_over_small_object_threshold():
+    aggregator = MagicMock()
+    transfer_manager = _build_transfer_manager({})
+
+    uploader = S3Uploader(
+        _a_s3_client(),
+        "test_bucket",
+        small_object_threshold_bytes=KB,
+        transfer_manager=transfer_manager,
+        aggregator=aggregator,
+    )
+    upload = uploader.upload(_a_mesh_message(content=b"x" * (2 * KB)), MagicMock())
+
+    assert upload is None
+    aggregator.add.assert_not_called()
+    transfer_manager.upload.assert_called_once()
+
+
+def test_flush_writes_buffered_aggregate():
+    aggregator = MagicMock()
+
+    uploader = S3Uploader(
+        _a_s3_client(), "test_bucket", transfer_manager=MagicMock(), aggregator=aggregator
+    )
+    uploader.flush()
+
+    aggregator.flush.assert_called_once()
+
+
+def test_spools_message_head_to_disk_over_memory_budget_and_releases_it(tmp_path):
+    mock_s3_client = _a_s3_client()
+    spool = MessageSpool(SpoolConfig(directory=str(tmp_path), message_memory_budget_bytes=KB))
+    uploaded_bodies = []
+
+    def put_object(**kwargs):
+        uploaded_bodies.append(kwargs["Body"].read())
+        return {}
+
+    mock_s3_client.put_object.side_effect = put_object
+
+    uploader = S3Uploader(
+        mock_s3_client,
+        "test_bucket",
+        small_object_threshold_bytes=4 * KB,
+        transfer_manager=MagicMock(),
+        spool=spool,
+    )
+    uploader.upload(_a_mesh_message(content=b"x" * (2 * KB)), MagicMock())
+
+    assert uploaded_bodies == [b"x" * (2 * KB)]
+    assert spool.disk_bytes == 0
+
+
+def test_records_spool_usage():
+    forward_message_event = MagicMock()
+
+    uploader = S3Uploader(_a_s3_client(), "test_bucket", transfer_manager=MagicMock())
+    uploader.upload(_a_mesh_message(content=b"small"), forward_message_event)
+
+    forward_message_event.record_spool_usage.assert_called_once_with(5, 0)
+
+
+def test_records_payload_checksums():
+    forward_message_event = MagicMock()
+
+    uploader = S3Uploader(_a_s3_client(), "test_bucket", transfer_manager=MagicMock())
+    uploader.upload(_a_mesh_message(content=b"small"), forward_message_event)
+
+    forward_message_event.record_payload_checksums.assert_called_once_with(
+        hashlib.md5(b"small").hexdigest(), hashlib.sha256(b"small").hexdigest()
+    )
+
+
+def test_records_checksum_returned_by_s3_when_it_matches():
+    mock_s3_client = _a_s3_client()
+    mock_s3_client.put_object.return_value = {"ChecksumCRC32": _crc32(b"small")}
+    forward_message_event = MagicMock()
+
+    uploader = S3Uploader(mock_s3_client, "test_bucket", transfer_manager=MagicMock())
+    uploader.upload(_a_mesh_message(content=b"small"), forward_message_event)
+
+    forward_message_event.record_s3_checksum.assert_called_once_with(_crc32(b"small"))
+
+
+def test_upload_error_raised_when_checksum_returned_by_s3_does_not_match():
+    mock_s3_client = _a_s3_client()
+    mock_s3_client.put_object.return_value = {"ChecksumCRC32": _crc32(b"other")}
+
+    uploader = S3Uploader(mock_s3_client, "test_bucket", transfer_manager=MagicMock())
+
+    with pytest.raises(UploaderError) as e:
+        uploader.upload(_a_mesh_message(content=b"small"), MagicMock())
+
+    assert "checksum mismatch" in str(e.value)
+    mock_s3_client.delete_object.assert_called_once_with(
+        Bucket="test_bucket", Key="2020/11/02/a_file_A1BH13.dat"
+    )
+
+
+def test_verifies_transferred_object_against_composite_checksum_of_its_parts():
+    mock_s3_client = _a_s3_client()
+    part_size = 5 * 1024 * KB
+    content = os.urandom(part_size + KB)
+    part_crcs = b"".join(
+        zlib.crc32(part).to_bytes(4, byteorder="big")
+        for part in [content[:part_size], content[part_size:]]
+    )
+    mock_s3_client.head_object.return_value = {"ChecksumCRC32": f"{_crc32(part_crcs)}-2"}
+    forward_message_event = MagicMock()
+
+    uploader = S3Uploader(
+        mock_s3_client,
+        "test_bucket",
+        transfer_config=TransferConfig(multipart_chunksize=part_size),
+        transfer_manager=_build_transfer_manager({}),
+    )
+    uploader.upload(_a_mesh_message(content=content), forward_message_event)
+
+    mock_s3_client.head_object.assert_called_once_with(
+        Bucket="test_bucket", Key="2020/11/02/a_file_A1BH13.dat", ChecksumMode="ENABLED"
+    )
+    forward_message_event.record_s3_checksum.assert_called_once_with(f"{_crc32(part_crcs)}-2")
+
+
+def test_upload_error_raised_when_transferred_object_checksum_does_not_match():
+    mock_s3_client = _a_s3_client()
+    mock_s3_client.head_object.return_value = {"ChecksumCRC32": _crc32(b"other")}
+
+    uploader = S3Uploader(
+        mock_s3_client,
+        "test_bucket",
+        small_object_threshold_bytes=0,
+        transfer_manager=_build_transfer_manager({}),
+    )
+
+    with pytest.raises(UploaderError):
+        uploader.upload(_a_mesh_message(), MagicMock())
+
+    mock_s3_client.delete_object.assert_called_once_with(
+        Bucket="test_bucket", Key="2020/11/02/a_file_A1BH13.dat"
+    )
+
+
+def test_transfers_idempotent_message_to_staging_key_and_copies_it_into_place_once_verified():
+    mock_s3_client = _a_s3_client()
+    mock_s3_client.head_object.side_effect = [build_client_error(code="404"), {}]
+    uploaded = {}
+    transfer_manager = _build_transfer_manager(uploaded)
+    key = "2020/11/02/20201102000000_ABCDEF/a_file_A1BH13.dat"
+
+    uploader = S3Uploader(
+        mock_s3_client,
+        "test_bucket",
+        small_object_threshold_bytes=0,
+        transfer_manager=transfer_manager,
+        key_strategy=MESSAGE_ID_KEY_STRATEGY,
+    )
+    uploader.upload(_a_mesh_message(), MagicMock())
+
+    [(_, staging_key)] = uploaded.keys()
+    assert staging_key.startswith("_staging/")
+    transfer_manager.copy.assert_called_once_with(
+        {"Bucket": "test_bucket", "Key": staging_key},
+        "test_bucket",
+        key,
+        extra_args={"ChecksumAlgorithm": "CRC32"},
+    )
+    mock_s3_client.delete_object.assert_called_once_with(Bucket="test_bucket", Key=staging_key)
+
+
+def test_does_not_copy_idempotent_message_into_place_when_its_checksum_does_not_match():
+    mock_s3_client = _a_s3_client()
+    mock_s3_client.head_object.side_effect = [
+        build_client_error(code="404"),
+        {"ChecksumCRC32": _crc32(b"other")},
+    ]
+    transfer_manager = _build_transfer_manager({})
+
+    uploader = S3Uploader(
+        mock_s3_client,
+        "test_bucket",
+        small_object_threshold_bytes=0,
+        transfer_manager=transfer_manager,
+        key_strategy=MESSAGE_ID_KEY_STRATEGY,
+    )
+
+    with pytest.raises(UploaderError):
+        uploader.upload(_a_mesh_message(), MagicMock())
+
+    transfer_manager.copy.assert_not_called()
+    deleted_keys = {call.kwargs["Key"] for call in mock_s3_client.delete_object.call_args_list}
+    assert all(key.startswith("_staging/") for key in deleted_keys)
+
+
+def test_attaches_selected_mesh_headers_as_metadata_of_transferred_object():
+    transfer_manager = _build_transfer_manager({})
+
+    uploader = S3Uploader(
+        _a_s3_client(),
+        "test_bucket",
+        small_object_threshold_bytes=0,
+        transfer_manager=transfer_manager,
+        metadata_headers=["from", "subject"],
+    )
+    uploader.upload(_a_mesh_message(subject="A subject"), MagicMock())
+
+    assert transfer_manager.upload.call_args.kwargs["extra_args"] == {
+        "Metadata": {"mesh-from": "X26OT001", "mesh-subject": "A subject"},
+        "ChecksumAlgorithm": "CRC32",
+    }
+
+
+def test_skips_selected_mesh_headers_missing_from_message():
+    mock_s3_client = _a_s3_client()
+
+    uploader = S3Uploader(
+        mock_s3_client,
+        "test_bucket",
+        transfer_manager=MagicMock(),
+        metadata_headers=["from", "localid"],
+    )
+    uploader.upload(_a_mesh_message(), MagicMock())
+
+    metadata = mock_s3_client.put_object.call_args.kwargs["Metadata"]
+    assert "mesh-from" in metadata
+    assert "mesh-localid" not in metadata
+
+
+def test_percent_encodes_header_values_that_s3_metadata_cannot_hold():
+    mock_s3_client = _a_s3_client()
+
+    uploader = S3Uploader(
+        mock_s3_client, "test_bucket", transfer_manager=MagicMock(), metadata_headers=["subject"]
+    )
+    uploader.upload(_a_mesh_message(subject=" Caf\u00e9 100%\nreport "), MagicMock())
+
+    metadata = mock_s3_client.put_object.call_args.kwargs["Metadata"]
+    assert metadata["mesh-subject"] == "Caf%C3%A9 100%25%0Areport"
+
+
+def test_drops_headers_that_would_exceed_the_s3_metadata_size_limit():
+    mock_s3_client = _a_s3_client()
+    forward_message_event = MagicMock()
+
+    uploader = S3Uploader(
+        mock_s3_client,
+        "test_bucket",
+        transfer_manager=MagicMock(),
+        metadata_headers=["from", "subject", "to"],
+    )
+    uploader.upload(_a_mesh_message(subject="x" * 2000), forward_message_event)
+
+    metadata = mock_s3_client.put_object.call_args.kwargs["Metadata"]
+    assert "mesh-subject" not in metadata
+    assert metadata["mesh-to"] == "X26OT002"
+    assert sum(len(key) + len(value) for key, value in metadata.items()) <= 2 * KB
+    forward_message_event.record_s3_metadata_headers_dropped.assert_called_once_with(["subject"])
+
+
+def test_places_keys_under_partition_of_key_layout():
+    mock_s3_client = _a_s3_client()
+    key_layout = KeyLayout(KeyLayoutConfig(layout="{sender}/{year}/{month}/{day}/{hour}"))
+
+    uploader = S3Uploader(
+        mock_s3_client, "test_bucket", transfer_manager=MagicMock(), key_layout=key_layout
+    )
+    uploader.upload(_a_mesh_message(), MagicMock())
+
+    assert mock_s3_client.put_object.call_args.kwargs["Key"] == (
+        "X26OT001/2020/11/02/00/a_file_A1BH13.dat"
+    )
+
+
+def test_adds_uploaded_key_to_partition_manifest():
+    partition_manifests = MagicMock()
+
+    uploader = S3Uploader(
+        _a_s3_client(),
+        "test_bucket",
+        transfer_manager=MagicMock(),
+        partition_manifests=partition_manifests,
+    )
+    upload = uploader.upload(_a_mesh_message(), MagicMock())
+
+    assert upload is partition_manifests.add.return_value
+    partition_manifests.add.assert_called_once_with("2020/11/02", "2020/11/02/a_file_A1BH13.dat")
+
+
+def test_adds_redelivered_key_to_partition_manifest_without_uploading_it_again():
+    mock_s3_client = _a_s3_client()
+    mock_s3_client.head_object.side_effect = build_client_error(code="404")
+    partition_manifests = MagicMock()
+
+    uploader = S3Uploader(
+        mock_s3_client,
+        "test_bucket",
+        transfer_manager=MagicMock(),
+        key_strategy=MESSAGE_ID_KEY_STRATEGY,
+        partition_manifests=partition_manifests,
+    )
+    uploader.upload(_a_mesh_message(), MagicMock())
+    uploader.upload(_a_mesh_message(), MagicMock())
+
+    mock_s3_client.put_object.assert_called_once()
+    assert partition_manifests.add.call_count == 2
+
+
+def test_flush_writes_partition_manifests():
+    partition_manifests = MagicMock()
+
+    uploader = S3Uploader(
+        _a_s3_client(),
+        "test_bucket",
+        transfer_manager=MagicMock(),
+        partition_manifests=partition_manifests,
+    )
+    uploader.flush()
+
+    partition_manifests.flush.assert_called_once()
+
+
+def test_verifies_multipart_transfer_against_checksums_of_the_parts_s3transfer_sent():
+    part_size = 5 * 1024 * KB
+    content = os.urandom(part_size + KB)
+    parts = [content[:part_size], content[part_size:]]
+    part_crcs = b"".join(zlib.crc32(part).to_bytes(4, byteorder="big") for part in parts)
+    s3_client = boto3.client(
+        "s3",
+        region_name="eu-west-2",
+        aws_access_key_id="testing",
+        aws_secret_access_key="testing",
+    )
+    key = "2020/11/02/a_file_A1BH13.dat"
+    transfer_config = TransferConfig(
+        multipart_threshold=part_size, multipart_chunksize=part_size, use_threads=False
+    )
+    forward_message_event = MagicMock()
+
+    with Stubber(s3_client) as stubber:
+        stubber.add_response(
+            "create_multipart_upload",
+            {"UploadId": "upload-id"},
+            {
+                "Bucket": "test_bucket",
+                "Key": key,
+                "Metadata": HEADER_METADATA,
+                "ChecksumAlgorithm": "CRC32",
+            },
+        )
+        for part in parts:
+            stubber.add_response("upload_part", {"ETag": "etag", "ChecksumCRC32": _crc32(part)})
+        stubber.add_response("complete_multipart_upload", {})
+        stubber.add_response(
+            "head_object",
+            {"ChecksumCRC32": f"{_crc32(part_crcs)}-2"},
+            {"Bucket": "test_bucket", "Key": key, "ChecksumMode": "ENABLED"},
+        )
+
+        uploader = S3Uploader(s3_client, "test_bucket", transfer_config=transfer_config)
+        uploader.upload(_a_mesh_message(content=content), forward_message_event)
+
+        stubber.assert_no_pending_responses()
+    forward_message_event.record_s3_checksum.assert_called_once_with(f"{_crc32(part_crcs)}-2")
+
+
+def test_records_that_s3_returned_no_checksum_to_verify():
+    forward_message_event = MagicMock()
+
+    uploader = S3Uploader(
+        _a_s3_client(),
+        "test_bucket",
+        small_object_threshold_bytes=0,
+        transfer_manager=_build_transfer_manager({}),
+    )
+    uploader.upload(_a_mesh_message(), forward_message_event)
+
+    forward_message_event.record_s3_checksum_unavailable.assert_called_once()
+    forward_message_event.record_s3_checksum.assert_not_called()
@@ -0,0 +1,75 @@
+from unittest.mock import MagicMock
+
+from awsmesh.scheduler import AdaptivePollScheduler, FixedPollScheduler
+
+
+def _build_adaptive_scheduler(retry_backoff=None):
+    return AdaptivePollScheduler(
+        min_interval_sec=1,
+        max_interval_sec=60,
+        retry_backoff=retry_backoff or MagicMock(),
+    )
+
+
+def test_fixed_scheduler_always_waits_poll_frequency():
+    scheduler = FixedPollScheduler(60)
+
+    scheduler.record_poll(0)
+
+    assert scheduler.idle_interval() == 60
+    assert scheduler.retry_interval() == 60
+    assert scheduler.current_interval_sec == 60
+
+
+def test_adaptive_scheduler_starts_at_min_interval():
+    scheduler = _build_adaptive_scheduler()
+
+    assert scheduler.idle_interval() == 1
+
+
+def test_adaptive_scheduler_backs_off_while_mailbox_stays_idle():
+    scheduler = _build_adaptive_scheduler()
+
+    intervals = []
+    for _ in range(4):
+        scheduler.record_poll(0)
+        intervals.append(scheduler.idle_interval())
+
+    assert intervals == [2, 4, 8, 16]
+
+
+def test_adaptive_scheduler_does_not_exceed_max_interval():
+    scheduler = _build_adaptive_scheduler()
+
+    for _ in range(10):
+        scheduler.record_poll(0)
+
+    assert scheduler.idle_interval() == 60
+    assert scheduler.current_interval_sec == 60
+
+
+def test_adaptive_scheduler_shortens_interval_when_poll_finds_messages():
+    scheduler = _build_adaptive_scheduler()
+    for _ in range(10):
+        scheduler.record_poll(0)
+
+    scheduler.record_poll(3)
+
+    assert scheduler.idle_interval() == 1
+
+
+def test_adaptive_scheduler_uses_retry_backoff_for_retry_interval():
+    retry_backoff = MagicMock()
+    retry_backoff.next_delay.return_value = 7
+    scheduler = _build_adaptive_scheduler(retry_backoff)
+
+    assert scheduler.retry_interval() == 7
+
+
+def test_adaptive_scheduler_resets_retry_backoff_on_success():
+    retry_backoff = MagicMock()
+    scheduler = _build_adaptive_scheduler(retry_backoff)
+
+    scheduler.record_success()
+
+    retry_backoff.reset.assert_called_once()
@@ -1,19 +1,26 @@
+import base64
+import gzip
+import hashlib
+import json
+import os
 from unittest.mock import ANY, MagicMock
 
 import pytest
+from botocore.exceptions import EndpointConnectionError
 
-from awsmesh.sns import SNSUploader
+from awsmesh.compression import UnsupportedCompression
+from awsmesh.sns import SNS_MAX_MESSAGE_BYTES, SnsBatchConfig, SNSUploader
 from awsmesh.uploader import UploaderError
 from tests.builders.aws import build_client_error
 from tests.builders.common import a_string
+from tests.builders.mesh import build_mesh_message, build_mex_headers
 
 
 def test_upload_publishes_to_sns():
     mock_sns_client = MagicMock()
     topic_arn = "test_topic"
-    mesh_message = MagicMock()
     mesh_message_value = "some_string"
-    mesh_message.read.return_value = mesh_message_value.encode("utf-8")
+    mesh_message = build_mesh_message(mesh_message_value.encode("utf-8"))
 
     uploader = SNSUploader(mock_sns_client, topic_arn)
     uploader.upload(mesh_message, MagicMock())
@@ -26,7 +33,7 @@ def test_upload_publishes_to_sns():
 def test_upload_records_message_id():
     mock_sns_client = MagicMock()
     topic_arn = "test_topic"
-    mesh_message = MagicMock()
+    mesh_message = build_mesh_message(b"content")
     forward_message_event = MagicMock()
     message_id = a_string()
     mock_sns_client.publish.return_value = {"MessageId": message_id}
@@ -39,8 +46,7 @@ def test_upload_records_message_id():
 
 def test_upload__will_just_log_and_not_throw__if_there_is_no_message_body_to_upload_rather_than_upload__it_is_probably_an_error_report():
     mock_sns_client = MagicMock()
-    empty_mesh_message = MagicMock()
-    empty_mesh_message.read.return_value = "".encode("utf-8")
+    empty_mesh_message = build_mesh_message(b"")
 
     forward_message_event = MagicMock()
 
@@ -55,7 +61,7 @@ def test_upload__will_just_log_and_not_throw__if_there_is_no_message_body_to_upl
 def test_upload__records_error__when_sns_client_raises_invalid_parameter_exception__which_covers_messages_that_are_too_large():
     mock_sns_client = MagicMock()
     forward_message_event = MagicMock()
-    mesh_message = MagicMock()
+    mesh_message = build_mesh_message(b"content")
 
     mock_sns_client.publish.side_effect = build_client_error(
         code="InvalidParameter", message="boom"
@@ -72,7 +78,7 @@ def test_upload__records_error__when_sns_client_raises_invalid_parameter_excepti
 def test_upload__error_is_raised__when_sns_client_raises_invalid_parameter_exception__which_covers_messages_that_are_too_large():
     mock_sns_client = MagicMock()
     forward_message_event = MagicMock()
-    mesh_message = MagicMock()
+    mesh_message = build_mesh_message(b"content")
 
     mock_sns_client.publish.side_effect = build_client_error(
         code="InvalidParameter", message="boom"
@@ -89,7 +95,7 @@ def test_upload__error_is_raised__when_sns_client_raises_invalid_parameter_excep
 def test_upload_error_raised_when_upload_raises_exception():
     mock_sns_client = MagicMock()
     topic_arn = "test_topic"
-    mesh_message = MagicMock()
+    mesh_message = build_mesh_message(b"content")
     uploader = SNSUploader(mock_sns_client, topic_arn)
     error_message = "test_error"
     mock_sns_client.publish.side_effect = build_client_error(message=error_message)
@@ -100,13 +106,18 @@ def test_upload_error_raised_when_upload_raises_exception():
     assert error_message in str(e.value)
 
 
-def test_upload_forwards_just_the_messageid_mesh_message_as_sns_message_attribute():
+def test_upload_forwards_message_id_and_payload_checksums_as_sns_message_attributes():
     mock_sns_client = MagicMock()
-    mesh_message = MagicMock()
-    mesh_message.id = "the-message-id"
+    mesh_message = build_mesh_message(b"content", message_id="the-message-id")
 
     expected_sns_message_attributes = {
-        "meshMessageId": {"DataType": "String", "StringValue": "the-message-id"}
+        "meshMessageId": {"DataType": "String", "StringValue": "the-message-id"},
+        "payloadMd5": {"DataType": "String", "StringValue": hashlib.md5(b"content").hexdigest()},
+        "payloadSha256": {
+            "DataType": "String",
+            "StringValue": hashlib.sha256(b"content").hexdigest(),
+        },
+        "payloadStorage": {"DataType": "String", "StringValue": "inline"},
     }
 
     uploader = SNSUploader(mock_sns_client, "test_topic")
@@ -115,3 +126,542 @@ def test_upload_forwards_just_the_messageid_mesh_message_as_sns_message_attribut
     mock_sns_client.publish.assert_called_once_with(
         TopicArn=ANY, Message=ANY, MessageAttributes=expected_sns_message_attributes
     )
+
+
+def test_upload_error_raised_without_publishing_when_message_exceeds_sns_limit():
+    mock_sns_client = MagicMock()
+    forward_message_event = MagicMock()
+    mesh_message = build_mesh_message(b"x" * (SNS_MAX_MESSAGE_BYTES + 1))
+
+    uploader = SNSUploader(mock_sns_client, "some_topic_arn")
+
+    with pytest.raises(UploaderError):
+        uploader.upload(mesh_message, forward_message_event)
+
+    mock_sns_client.publish.assert_not_called()
+    forward_message_event.record_sns_message_too_large_error.assert_called_once_with(
+        SNS_MAX_MESSAGE_BYTES
+    )
+
+
+def _published_bytes(publish_kwargs):
+    return len(publish_kwargs["Message"].encode("utf-8")) + sum(
+        len(name) + len(attribute["DataType"]) + len(attribute["StringValue"])
+        for name, attribute in publish_kwargs["MessageAttributes"].items()
+    )
+
+
+def test_upload_publishes_message_that_fits_sns_limit_with_its_attributes():
+    mock_sns_client = MagicMock()
+    mesh_message = build_mesh_message(b"x" * (SNS_MAX_MESSAGE_BYTES - 512))
+
+    uploader = SNSUploader(mock_sns_client, "some_topic_arn")
+    uploader.upload(mesh_message, MagicMock())
+
+    assert _published_bytes(mock_sns_client.publish.call_args.kwargs) <= SNS_MAX_MESSAGE_BYTES
+
+
+def test_upload_error_raised_when_message_only_fits_sns_limit_without_its_attributes():
+    mock_sns_client = MagicMock()
+    forward_message_event = MagicMock()
+    mesh_message = build_mesh_message(b"x" * SNS_MAX_MESSAGE_BYTES)
+
+    uploader = SNSUploader(mock_sns_client, "some_topic_arn")
+
+    with pytest.raises(UploaderError):
+        uploader.upload(mesh_message, forward_message_event)
+
+    mock_sns_client.publish.assert_not_called()
+    forward_message_event.record_sns_message_too_large_error.assert_called_once_with(
+        SNS_MAX_MESSAGE_BYTES
+    )
+
+
+def test_upload_records_payload_checksums():
+    forward_message_event = MagicMock()
+
+    uploader = SNSUploader(MagicMock(), "test_topic")
+    uploader.upload(build_mesh_message(b"content"), forward_message_event)
+
+    forward_message_event.record_payload_checksums.assert_called_once_with(
+        hashlib.md5(b"content").hexdigest(), hashlib.sha256(b"content").hexdigest()
+    )
+
+
+def _a_batching_uploader(mock_sns_client, max_entries=10, clock=lambda: 0):
+    return SNSUploader(
+        mock_sns_client,
+        "test_topic",
+        batch_config=SnsBatchConfig(max_entries=max_entries, linger_sec=1),
+        clock=clock,
+    )
+
+
+def _published_messages(mock_sns_client):
+    return [
+        [entry["Message"] for entry in call.kwargs["PublishBatchRequestEntries"]]
+        for call in mock_sns_client.publish_batch.call_args_list
+    ]
+
+
+def test_batching_uploader_defers_publishing_until_flush():
+    mock_sns_client = MagicMock()
+    uploader = _a_batching_uploader(mock_sns_client)
+
+    upload = uploader.upload(build_mesh_message(b"first"), MagicMock())
+
+    mock_sns_client.publish.assert_not_called()
+    mock_sns_client.publish_batch.assert_not_called()
+    assert not upload.done()
+
+
+def test_batching_uploader_publishes_buffered_messages_in_one_batch_on_flush():
+    mock_sns_client = MagicMock()
+    uploader = _a_batching_uploader(mock_sns_client)
+
+    uploader.upload(build_mesh_message(b"first", message_id="first-id"), MagicMock())
+    uploader.upload(build_mesh_message(b"second"), MagicMock())
+    uploader.flush()
+
+    entries = mock_sns_client.publish_batch.call_args.kwargs["PublishBatchRequestEntries"]
+    assert mock_sns_client.publish_batch.call_args.kwargs["TopicArn"] == "test_topic"
+    assert [(entry["Id"], entry["Message"]) for entry in entries] == [
+        ("0", "first"),
+        ("1", "second"),
+    ]
+    assert entries[0]["MessageAttributes"]["meshMessageId"]["StringValue"] == "first-id"
+
+
+def test_batching_uploader_publishes_when_batch_is_full():
+    mock_sns_client = MagicMock()
+    uploader = _a_batching_uploader(mock_sns_client, max_entries=2)
+
+    for content in [b"first", b"second", b"third"]:
+        uploader.upload(build_mesh_message(content), MagicMock())
+
+    assert _published_messages(mock_sns_client) == [["first", "second"]]
+
+
+def test_batching_uploader_publishes_when_oldest_message_has_lingered():
+    mock_sns_client = MagicMock()
+    uploader = _a_batching_uploader(mock_sns_client, clock=MagicMock(side_effect=[0, 0, 1]))
+
+    uploader.upload(build_mesh_message(b"first"), MagicMock())
+    uploader.upload(build_mesh_message(b"second"), MagicMock())
+
+    assert _published_messages(mock_sns_client) == [["first", "second"]]
+
+
+def test_batching_uploader_keeps_each_batch_within_the_sns_size_limit():
+    mock_sns_client = MagicMock()
+    uploader = _a_batching_uploader(mock_sns_client)
+    content = b"x" * (SNS_MAX_MESSAGE_BYTES // 2)
+
+    uploader.upload(build_mesh_message(content), MagicMock())
+    uploader.upload(build_mesh_message(content), MagicMock())
+    uploader.flush()
+
+    assert [len(batch) for batch in _published_messages(mock_sns_client)] == [1, 1]
+
+
+def test_batching_uploader_maps_batch_results_back_to_each_message():
+    mock_sns_client = MagicMock()
+    mock_sns_client.publish_batch.return_value = {
+        "Successful": [{"Id": "0", "MessageId": "sns-id"}],
+        "Failed": [{"Id": "1", "Code": "InvalidParameter", "Message": "boom", "SenderFault": True}],
+    }
+    accepted_event = MagicMock()
+    rejected_event = MagicMock()
+    uploader = _a_batching_uploader(mock_sns_client)
+
+    accepted = uploader.upload(build_mesh_message(b"first"), accepted_event)
+    rejected = uploader.upload(build_mesh_message(b"second"), rejected_event)
+    uploader.flush()
+
+    assert accepted.result() is None
+    accepted_event.record_sns_message_id.assert_called_once_with("sns-id")
+    with pytest.raises(UploaderError):
+        rejected.result()
+    rejected_event.record_invalid_parameter_error.assert_called_once_with("boom")
+    rejected_event.record_sns_message_id.assert_not_called()
+
+
+def test_batching_uploader_fails_every_message_when_batch_request_fails():
+    mock_sns_client = MagicMock()
+    mock_sns_client.publish_batch.side_effect = build_client_error(message="throttled")
+    uploader = _a_batching_uploader(mock_sns_client)
+
+    uploads = [uploader.upload(build_mesh_message(b"content"), MagicMock()) for _ in range(2)]
+    uploader.flush()
+
+    for upload in uploads:
+        with pytest.raises(UploaderError) as e:
+            upload.result()
+        assert "throttled" in str(e.value)
+
+
+def test_batching_uploader_fails_every_message_when_sns_cannot_be_reached():
+    mock_sns_client = MagicMock()
+    mock_sns_client.publish_batch.side_effect = EndpointConnectionError(endpoint_url="https://sns")
+    uploader = _a_batching_uploader(mock_sns_client)
+
+    uploads = [uploader.upload(build_mesh_message(b"content"), MagicMock()) for _ in range(2)]
+    uploader.flush()
+
+    for upload in uploads:
+        with pytest.raises(UploaderError) as e:
+            upload.result(timeout=0)
+        assert "EndpointConnectionError" in str(e.value)
+
+
+def test_batching_uploader_fails_remaining_messages_when_batch_result_is_malformed():
+    mock_sns_client = MagicMock()
+    mock_sns_client.publish_batch.return_value = {
+        "Successful": [{"Id": "0", "MessageId": "sns-id"}, {"Id": "1"}],
+    }
+    uploader = _a_batching_uploader(mock_sns_client)
+
+    accepted = uploader.upload(build_mesh_message(b"first"), MagicMock())
+    malformed = uploader.upload(build_mesh_message(b"second"), MagicMock())
+    uploader.flush()
+
+    assert accepted.result(timeout=0) is None
+    with pytest.raises(UploaderError):
+        malformed.result(timeout=0)
+
+
+def test_batching_uploader_fails_messages_missing_from_batch_result():
+    mock_sns_client = MagicMock()
+    mock_sns_client.publish_batch.return_value = {"Successful": [], "Failed": []}
+    uploader = _a_batching_uploader(mock_sns_client)
+
+    upload = uploader.upload(build_mesh_message(b"content"), MagicMock())
+    uploader.flush()
+
+    with pytest.raises(UploaderError):
+        upload.result()
+
+
+def _a_claim_check_store(threshold_bytes=10):
+    store = MagicMock()
+    store.threshold_bytes = threshold_bytes
+    store.store.side_effect = lambda message, head, payload: {
+        "bucket": "claim_bucket",
+        "key": f"claim-checks/{message.id}",
+        "size": len(bytes(head) + payload.read()),
+        "sha256": payload.checksums.sha256,
+    }
+    return store
+
+
+def test_publishes_claim_check_pointer_for_payload_over_threshold():
+    mock_sns_client = MagicMock()
+    content = b"x" * 11
+
+    uploader = SNSUploader(
+        mock_sns_client, "test_topic", claim_check_store=_a_claim_check_store(threshold_bytes=10)
+    )
+    uploader.upload(build_mesh_message(content, message_id="the-message-id"), MagicMock())
+
+    publish_kwargs = mock_sns_client.publish.call_args.kwargs
+    assert json.loads(publish_kwargs["Message"]) == {
+        "claimCheck": {
+            "bucket": "claim_bucket",
+            "key": "claim-checks/the-message-id",
+            "size": 11,
+            "sha256": hashlib.sha256(content).hexdigest(),
+        }
+    }
+    assert publish_kwargs["MessageAttributes"]["payloadStorage"]["StringValue"] == "s3"
+
+
+def test_publishes_payload_under_claim_check_threshold_inline():
+    mock_sns_client = MagicMock()
+    claim_check_store = _a_claim_check_store(threshold_bytes=10)
+
+    uploader = SNSUploader(mock_sns_client, "test_topic", claim_check_store=claim_check_store)
+    uploader.upload(build_mesh_message(b"x" * 10), MagicMock())
+
+    claim_check_store.store.assert_not_called()
+    assert mock_sns_client.publish.call_args.kwargs["Message"] == "x" * 10
+
+
+def test_offloads_message_over_sns_limit_instead_of_failing():
+    mock_sns_client = MagicMock()
+    forward_message_event = MagicMock()
+
+    uploader = SNSUploader(
+        mock_sns_client,
+        "test_topic",
+        claim_check_store=_a_claim_check_store(threshold_bytes=SNS_MAX_MESSAGE_BYTES),
+    )
+    uploader.upload(
+        build_mesh_message(b"x" * (SNS_MAX_MESSAGE_BYTES + 1), message_id="the-message-id"),
+        forward_message_event,
+    )
+
+    mock_sns_client.publish.assert_called_once()
+    forward_message_event.record_s3_key.assert_called_once_with("claim-checks/the-message-id")
+    forward_message_event.record_sns_message_too_large_error.assert_not_called()
+
+
+def test_offloads_message_that_only_fits_sns_limit_without_its_attributes():
+    mock_sns_client = MagicMock()
+
+    uploader = SNSUploader(
+        mock_sns_client,
+        "test_topic",
+        claim_check_store=_a_claim_check_store(threshold_bytes=SNS_MAX_MESSAGE_BYTES),
+    )
+    uploader.upload(
+        build_mesh_message(b"x" * SNS_MAX_MESSAGE_BYTES, message_id="the-message-id"),
+        MagicMock(),
+    )
+
+    attributes = mock_sns_client.publish.call_args.kwargs["MessageAttributes"]
+    assert attributes["payloadStorage"]["StringValue"] == "s3"
+
+
+def test_upload_error_raised_without_publishing_when_claim_check_cannot_be_stored():
+    mock_sns_client = MagicMock()
+    claim_check_store = _a_claim_check_store()
+    claim_check_store.store.side_effect = build_client_error(message="access denied")
+
+    uploader = SNSUploader(mock_sns_client, "test_topic", claim_check_store=claim_check_store)
+
+    with pytest.raises(UploaderError):
+        uploader.upload(build_mesh_message(b"x" * 11), MagicMock())
+    mock_sns_client.publish.assert_not_called()
+
+
+FIFO_TOPIC_ARN = "arn:aws:sns:eu-west-2:123456789012:mesh.fifo"
+
+
+def _a_fifo_message(sender="X26OT001", message_id="the-message-id"):
+    return build_mesh_message(
+        b"content",
+        message_id=message_id,
+        mex_headers=build_mex_headers(**{"from": sender}),
+    )
+
+
+def test_publishes_to_fifo_topic_with_sender_group_and_message_id_deduplication():
+    mock_sns_client = MagicMock()
+
+    uploader = SNSUploader(mock_sns_client, FIFO_TOPIC_ARN)
+    uploader.upload(_a_fifo_message(), MagicMock())
+
+    publish_kwargs = mock_sns_client.publish.call_args.kwargs
+    assert publish_kwargs["MessageGroupId"] == "X26OT001"
+    assert publish_kwargs["MessageDeduplicationId"] == "the-message-id"
+
+
+def test_does_not_set_fifo_parameters_for_standard_topic():
+    mock_sns_client = MagicMock()
+
+    uploader = SNSUploader(mock_sns_client, "arn:aws:sns:eu-west-2:123456789012:mesh")
+    uploader.upload(_a_fifo_message(), MagicMock())
+
+    assert "MessageGroupId" not in mock_sns_client.publish.call_args.kwargs
+    assert "MessageDeduplicationId" not in mock_sns_client.publish.call_args.kwargs
+
+
+def test_derives_fifo_group_from_configured_header():
+    mock_sns_client = MagicMock()
+    message = build_mesh_message(
+        b"content", mex_headers={**build_mex_headers(), "workflowid": "A_WORKFLOW"}
+    )
+
+    uploader = SNSUploader(mock_sns_client, FIFO_TOPIC_ARN, fifo_group_header="workflowid")
+    uploader.upload(message, MagicMock())
+
+    assert mock_sns_client.publish.call_args.kwargs["MessageGroupId"] == "A_WORKFLOW"
+
+
+def test_falls_back_to_message_id_group_when_group_header_is_missing():
+    mock_sns_client = MagicMock()
+
+    uploader = SNSUploader(mock_sns_client, FIFO_TOPIC_ARN, fifo_group_header="localid")
+    uploader.upload(_a_fifo_message(message_id="the-message-id"), MagicMock())
+
+    assert mock_sns_client.publish.call_args.kwargs["MessageGroupId"] == "the-message-id"
+
+
+def test_sanitizes_fifo_group_to_characters_and_length_sns_accepts():
+    mock_sns_client = MagicMock()
+
+    uploader = SNSUploader(mock_sns_client, FIFO_TOPIC_ARN)
+    uploader.upload(_a_fifo_message(sender="A sender\u00e9" + "x" * 200), MagicMock())
+
+    group = mock_sns_client.publish.call_args.kwargs["MessageGroupId"]
+    assert group.startswith("A_sender_xxx")
+    assert len(group) == 128
+
+
+def test_batches_fifo_messages_with_group_and_deduplication_ids():
+    mock_sns_client = MagicMock()
+    uploader = SNSUploader(mock_sns_client, FIFO_TOPIC_ARN, batch_config=SnsBatchConfig())
+
+    uploader.upload(_a_fifo_message(), MagicMock())
+    uploader.flush()
+
+    entry = mock_sns_client.publish_batch.call_args.kwargs["PublishBatchRequestEntries"][0]
+    assert entry["MessageGroupId"] == "X26OT001"
+    assert entry["MessageDeduplicationId"] == "the-message-id"
+
+
+def _published_attributes(mock_sns_client):
+    return {
+        name: attribute["StringValue"]
+        for name, attribute in mock_sns_client.publish.call_args.kwargs["MessageAttributes"].items()
+    }
+
+
+def _incompressible_text(size):
+    return base64.b64encode(os.urandom(size))[:size]
+
+
+def test_publishes_compressible_payload_over_sns_limit_gzip_base64_encoded():
+    mock_sns_client = MagicMock()
+    content = b"<record>value</record>" * SNS_MAX_MESSAGE_BYTES
+
+    uploader = SNSUploader(mock_sns_client, "test_topic", compression="gzip")
+    uploader.upload(build_mesh_message(content[: SNS_MAX_MESSAGE_BYTES * 2]), MagicMock())
+
+    published = mock_sns_client.publish.call_args.kwargs["Message"]
+    assert gzip.decompress(base64.b64decode(published)) == content[: SNS_MAX_MESSAGE_BYTES * 2]
+    assert _published_attributes(mock_sns_client)["payloadEncoding"] == "gzip+base64"
+
+
+def test_publishes_payload_raw_when_encoding_would_not_make_it_smaller():
+    mock_sns_client = MagicMock()
+
+    uploader = SNSUploader(mock_sns_client, "test_topic", compression="gzip")
+    uploader.upload(build_mesh_message(b"hello"), MagicMock())
+
+    assert mock_sns_client.publish.call_args.kwargs["Message"] == "hello"
+    assert _published_attributes(mock_sns_client)["payloadEncoding"] == "raw"
+
+
+def test_does_not_set_payload_encoding_without_compression():
+    mock_sns_client = MagicMock()
+
+    uploader = SNSUploader(mock_sns_client, "test_topic")
+    uploader.upload(build_mesh_message(b"hello"), MagicMock())
+
+    assert "payloadEncoding" not in _published_attributes(mock_sns_client)
+
+
+def test_offloads_payload_too_large_for_sns_even_when_compressed():
+    mock_sns_client = MagicMock()
+    content = _incompressible_text(SNS_MAX_MESSAGE_BYTES * 2)
+
+    uploader = SNSUploader(
+        mock_sns_client,
+        "test_topic",
+        claim_check_store=_a_claim_check_store(threshold_bytes=SNS_MAX_MESSAGE_BYTES),
+        compression="gzip",
+    )
+    uploader.upload(build_mesh_message(content), MagicMock())
+
+    published = json.loads(mock_sns_client.publish.call_args.kwargs["Message"])
+    assert published["claimCheck"]["size"] == len(content)
+    assert _published_attributes(mock_sns_client)["payloadStorage"] == "s3"
+
+
+def test_upload_error_raised_when_payload_too_large_for_sns_even_when_compressed():
+    mock_sns_client = MagicMock()
+
+    uploader = SNSUploader(mock_sns_client, "test_topic", compression="gzip")
+
+    with pytest.raises(UploaderError):
+        uploader.upload(
+            build_mesh_message(_incompressible_text(SNS_MAX_MESSAGE_BYTES * 2)), MagicMock()
+        )
+    mock_sns_client.publish.assert_not_called()
+
+
+def test_rejects_unsupported_compression():
+    with pytest.raises(UnsupportedCompression):
+        SNSUploader(MagicMock(), "test_topic", compression="zstd")
+
+
+def test_upload_error_raised_without_publishing_when_message_is_not_valid_utf8():
+    mock_sns_client = MagicMock()
+    forward_message_event = MagicMock()
+
+    uploader = SNSUploader(mock_sns_client, "test_topic")
+
+    with pytest.raises(UploaderError):
+        uploader.upload(build_mesh_message(b"abc\xff" + b"x" * 100), forward_message_event)
+    mock_sns_client.publish.assert_not_called()
+    forward_message_event.record_sns_invalid_utf8_error.assert_called_once_with(3)
+
+
+def test_stops_reading_message_as_soon_as_invalid_utf8_is_found():
+    mesh_message = build_mesh_message(b"\xff" + b"x" * SNS_MAX_MESSAGE_BYTES * 4)
+
+    uploader = SNSUploader(MagicMock(), "test_topic")
+
+    with pytest.raises(UploaderError):
+        uploader.upload(mesh_message, MagicMock())
+    assert mesh_message.bytes_read < SNS_MAX_MESSAGE_BYTES
+
+
+def test_publishes_multibyte_characters_split_across_reads():
+    mock_sns_client = MagicMock()
+    content = "a" + "é" * (SNS_MAX_MESSAGE_BYTES // 4)
+
+    uploader = SNSUploader(mock_sns_client, "test_topic")
+    uploader.upload(build_mesh_message(content.encode("utf-8")), MagicMock())
+
+    assert mock_sns_client.publish.call_args.kwargs["Message"] == content
+
+
+def test_upload_error_raised_when_message_ends_in_truncated_utf8_character():
+    forward_message_event = MagicMock()
+
+    uploader = SNSUploader(MagicMock(), "test_topic")
+
+    with pytest.raises(UploaderError):
+        uploader.upload(build_mesh_message(b"abc\xc3"), forward_message_event)
+    forward_message_event.record_sns_invalid_utf8_error.assert_called_once_with(3)
+
+
+def test_publishes_non_utf8_payload_gzip_base64_encoded_when_compression_is_enabled():
+    mock_sns_client = MagicMock()
+    content = b"\xff\xfe" * 100
+
+    uploader = SNSUploader(mock_sns_client, "test_topic", compression="gzip")
+    uploader.upload(build_mesh_message(content), MagicMock())
+
+    published = mock_sns_client.publish.call_args.kwargs["Message"]
+    assert gzip.decompress(base64.b64decode(published)) == content
+
+
+def test_offloads_non_utf8_payload_to_claim_check_store():
+    mock_sns_client = MagicMock()
+
+    uploader = SNSUploader(
+        mock_sns_client, "test_topic", claim_check_store=_a_claim_check_store(threshold_bytes=1024)
+    )
+    uploader.upload(build_mesh_message(b"\xff" * 10), MagicMock())
+
+    published = json.loads(mock_sns_client.publish.call_args.kwargs["Message"])
+    assert published["claimCheck"]["size"] == 10
+
+
+def test_exposes_fifo_group_used_to_order_publishes():
+    uploader = SNSUploader(MagicMock(), FIFO_TOPIC_ARN)
+
+    assert uploader.message_group(_a_fifo_message(sender="A sender")) == "A_sender"
+
+
+def test_reads_small_message_into_a_buffer_sized_to_the_message():
+    claim_check_store = _a_claim_check_store(threshold_bytes=1024)
+
+    uploader = SNSUploader(MagicMock(), "test_topic", claim_check_store=claim_check_store)
+    uploader.upload(build_mesh_message(b"\xff" * 10), MagicMock())
+
+    head = claim_check_store.store.call_args.args[1]
+    assert len(head.obj) == 10
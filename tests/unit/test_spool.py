@@ -0,0 +1,78 @@
+from io import BytesIO
+
+from awsmesh.spool import MessageSpool, SpoolConfig
+
+KB = 1024
+
+
+def _spool_to_disk(directory, **kwargs):
+    return MessageSpool(SpoolConfig(directory=str(directory), **kwargs))
+
+
+def test_keeps_message_under_budget_in_memory():
+    spool = MessageSpool()
+
+    body = spool.spool(BytesIO(b"some content"), 100)
+
+    assert not body.on_disk
+    assert body.payload() == b"some content"
+    assert spool.memory_bytes == 12
+
+
+def test_reads_no_more_than_max_bytes():
+    body = MessageSpool().spool(BytesIO(b"some content"), 4)
+
+    assert len(body) == 4
+    assert body.read() == b"some"
+
+
+def test_spills_message_over_message_memory_budget_to_disk(tmp_path):
+    spool = _spool_to_disk(tmp_path, message_memory_budget_bytes=KB)
+    content = bytes(range(256)) * 8
+
+    body = spool.spool(BytesIO(content), 4 * KB)
+
+    assert body.on_disk
+    assert body.read() == content
+    assert (spool.memory_bytes, spool.disk_bytes) == (0, len(content))
+
+
+def test_spills_to_disk_when_process_memory_budget_is_used(tmp_path):
+    spool = _spool_to_disk(tmp_path, memory_budget_bytes=KB)
+
+    first = spool.spool(BytesIO(b"x" * KB), KB)
+    second = spool.spool(BytesIO(b"y" * 10), KB)
+
+    assert not first.on_disk
+    assert second.on_disk
+    assert (spool.memory_bytes, spool.disk_bytes) == (KB, 10)
+
+
+def test_exposes_spooled_file_as_zero_copy_view(tmp_path):
+    body = _spool_to_disk(tmp_path, message_memory_budget_bytes=0).spool(
+        BytesIO(b"some content"), 100
+    )
+
+    with body.view() as view:
+        assert view[5:12] == b"content"
+
+
+def test_releases_usage_when_closed(tmp_path):
+    spool = _spool_to_disk(tmp_path, memory_budget_bytes=KB)
+    in_memory = spool.spool(BytesIO(b"x" * KB), KB)
+    on_disk = spool.spool(BytesIO(b"y" * 10), KB)
+
+    in_memory.close()
+    on_disk.close()
+
+    assert (spool.memory_bytes, spool.disk_bytes) == (0, 0)
+
+
+def test_supports_seeking_within_spooled_body():
+    body = MessageSpool().spool(BytesIO(b"some content"), 100)
+
+    body.read(4)
+    body.seek(0)
+
+    assert body.read(4) == b"some"
+    assert body.seek(0, 2) == 12
@@ -0,0 +1,205 @@
+import multiprocessing
+from itertools import count
+from queue import Queue
+from threading import Timer
+from unittest.mock import MagicMock, patch
+
+from awsmesh.partition import MessagePartition
+from awsmesh.supervisor import ForwarderSupervisor
+
+
+def _stop_after(iterations: int):
+    exit_event = MagicMock()
+    exit_event.is_set.side_effect = [False] * iterations + [True] * 100
+    return exit_event
+
+
+def _build_process_context(metrics=()):
+    process_context = MagicMock()
+    metrics_queue = Queue()
+    for metric in metrics:
+        metrics_queue.put(metric)
+    process_context.Queue.return_value = metrics_queue
+    return process_context
+
+
+def _alive_process(exits_when_terminated=True):
+    process = MagicMock()
+    process.is_alive.return_value = True
+    if exits_when_terminated:
+        process.terminate.side_effect = lambda: setattr(process.is_alive, "return_value", False)
+    return process
+
+
+def test_starts_one_worker_per_partition():
+    process_context = _build_process_context()
+    process_context.Process.side_effect = lambda **kwargs: _alive_process()
+    run_worker = MagicMock()
+    supervisor = ForwarderSupervisor(
+        run_worker, 3, probe=MagicMock(), exit_event=_stop_after(0), process_context=process_context
+    )
+
+    supervisor.start()
+
+    partitions = [call.kwargs["args"][1] for call in process_context.Process.call_args_list]
+    assert partitions == [MessagePartition(index, 3) for index in range(3)]
+
+
+def test_restarts_a_worker_that_exited_and_records_its_exit():
+    probe = MagicMock()
+    crashed_worker = MagicMock(exitcode=-9)
+    crashed_worker.is_alive.return_value = False
+    replacement_worker = _alive_process()
+    process_context = _build_process_context()
+    process_context.Process.side_effect = [crashed_worker, replacement_worker]
+    supervisor = ForwarderSupervisor(
+        MagicMock(),
+        1,
+        probe=probe,
+        exit_event=_stop_after(2),
+        process_context=process_context,
+        restart_initial_delay_sec=0,
+    )
+
+    supervisor.start()
+
+    assert process_context.Process.call_count == 2
+    replacement_worker.start.assert_called_once()
+    probe.new_worker_exit_event.return_value.record_worker.assert_called_once_with(0, -9)
+
+
+def _crashed_process():
+    process = MagicMock(exitcode=1)
+    process.is_alive.return_value = False
+    return process
+
+
+def _recorded_restart_delays(probe):
+    worker_exit_event = probe.new_worker_exit_event.return_value
+    return [call.args[0] for call in worker_exit_event.record_restart_delay.call_args_list]
+
+
+def test_waits_for_restart_backoff_before_restarting_an_exited_worker():
+    probe = MagicMock()
+    process_context = _build_process_context()
+    process_context.Process.side_effect = [_crashed_process(), _alive_process()]
+    supervisor = ForwarderSupervisor(
+        MagicMock(),
+        1,
+        probe=probe,
+        exit_event=_stop_after(6),
+        process_context=process_context,
+        clock=lambda: 0,
+        restart_initial_delay_sec=10,
+    )
+
+    supervisor.start()
+
+    assert process_context.Process.call_count == 1
+    [restart_delay] = _recorded_restart_delays(probe)
+    assert 5 <= restart_delay <= 10
+
+
+def test_backs_off_further_each_time_the_same_partition_exits():
+    probe = MagicMock()
+    process_context = _build_process_context()
+    process_context.Process.side_effect = lambda **kwargs: _crashed_process()
+    supervisor = ForwarderSupervisor(
+        MagicMock(),
+        1,
+        probe=probe,
+        exit_event=_stop_after(6),
+        process_context=process_context,
+        clock=count(step=1000).__next__,
+    )
+
+    supervisor.start()
+
+    first, second, third = _recorded_restart_delays(probe)
+    assert 0.5 <= first <= 1
+    assert 1 <= second <= 2
+    assert 2 <= third <= 4
+
+
+def test_resets_restart_backoff_once_a_worker_survives_an_interval():
+    probe = MagicMock()
+    survivor = _alive_process()
+    survivor.is_alive.side_effect = [True] + [False] * 100
+    process_context = _build_process_context()
+    process_context.Process.side_effect = [_crashed_process(), survivor, _alive_process()]
+    supervisor = ForwarderSupervisor(
+        MagicMock(),
+        1,
+        probe=probe,
+        exit_event=_stop_after(6),
+        process_context=process_context,
+        clock=count(step=1000).__next__,
+    )
+
+    supervisor.start()
+
+    first, second = _recorded_restart_delays(probe)
+    assert 0.5 <= first <= 1
+    assert 0.5 <= second <= 1
+
+
+def test_aggregates_metrics_reported_by_workers():
+    probe = MagicMock()
+    process_context = _build_process_context(
+        metrics=[
+            ("POLL_MESSAGE", None),
+            ("FORWARD_MESH_MESSAGE", None),
+            ("FORWARD_MESH_MESSAGE", "MESH_CLIENT_NETWORK_ERROR"),
+            ("POLL_MESSAGE", None),
+        ]
+    )
+    process_context.Process.side_effect = lambda **kwargs: _alive_process()
+    supervisor = ForwarderSupervisor(
+        MagicMock(), 2, probe=probe, exit_event=_stop_after(1), process_context=process_context
+    )
+
+    supervisor.start()
+
+    supervisor_metrics_event = probe.new_supervisor_metrics_event.return_value
+    supervisor_metrics_event.record_workers.assert_called_with(2, 0)
+    supervisor_metrics_event.record_event_counts.assert_any_call(
+        {"POLL_MESSAGE": 2, "FORWARD_MESH_MESSAGE": 2}
+    )
+    supervisor_metrics_event.record_error_counts.assert_any_call({"MESH_CLIENT_NETWORK_ERROR": 1})
+
+
+@patch("awsmesh.supervisor.WORKER_STOP_GRACE_SEC", 0)
+def test_terminates_workers_when_stopping_and_kills_those_that_do_not_exit():
+    stubborn_worker = _alive_process(exits_when_terminated=False)
+    process_context = _build_process_context()
+    process_context.Process.return_value = stubborn_worker
+    supervisor = ForwarderSupervisor(
+        MagicMock(),
+        1,
+        probe=MagicMock(),
+        exit_event=_stop_after(0),
+        process_context=process_context,
+    )
+
+    supervisor.start()
+
+    stubborn_worker.terminate.assert_called_once()
+    stubborn_worker.kill.assert_called_once()
+    stubborn_worker.join.assert_called_once()
+
+
+def test_forked_workers_report_events_to_the_supervisor():
+    probe = MagicMock()
+
+    def run_worker(partition, probe_listener):
+        probe_listener("POLL_MESSAGE", {"partition": partition.index}, "info")
+
+    supervisor = ForwarderSupervisor(
+        run_worker, 2, probe=probe, process_context=multiprocessing.get_context("fork")
+    )
+    Timer(0.5, supervisor.stop).start()
+
+    supervisor.start()
+
+    supervisor_metrics_event = probe.new_supervisor_metrics_event.return_value
+    supervisor_metrics_event.record_event_counts.assert_called_once_with({"POLL_MESSAGE": 2})